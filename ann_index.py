@@ -0,0 +1,141 @@
+"""
+IVF-flat 근사 최근접 이웃(ANN) 인덱스
+
+정규화된 임베딩을 구면 k-means로 nlist개의 클러스터로 나누고,
+검색 시 쿼리와 가까운 nprobe개의 클러스터에 속한 청크만 정확히 점수를 계산합니다.
+nprobe를 키울수록 정확도(recall)가 올라가고 지연시간도 늘어납니다.
+
+인덱스는 벡터 인덱스 디렉토리 안에 함께 저장됩니다.
+
+    ivf_centroids.npy      클러스터 중심 (nlist x dim, float32)
+    ivf_list_offsets.npy   클러스터별 청크 목록의 시작/끝 위치 (nlist + 1)
+    ivf_list_ids.npy       클러스터 순서로 정렬된 청크 번호
+
+사용법:
+    python ann_index.py [인덱스 디렉토리] [nlist] [nprobe]
+"""
+
+import os
+import sys
+import numpy as np
+from vector_store import read_header, write_header, EMBEDDINGS_FILE
+
+CENTROIDS_FILE = "ivf_centroids.npy"
+LIST_OFFSETS_FILE = "ivf_list_offsets.npy"
+LIST_IDS_FILE = "ivf_list_ids.npy"
+
+DEFAULT_NPROBE = 8
+KMEANS_ITERATIONS = 15
+TRAIN_POINTS_PER_LIST = 256  # 학습용 샘플 크기 = nlist * 이 값 (최대)
+ASSIGN_BLOCK_ROWS = 8192     # 클러스터 배정 시 한 번에 처리할 행 수
+
+def default_nlist(n_vectors):
+    """청크 수에 맞는 기본 클러스터 수 (약 2 * sqrt(n))"""
+    return max(1, min(n_vectors, int(2 * np.sqrt(n_vectors))))
+
+def _normalize_rows(matrix):
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+def assign_clusters(matrix, centroids):
+    """각 행을 내적이 가장 큰 클러스터에 배정합니다. (블록 단위로 메모리 제한)"""
+    assignments = np.empty(matrix.shape[0], dtype=np.int32)
+    for start in range(0, matrix.shape[0], ASSIGN_BLOCK_ROWS):
+        block = np.asarray(matrix[start:start + ASSIGN_BLOCK_ROWS], dtype=np.float32)
+        assignments[start:start + len(block)] = np.argmax(block @ centroids.T, axis=1)
+    return assignments
+
+def train_centroids(matrix, nlist, n_iter=KMEANS_ITERATIONS, seed=0):
+    """정규화된 벡터로 구면 k-means 클러스터 중심을 학습합니다."""
+    rng = np.random.default_rng(seed)
+    n_vectors = matrix.shape[0]
+    sample_size = min(n_vectors, nlist * TRAIN_POINTS_PER_LIST)
+    sample_ids = np.sort(rng.choice(n_vectors, size=sample_size, replace=False))
+    sample = np.asarray(matrix[sample_ids], dtype=np.float32)
+
+    centroids = sample[rng.choice(sample_size, size=nlist, replace=False)].copy()
+    for _ in range(n_iter):
+        assignments = np.argmax(sample @ centroids.T, axis=1)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assignments, sample)
+        counts = np.bincount(assignments, minlength=nlist)
+        # 비어 있는 클러스터는 임의의 샘플로 다시 시작
+        empty = counts == 0
+        if empty.any():
+            sums[empty] = sample[rng.choice(sample_size, size=int(empty.sum()), replace=False)]
+        centroids = _normalize_rows(sums).astype(np.float32)
+    return centroids
+
+class IVFIndex:
+    """IVF-flat 인덱스: 클러스터 중심 + 클러스터별 청크 번호 목록"""
+    def __init__(self, centroids, list_offsets, list_ids, nprobe=DEFAULT_NPROBE):
+        self.centroids = centroids
+        self.list_offsets = list_offsets
+        self.list_ids = list_ids
+        self.nprobe = nprobe
+
+    @property
+    def nlist(self):
+        return self.centroids.shape[0]
+
+    @classmethod
+    def build(cls, matrix, nlist=None, nprobe=DEFAULT_NPROBE, n_iter=KMEANS_ITERATIONS, seed=0):
+        """정규화된 임베딩 행렬로 IVF 인덱스를 만듭니다."""
+        nlist = nlist or default_nlist(matrix.shape[0])
+        centroids = train_centroids(matrix, nlist, n_iter=n_iter, seed=seed)
+        assignments = assign_clusters(matrix, centroids)
+        # 클러스터 순으로 정렬 (같은 클러스터 안에서는 청크 번호 오름차순)
+        list_ids = np.argsort(assignments, kind='stable').astype(np.int64)
+        counts = np.bincount(assignments, minlength=nlist)
+        list_offsets = np.concatenate([[0], np.cumsum(counts)]).astype(np.int64)
+        return cls(centroids, list_offsets, list_ids, nprobe=nprobe)
+
+    def candidates(self, query, nprobe=None):
+        """쿼리와 가까운 nprobe개 클러스터에 속한 청크 번호를 반환합니다."""
+        nprobe = min(nprobe or self.nprobe, self.nlist)
+        centroid_scores = self.centroids @ query
+        if nprobe < self.nlist:
+            probes = np.argpartition(-centroid_scores, nprobe - 1)[:nprobe]
+        else:
+            probes = np.arange(self.nlist)
+        # 같은 클러스터의 청크는 디스크에서도 정렬되어 있어 읽기가 연속적
+        probes.sort()
+        return np.concatenate([self.list_ids[self.list_offsets[p]:self.list_offsets[p + 1]] for p in probes])
+
+    def save(self, index_dir):
+        """인덱스 디렉토리에 IVF 파일을 저장하고 헤더에 기록합니다."""
+        np.save(os.path.join(index_dir, CENTROIDS_FILE), self.centroids)
+        np.save(os.path.join(index_dir, LIST_OFFSETS_FILE), self.list_offsets)
+        np.save(os.path.join(index_dir, LIST_IDS_FILE), self.list_ids)
+        header = read_header(index_dir)
+        header["ann"] = {"type": "ivf_flat", "nlist": self.nlist, "nprobe": self.nprobe}
+        write_header(index_dir, header)
+
+    @classmethod
+    def load(cls, index_dir, nprobe=None):
+        """인덱스 디렉토리에서 IVF 인덱스를 로드합니다. (없으면 None)"""
+        ann_info = read_header(index_dir).get("ann")
+        if not ann_info or ann_info.get("type") != "ivf_flat":
+            return None
+        return cls(
+            np.load(os.path.join(index_dir, CENTROIDS_FILE)),
+            np.load(os.path.join(index_dir, LIST_OFFSETS_FILE)),
+            np.load(os.path.join(index_dir, LIST_IDS_FILE), mmap_mode='r'),
+            nprobe=nprobe or ann_info.get("nprobe", DEFAULT_NPROBE),
+        )
+
+def build_ann_index(index_dir, nlist=None, nprobe=DEFAULT_NPROBE):
+    """벡터 인덱스 디렉토리의 임베딩으로 IVF 인덱스를 만들어 같은 디렉토리에 저장합니다."""
+    matrix = np.load(os.path.join(index_dir, EMBEDDINGS_FILE), mmap_mode='r')
+    print(f"IVF 인덱스 생성 중: {index_dir} (청크 수: {matrix.shape[0]}, nlist: {nlist or default_nlist(matrix.shape[0])})")
+    ann_index = IVFIndex.build(matrix, nlist=nlist, nprobe=nprobe)
+    ann_index.save(index_dir)
+    print(f"IVF 인덱스 저장 완료 (nlist: {ann_index.nlist}, nprobe: {ann_index.nprobe})")
+    return ann_index
+
+if __name__ == "__main__":
+    target_dir = sys.argv[1] if len(sys.argv) > 1 else "vector_index_merged"
+    target_nlist = int(sys.argv[2]) if len(sys.argv) > 2 else None
+    target_nprobe = int(sys.argv[3]) if len(sys.argv) > 3 else DEFAULT_NPROBE
+    build_ann_index(target_dir, nlist=target_nlist, nprobe=target_nprobe)
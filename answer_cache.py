@@ -0,0 +1,158 @@
+"""
+의미 기반 답변 캐시
+
+질문 임베딩이 이전 질문과 충분히 가까우면(코사인 유사도 >= threshold)
+검색과 LLM 호출 없이 저장된 답변을 돌려줍니다.
+
+키: (질문 임베딩, 감지된 언어, 벡터 인덱스 버전)
+- 같은 질문(유사도 >= threshold)을 다시 저장하면 새 항목을 만들지 않고 기존 항목을 갱신합니다.
+- 만료(TTL)된 항목은 조회에서 제외되고 새 항목이 그 자리를 씁니다.
+- 가득 차면 가장 오래 안 쓴 항목부터 교체합니다. (pinned 항목 제외)
+- 벡터 인덱스가 다시 만들어져 버전이 바뀌면 전체를 비웁니다.
+"""
+
+import os
+import time
+import threading
+import numpy as np
+
+# 환경변수로 조정 가능 (유사도 기준, 만료 시간(초), 최대 항목 수)
+ANSWER_CACHE_THRESHOLD = float(os.getenv("ANSWER_CACHE_THRESHOLD", "0.95"))
+ANSWER_CACHE_TTL = float(os.getenv("ANSWER_CACHE_TTL", str(6 * 60 * 60)))
+ANSWER_CACHE_MAX_ENTRIES = int(os.getenv("ANSWER_CACHE_MAX_ENTRIES", "2048"))
+
+class SemanticAnswerCache:
+    """질문 임베딩 근접도로 답변을 찾는 캐시 (조회는 행렬-벡터 곱 한 번)"""
+    def __init__(self, threshold=ANSWER_CACHE_THRESHOLD, ttl_seconds=ANSWER_CACHE_TTL, max_entries=ANSWER_CACHE_MAX_ENTRIES):
+        self.threshold = threshold
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.index_version = None
+        self._lock = threading.Lock()
+        self._matrix = None  # (max_entries x dim) 정규화된 질문 임베딩
+        self._used = np.zeros(max_entries, dtype=bool)
+        self._pinned = np.zeros(max_entries, dtype=bool)
+        self._created_at = np.zeros(max_entries, dtype=np.float64)
+        self._last_used = np.zeros(max_entries, dtype=np.float64)
+        self._langs = np.empty(max_entries, dtype=object)
+        self._answers = [None] * max_entries
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    @staticmethod
+    def _normalize(vector):
+        vector = np.asarray(vector, dtype=np.float32).ravel()
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def _check_version(self, index_version):
+        """인덱스 버전이 바뀌었으면 캐시를 비웁니다. (락 안에서 호출)"""
+        if index_version != self.index_version:
+            if self.index_version is not None and self._used.any():
+                self.invalidations += 1
+            self._used[:] = False
+            self._pinned[:] = False
+            self._answers = [None] * self.max_entries
+            self.index_version = index_version
+
+    def _live_mask(self, now):
+        expired = ~self._pinned & (now - self._created_at > self.ttl_seconds)
+        return self._used & ~expired
+
+    def lookup(self, query_embedding, lang, index_version):
+        """가장 가까운 캐시 질문의 답변을 반환합니다. (threshold 미만이면 None)"""
+        query = self._normalize(query_embedding)
+        now = time.time()
+        with self._lock:
+            self._check_version(index_version)
+            if self._matrix is None:
+                self.misses += 1
+                return None
+            mask = self._live_mask(now) & (self._langs == lang)
+            if not mask.any():
+                self.misses += 1
+                return None
+            scores = self._matrix @ query
+            scores[~mask] = -np.inf
+            best = int(np.argmax(scores))
+            if scores[best] < self.threshold:
+                self.misses += 1
+                return None
+            self._last_used[best] = now
+            self.hits += 1
+            return self._answers[best]
+
+    def put(self, query_embedding, lang, index_version, answer, pinned=False):
+        """답변을 저장합니다. pinned=True이면 TTL/크기 제한으로 지워지지 않습니다."""
+        query = self._normalize(query_embedding)
+        now = time.time()
+        with self._lock:
+            self._check_version(index_version)
+            if self._matrix is None:
+                self._matrix = np.zeros((self.max_entries, query.shape[0]), dtype=np.float32)
+            live = self._live_mask(now)
+            same = live & (self._langs == lang)
+            if same.any():
+                # 이미 같은 질문이 있으면 그 자리를 갱신 (중복 항목이 다른 항목을 밀어내지 않도록)
+                scores = self._matrix @ query
+                scores[~same] = -np.inf
+                best = int(np.argmax(scores))
+                if scores[best] >= self.threshold:
+                    if self._pinned[best] and not pinned:
+                        # 미리 준비한(pinned) 답변은 일반 답변으로 덮어쓰지 않음
+                        self._last_used[best] = now
+                        return True
+                    self._answers[best] = answer
+                    self._created_at[best] = now
+                    self._last_used[best] = now
+                    return True
+            free = np.flatnonzero(~live)
+            if len(free):
+                slot = int(free[0])
+            else:
+                # 가득 찼으면 pinned가 아닌 항목 중 가장 오래 안 쓴 것을 교체
+                candidates = np.flatnonzero(~self._pinned)
+                if not len(candidates):
+                    return False
+                slot = int(candidates[np.argmin(self._last_used[candidates])])
+            self._matrix[slot] = query
+            self._used[slot] = True
+            self._pinned[slot] = pinned
+            self._created_at[slot] = now
+            self._last_used[slot] = now
+            self._langs[slot] = lang
+            self._answers[slot] = answer
+            return True
+
+    def clear(self):
+        """캐시를 비웁니다."""
+        with self._lock:
+            self._used[:] = False
+            self._pinned[:] = False
+            self._answers = [None] * self.max_entries
+
+    def stats(self):
+        """적중/실패 횟수와 현재 크기를 반환합니다."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "entries": int(self._live_mask(time.time()).sum()),
+                "pinned": int(self._pinned.sum()),
+                "invalidations": self.invalidations,
+                "index_version": self.index_version,
+            }
+
+_default_answer_cache = None
+_default_answer_cache_lock = threading.Lock()
+
+def get_answer_cache():
+    """프로세스 전체에서 공유하는 기본 답변 캐시를 반환합니다."""
+    global _default_answer_cache
+    with _default_answer_cache_lock:
+        if _default_answer_cache is None:
+            _default_answer_cache = SemanticAnswerCache()
+        return _default_answer_cache
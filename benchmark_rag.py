@@ -0,0 +1,487 @@
+#!/usr/bin/env python3
+"""
+RAG 성능 측정 스크립트
+OpenAI API 없이 임의의 정규화 벡터로 검색 지연시간 등을 측정합니다.
+"""
+
+import os
+import sys
+import time
+import tempfile
+import subprocess
+import numpy as np
+from rag_utils import SimpleVectorDB, load_vector_db
+from ann_index import IVFIndex
+from quantization import STORAGE_MODES
+from lexical_index import BM25Index
+from pdf_extract import iter_pdf_pages
+from chunking import chunk_pages, split_sentences
+from relevance import choose_threshold, save_calibration, RELEVANCE_RECALL_TARGET
+from token_utils import count_tokens_batch
+from singleflight import SingleFlight
+from concurrent.futures import ThreadPoolExecutor
+
+EMBEDDING_DIM = 1536  # text-embedding-3-small 차원
+
+class RandomEmbeddings:
+    """API 호출 없이 임의의 쿼리 벡터를 돌려주는 측정용 임베딩 객체"""
+    def __init__(self, dim=EMBEDDING_DIM, seed=0):
+        self.dim = dim
+        self.rng = np.random.default_rng(seed)
+
+    def embed_query(self, text):
+        return self.rng.standard_normal(self.dim).astype(np.float32)
+
+    def embed_documents(self, texts):
+        return self.rng.standard_normal((len(texts), self.dim)).astype(np.float32)
+
+def make_random_db(n_chunks, dim=EMBEDDING_DIM, seed=0):
+    """n_chunks개의 임의 청크로 SimpleVectorDB를 만듭니다."""
+    rng = np.random.default_rng(seed)
+    documents = [{'page_content': f"chunk {i}", 'metadata': {'page': i}} for i in range(n_chunks)]
+    doc_embeddings = rng.standard_normal((n_chunks, dim), dtype=np.float32)
+    return SimpleVectorDB(documents, RandomEmbeddings(dim, seed + 1), doc_embeddings)
+
+def time_queries(search, n_queries):
+    """검색 함수를 n_queries번 호출하고 (평균, p95) 지연시간(ms)을 반환합니다."""
+    timings = []
+    for i in range(n_queries):
+        start = time.perf_counter()
+        search(i)
+        timings.append((time.perf_counter() - start) * 1000)
+    return float(np.mean(timings)), float(np.percentile(timings, 95))
+
+def bench_search(sizes=(1_000, 10_000, 100_000), k=3, n_queries=50):
+    """청크 수별 쿼리당 검색 지연시간을 측정합니다."""
+    print("=== 벡터 검색 지연시간 (쿼리 임베딩 시간 제외) ===")
+    print(f"{'청크 수':>10} | {'평균(ms)':>10} | {'p95(ms)':>10}")
+    for n_chunks in sizes:
+        db = make_random_db(n_chunks)
+        queries = [db.embeddings.embed_query("") for _ in range(n_queries)]
+        db.similarity_search_by_vector(queries[0], k=k)  # 워밍업
+        mean_ms, p95_ms = time_queries(lambda i: db.similarity_search_by_vector(queries[i], k=k), n_queries)
+        print(f"{n_chunks:>10} | {mean_ms:>10.3f} | {p95_ms:>10.3f}")
+
+def make_clustered_matrix(n_chunks, dim=EMBEDDING_DIM, n_topics=200, noise=0.6, seed=0):
+    """주제별로 모여 있는 (실제 문서 임베딩과 비슷한) 벡터를 만듭니다."""
+    rng = np.random.default_rng(seed)
+    topics = rng.standard_normal((n_topics, dim), dtype=np.float32)
+    matrix = topics[rng.integers(0, n_topics, n_chunks)] + noise * rng.standard_normal((n_chunks, dim), dtype=np.float32)
+    return matrix
+
+def make_queries(db, n_queries, noise=0.3, seed=1):
+    """문서 벡터에 잡음을 더해 쿼리 벡터를 만듭니다."""
+    rng = np.random.default_rng(seed)
+    matrix = db._ensure_doc_embeddings()
+    picks = rng.integers(0, matrix.shape[0], n_queries)
+    return np.asarray(matrix[picks]) + noise * rng.standard_normal((n_queries, matrix.shape[1]), dtype=np.float32) / np.sqrt(matrix.shape[1])
+
+def recall_at_k(approx_ids, exact_ids):
+    """정확 검색 결과 중 근사 검색이 찾은 비율"""
+    return len(set(approx_ids.tolist()) & set(exact_ids.tolist())) / max(1, len(exact_ids))
+
+def bench_ann(k=10, n_queries=200, nprobes=(1, 2, 4, 8, 16, 32, 64)):
+    """IVF 근사 검색의 recall@k 대 지연시간을 정확 검색과 비교합니다.
+
+    인자로 인덱스 디렉토리를 주면 실제 임베딩으로, 없으면 50k개 합성 벡터로 측정합니다.
+    """
+    if len(sys.argv) > 2:
+        db = load_vector_db(sys.argv[2])
+        print(f"인덱스: {sys.argv[2]} (청크 수: {len(db.documents)})")
+    else:
+        n_chunks = 50_000
+        db = SimpleVectorDB([{'page_content': f"chunk {i}", 'metadata': {}} for i in range(n_chunks)],
+                            doc_embeddings=make_clustered_matrix(n_chunks))
+        print(f"합성 데이터 (청크 수: {n_chunks})")
+    queries = make_queries(db, n_queries)
+
+    db.ann_index = None
+    exact = [db.search_vector(q, k=k)[0] for q in queries]
+    exact_mean, exact_p95 = time_queries(lambda i: db.search_vector(queries[i], k=k), n_queries)
+
+    start = time.perf_counter()
+    ivf = IVFIndex.build(db._ensure_doc_embeddings())
+    print(f"IVF 생성 시간: {time.perf_counter() - start:.1f}초 (nlist: {ivf.nlist})")
+    db.ann_index = ivf
+
+    print(f"{'방식':>12} | {'recall@' + str(k):>10} | {'평균(ms)':>10} | {'p95(ms)':>10}")
+    print(f"{'exact':>12} | {1.0:>10.3f} | {exact_mean:>10.3f} | {exact_p95:>10.3f}")
+    for nprobe in nprobes:
+        if nprobe > ivf.nlist:
+            break
+        ivf.nprobe = nprobe
+        recall = np.mean([recall_at_k(db.search_vector(q, k=k)[0], exact[i]) for i, q in enumerate(queries)])
+        mean_ms, p95_ms = time_queries(lambda i: db.search_vector(queries[i], k=k), n_queries)
+        print(f"{'nprobe=' + str(nprobe):>12} | {recall:>10.3f} | {mean_ms:>10.3f} | {p95_ms:>10.3f}")
+
+def python_list_bytes_per_chunk(dim=EMBEDDING_DIM):
+    """예전 pickle처럼 float 리스트로 보관할 때 청크당 메모리 (리스트 + float 객체)"""
+    vector = [float(x) for x in np.random.default_rng(0).standard_normal(dim)]
+    return sys.getsizeof(vector) + sum(sys.getsizeof(x) for x in vector)
+
+def bench_quant(k=10, n_queries=50):
+    """저장 방식별 청크당 메모리, recall@k 변화, 지연시간을 측정합니다.
+
+    인자로 인덱스 디렉토리를 주면 실제 임베딩으로, 없으면 50k개 합성 벡터로 측정합니다.
+    """
+    if len(sys.argv) > 2:
+        db = load_vector_db(sys.argv[2])
+        print(f"인덱스: {sys.argv[2]} (청크 수: {len(db.documents)})")
+    else:
+        n_chunks = 50_000
+        db = SimpleVectorDB([{'page_content': f"chunk {i}", 'metadata': {}} for i in range(n_chunks)],
+                            doc_embeddings=make_clustered_matrix(n_chunks))
+        print(f"합성 데이터 (청크 수: {n_chunks})")
+    matrix = db._ensure_doc_embeddings()
+    n_chunks, dim = matrix.shape
+    queries = make_queries(db, n_queries)
+    exact = [db.search_vector(q, k=k)[0] for q in queries]
+
+    print(f"python float 리스트 (예전 pickle): 청크당 {python_list_bytes_per_chunk(dim):,} bytes")
+    print(f"{'방식':>18} | {'bytes/청크':>10} | {'recall@' + str(k):>10} | {'평균(ms)':>10} | {'p95(ms)':>10}")
+    for mode in STORAGE_MODES:
+        quantized = db.set_storage_mode(mode)
+        bytes_per_chunk = (quantized.nbytes if quantized is not None else matrix.nbytes) / n_chunks
+        for rerank_factor in ((1, 4) if quantized is not None else (1,)):
+            db.rerank_factor = rerank_factor
+            recall = np.mean([recall_at_k(db.search_vector(q, k=k)[0], exact[i]) for i, q in enumerate(queries)])
+            mean_ms, p95_ms = time_queries(lambda i: db.search_vector(queries[i], k=k), n_queries)
+            label = mode if quantized is None else f"{mode} (재채점 x{rerank_factor})"
+            print(f"{label:>18} | {bytes_per_chunk:>10,.0f} | {recall:>10.3f} | {mean_ms:>10.3f} | {p95_ms:>10.3f}")
+    db.set_storage_mode("float32")
+
+def bench_batch(n_chunks=10_000, k=3, batch_sizes=(1, 8, 32, 128)):
+    """질문을 하나씩 검색할 때와 similarity_search_batch로 한 번에 검색할 때를 비교합니다."""
+    db = make_random_db(n_chunks)
+    print(f"=== 일괄 검색 (청크 수: {n_chunks}, 임베딩 시간 제외) ===")
+    print(f"{'질문 수':>8} | {'개별(ms)':>10} | {'일괄(ms)':>10} | {'질문당 일괄(ms)':>14}")
+    for batch_size in batch_sizes:
+        queries = db.embeddings.embed_documents([""] * batch_size)
+        start = time.perf_counter()
+        for query in queries:
+            db.search_vector(query, k=k)
+        single_ms = (time.perf_counter() - start) * 1000
+        start = time.perf_counter()
+        db.search_vector_batch(queries, k=k)
+        batch_ms = (time.perf_counter() - start) * 1000
+        print(f"{batch_size:>8} | {single_ms:>10.2f} | {batch_ms:>10.2f} | {batch_ms / batch_size:>14.3f}")
+
+def make_korean_texts(n_chunks, words_per_chunk=150, vocab_size=5000, seed=0):
+    """임의의 한글 단어로 청크 본문을 만듭니다."""
+    rng = np.random.default_rng(seed)
+    syllables = np.array([chr(c) for c in range(0xAC00, 0xAC00 + 2000)])
+    vocab = ["".join(rng.choice(syllables, size=rng.integers(2, 5))) for _ in range(vocab_size)]
+    # 실제 문서처럼 일부 단어가 훨씬 자주 나오도록 Zipf 분포 사용
+    word_ids = np.minimum(rng.zipf(1.2, size=(n_chunks, words_per_chunk)), vocab_size) - 1
+    return [" ".join(vocab[i] for i in row) for row in word_ids], vocab
+
+def bench_lexical(n_chunks=10_000, n_queries=200):
+    """BM25 어휘 인덱스 생성 시간과 질문당 검색 지연시간을 측정합니다."""
+    texts, vocab = make_korean_texts(n_chunks)
+    start = time.perf_counter()
+    index = BM25Index.build(texts)
+    print(f"BM25 생성 시간: {time.perf_counter() - start:.2f}초 (청크 수: {n_chunks}, 토큰 수: {len(index.vocab)})")
+    rng = np.random.default_rng(1)
+    queries = [" ".join(rng.choice(vocab, size=rng.integers(1, 4))) + "은 뭐예요?" for _ in range(n_queries)]
+    mean_ms, p95_ms = time_queries(lambda i: index.search(queries[i], k=20), n_queries)
+    confident = np.mean([index.search(q, k=20)[2] for q in queries])
+    print(f"질문당 검색: 평균 {mean_ms:.3f}ms, p95 {p95_ms:.3f}ms (임베딩 없이 답한 비율: {confident:.0%})")
+
+def make_synthetic_pdf(path, n_pages, lines_per_page=40, seed=0):
+    """텍스트가 들어 있는 측정용 PDF를 만듭니다. (pypdf로 추출 가능한 최소 구조)"""
+    rng = np.random.default_rng(seed)
+    words = ["resident", "visa", "garbage", "bag", "hospital", "insurance", "school", "office", "card", "tax"]
+    objects = [b"<< /Type /Catalog /Pages 2 0 R >>", None,
+               b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    page_ids = []
+    for _ in range(n_pages):
+        lines = [" ".join(rng.choice(words, size=12)) for _ in range(lines_per_page)]
+        content = "BT /F1 10 Tf 40 800 Td 12 TL " + " ".join(f"({line}) '" for line in lines) + " ET"
+        objects.append(b"<< /Length %d >>\nstream\n" % len(content) + content.encode() + b"\nendstream")
+        objects.append(b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+                       b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % len(objects))
+        page_ids.append(len(objects))
+    objects[1] = b"<< /Type /Pages /Kids [" + b" ".join(b"%d 0 R" % i for i in page_ids) + b"] /Count %d >>" % n_pages
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for i, body in enumerate(objects, 1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n" % i + body + b"\nendobj\n"
+    xref_at = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    out += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref_at)
+    with open(path, 'wb') as f:
+        f.write(out)
+
+def bench_extract(n_files=16, n_pages=40):
+    """PDF 텍스트 추출의 워커 수별 처리 시간을 측정합니다.
+
+    인자로 PDF 디렉토리를 주면 그 안의 PDF로, 없으면 합성 PDF로 측정합니다.
+    """
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        if len(sys.argv) > 2:
+            pdf_dir = sys.argv[2]
+        else:
+            pdf_dir = tmp_dir
+            for i in range(n_files):
+                make_synthetic_pdf(os.path.join(pdf_dir, f"{i}.pdf"), n_pages, seed=i)
+        pdf_paths = sorted(os.path.join(pdf_dir, f) for f in os.listdir(pdf_dir) if f.lower().endswith('.pdf'))
+        print(f"PDF {len(pdf_paths)}개 (CPU 코어: {os.cpu_count()})")
+        print(f"{'워커 수':>8} | {'시간(초)':>10} | {'페이지/초':>10} | {'속도 향상':>8}")
+        worker_counts = sorted({1, 2, 4, 8, os.cpu_count() or 1})
+        baseline = None
+        reference = None
+        for workers in worker_counts:
+            start = time.perf_counter()
+            results = list(iter_pdf_pages(pdf_paths, workers=workers))
+            elapsed = time.perf_counter() - start
+            n_total = sum(len(pages) for _, pages in results)
+            # 워커 수와 관계없이 결과 순서와 내용이 같아야 함
+            if reference is None:
+                reference = results
+            elif results != reference:
+                print(f"❌ 워커 {workers}개 결과가 순차 추출과 다릅니다.")
+            baseline = baseline or elapsed
+            print(f"{workers:>8} | {elapsed:>10.2f} | {n_total / elapsed:>10.1f} | {baseline / elapsed:>7.2f}x")
+
+def legacy_chunk_pages(pages, chunk_size=1000, chunk_overlap=100):
+    """예전 chunk_pdf_to_text_chunks 방식 (글자 수 기준, 문자열 +=, 페이지별, 100자 겹침) - 비교용"""
+    text_chunks = []
+    for page_num, text in pages:
+        if not text.strip():
+            continue
+        current_chunk = ""
+        chunks = []
+        for word in text.split():
+            if len(current_chunk) + len(word) + 1 <= chunk_size:
+                current_chunk += (word + " ")
+            else:
+                if current_chunk:
+                    chunks.append(current_chunk.strip())
+                current_chunk = word + " "
+        if current_chunk:
+            chunks.append(current_chunk.strip())
+        for i, chunk in enumerate(chunks):
+            if i > 0 and chunk_overlap > 0:
+                overlap_text = chunks[i-1][-chunk_overlap:] if len(chunks[i-1]) > chunk_overlap else chunks[i-1]
+                chunk = overlap_text + " " + chunk
+            text_chunks.append({'page_content': chunk, 'metadata': {'page': page_num}})
+    return text_chunks
+
+def make_korean_pages(n_pages=400, sentences_per_page=30, seed=0):
+    """임의의 한글 문장으로 된 페이지 목록을 만듭니다."""
+    rng = np.random.default_rng(seed)
+    texts, _ = make_korean_texts(n_pages * sentences_per_page, words_per_chunk=10, seed=seed)
+    endings = ["합니다.", "입니다.", "하세요.", "있나요?"]
+    sentences = [f"{text} {endings[i % len(endings)]}" for i, text in enumerate(texts)]
+    # 페이지 끝에 짧은 꼬리가 남도록 페이지마다 문장 수를 조금씩 다르게 함
+    pages, start = [], 0
+    for page_num in range(1, n_pages + 1):
+        end = start + int(rng.integers(sentences_per_page // 2, sentences_per_page))
+        pages.append((page_num, "\n".join(sentences[start:end])))
+        start = end
+    return pages
+
+def bench_chunk():
+    """예전 글자 수 기준 청크 분할과 토큰 기준 문장 단위 청크 분할을 비교합니다.
+
+    인자로 PDF 디렉토리를 주면 그 안의 PDF(기본 pdf/)로, 없으면 합성 한글 페이지로 측정합니다.
+    """
+    pdf_dir = sys.argv[2] if len(sys.argv) > 2 else "pdf"
+    pdf_paths = sorted(os.path.join(pdf_dir, f) for f in os.listdir(pdf_dir) if f.lower().endswith('.pdf')) if os.path.isdir(pdf_dir) else []
+    if pdf_paths:
+        documents = [pages for _, pages in iter_pdf_pages(pdf_paths)]
+        print(f"PDF {len(pdf_paths)}개 ({sum(len(pages) for pages in documents)}쪽)")
+    else:
+        documents = [make_korean_pages()]
+        print(f"합성 한글 페이지 ({len(documents[0])}쪽)")
+    n_bytes = sum(len(text.encode('utf-8')) for pages in documents for _, text in pages)
+    model = "text-embedding-3-small"
+
+    print(f"{'방식':>10} | {'처리량(MB/s)':>12} | {'청크 수':>8} | {'임베딩 토큰':>12} | {'최대 토큰/청크':>12}")
+    for label, chunker in (("예전", legacy_chunk_pages), ("토큰 기준", lambda pages: chunk_pages(pages, model))):
+        start = time.perf_counter()
+        chunks = [chunk for pages in documents for chunk in chunker(pages)]
+        elapsed = time.perf_counter() - start
+        tokens = count_tokens_batch([chunk['page_content'] for chunk in chunks], model)
+        print(f"{label:>10} | {n_bytes / 1e6 / elapsed:>12.2f} | {len(chunks):>8,} | {sum(tokens):>12,} | {max(tokens, default=0):>12,}")
+
+
+# 앱 시작 import 비용 예산 (python benchmark_rag.py importtime 이 넘으면 실패 코드로 종료)
+IMPORT_TIME_BUDGET_MS = float(os.getenv("IMPORT_TIME_BUDGET_MS", "1500"))
+# 앱 시작 시 import되면 안 되는 무거운 모듈 (처음 사용할 때 로드)
+LAZY_MODULES = ("numpy", "openai", "pypdf", "qrcode", "tiktoken", "geocoder", "rag_utils")
+
+def measure_import_time(module):
+    """새 프로세스에서 python -X importtime으로 module을 import해 모듈별 (self, 누적) 시간(ms)을 반환합니다."""
+    # 벡터DB 백그라운드 로드가 측정에 섞이지 않도록 미리 로드를 끔
+    env = dict(os.environ, RAG_INDEX_PRELOAD="0")
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True, text=True, env=env, cwd=os.path.dirname(os.path.abspath(__file__))
+    )
+    timings = {}
+    errors = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:"):
+            errors.append(line)
+            continue
+        parts = line[len("import time:"):].split("|")
+        if len(parts) != 3 or not parts[0].strip().isdigit():
+            continue  # 머리글 줄
+        name = parts[2].strip()
+        timings[name] = (int(parts[0]) / 1000, int(parts[1]) / 1000)
+    return result.returncode, timings, errors
+
+def bench_importtime():
+    """앱 시작 모듈(기본 main)의 import 시간을 측정하고 예산/지연 로드 규칙을 확인합니다.
+
+    인자로 모듈 이름을 줄 수 있습니다. 예산(IMPORT_TIME_BUDGET_MS)을 넘거나
+    LAZY_MODULES가 시작 시 import되면 실패(종료 코드 1)합니다.
+    """
+    module = sys.argv[2] if len(sys.argv) > 2 else "main"
+    returncode, timings, errors = measure_import_time(module)
+    if returncode != 0 or module not in timings:
+        print(f"❌ {module} import 실패:")
+        for line in errors[-10:]:
+            print(f"  {line}")
+        return False
+
+    print(f"{'모듈':<40} | {'self(ms)':>10} | {'누적(ms)':>10}")
+    for name, (self_ms, cumulative_ms) in sorted(timings.items(), key=lambda item: -item[1][1])[:15]:
+        print(f"{name:<40} | {self_ms:>10.1f} | {cumulative_ms:>10.1f}")
+
+    total_ms = timings[module][1]
+    eager = [name for name in LAZY_MODULES if name in timings]
+    print(f"\n{module} import 시간: {total_ms:.1f}ms (예산 {IMPORT_TIME_BUDGET_MS:.0f}ms)")
+    ok = True
+    if total_ms > IMPORT_TIME_BUDGET_MS:
+        print(f"❌ import 시간이 예산을 넘었습니다.")
+        ok = False
+    if eager:
+        print(f"❌ 시작 시 import되면 안 되는 모듈: {', '.join(eager)}")
+        ok = False
+    if ok:
+        print("✅ import 시간 예산 통과")
+    return ok
+
+# 문서와 관계없는 질문 (관련도 기준 보정용)
+OFF_TOPIC_QUESTIONS = [
+    "오늘 저녁 메뉴로 뭘 먹을까요?",
+    "손흥민은 몇 골을 넣었나요?",
+    "파이썬에서 리스트를 정렬하는 방법은?",
+    "비트코인 가격이 오를까요?",
+    "고양이가 밤에 우는 이유는 무엇인가요?",
+    "우주에서 가장 큰 별은 무엇인가요?",
+    "What is the capital of Australia?",
+    "How do I bake sourdough bread?",
+    "Who won the 2018 FIFA World Cup?",
+    "Explain quantum entanglement simply.",
+    "東京タワーの高さは何メートルですか？",
+    "如何学习弹吉他？",
+    "Làm thế nào để trồng cây cà chua?",
+    "Quelle est la meilleure recette de crêpes ?",
+    "Wie funktioniert ein Elektroauto?",
+    "วิธีทำต้มยำกุ้งทำอย่างไร",
+]
+
+def bench_calibrate(n_sample_questions=40):
+    """관련 질문과 무관한 질문의 최고 유사도를 비교해 관련도 기준을 정하고 인덱스 헤더에 저장합니다.
+
+    인자: <인덱스 디렉토리> [질문 파일(한 줄에 질문 하나)]. 질문 파일이 없으면 청크 첫 문장으로 질문을 만들어
+    분포만 보여 주고 저장하지 않습니다. (문서 문장은 실제 질문보다 점수가 높아 기준이 너무 높게 나옴)
+    OPENAI_API_KEY가 필요합니다. (질문 임베딩)
+    """
+    if len(sys.argv) < 3:
+        print("사용법: python benchmark_rag.py calibrate <인덱스 디렉토리> [질문 파일]")
+        return False
+    index_dir = sys.argv[2]
+    api_key = os.getenv("OPENAI_API_KEY")
+    if not api_key:
+        print("❌ OPENAI_API_KEY 환경변수가 설정되지 않았습니다.")
+        return False
+    db = load_vector_db(index_dir, api_key)
+    has_question_file = len(sys.argv) > 3
+    if has_question_file:
+        with open(sys.argv[3], 'r', encoding='utf-8') as f:
+            questions = [line.strip() for line in f if line.strip()]
+    else:
+        print("⚠️ 질문 파일이 없어 청크 첫 문장으로 관련 질문을 만듭니다. (분포 확인용, 저장하지 않음)")
+        rng = np.random.default_rng(0)
+        picks = rng.choice(len(db.documents), size=min(n_sample_questions, len(db.documents)), replace=False)
+        questions = [sentences[0] for sentences in (split_sentences(db.documents[int(i)]['page_content']) for i in picks) if sentences]
+
+    embeddings = db.embeddings.embed_documents(questions + OFF_TOPIC_QUESTIONS)
+    _, scores = db.search_vector_batch(embeddings, k=1)
+    best = np.asarray(scores)[:, 0]
+    relevant, irrelevant = best[:len(questions)], best[len(questions):]
+    for label, values in (("관련 질문", relevant), ("무관한 질문", irrelevant)):
+        print(f"{label} {len(values)}개: 최저 {values.min():.3f} / 중앙값 {np.median(values):.3f} / 최고 {values.max():.3f}")
+
+    threshold, report = choose_threshold(relevant, irrelevant)
+    print(f"\n관련도 기준: {threshold:.3f} (관련 질문 통과 {report['recall']:.0%}, 목표 {RELEVANCE_RECALL_TARGET:.0%} / "
+          f"무관한 질문 LLM 호출 생략 {report['rejected']:.0%})")
+    if not has_question_file:
+        return
+    save_calibration(index_dir, threshold, report, db.embeddings.model)
+    print(f"✅ 인덱스 헤더에 저장했습니다: {index_dir} (RAG_MIN_RELEVANCE 환경변수로 덮어쓸 수 있음)")
+
+def bench_singleflight(n_users=30, n_questions=3, latency=0.5):
+    """여러 사용자가 같은 예시 질문을 동시에 보낼 때, 요청 합치기 전후의 호출 수와 처리 시간을 비교합니다.
+
+    LLM 호출은 latency초 걸리는 가짜 함수로 대신합니다.
+    """
+    questions = [f"예시 질문 {i}" for i in range(n_questions)]
+    requests = [questions[i % n_questions] + " " * (i % 2) for i in range(n_users)]  # 공백만 다른 질문 포함
+
+    for enabled in (False, True):
+        flight = SingleFlight("bench", enabled=enabled)
+        llm_calls = []
+
+        def fake_llm(question):
+            llm_calls.append(question)
+            time.sleep(latency)
+            return f"{question}에 대한 답변"
+
+        def ask(question):
+            key = ("rag", " ".join(question.split()), "ko", "model")
+            return flight.do(key, fake_llm, question)
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=n_users) as pool:
+            answers = list(pool.map(ask, requests))
+        elapsed = time.perf_counter() - start
+        stats = flight.stats()
+        label = "합치기" if enabled else "그대로"
+        print(f"{label}: LLM 호출 {len(llm_calls)}회 / 요청 {len(answers)}개, "
+              f"실행 {stats['executed']} / 합침 {stats['coalesced']} ({stats['coalesced_ratio']:.0%}), {elapsed:.2f}초")
+
+COMMANDS = {
+    "search": ("벡터 검색 지연시간 (1k/10k/100k 청크)", bench_search),
+    "ann": ("IVF 근사 검색 recall@k 대 지연시간 [인덱스 디렉토리]", bench_ann),
+    "batch": ("개별 검색 대 일괄 검색(similarity_search_batch) 비교", bench_batch),
+    "lexical": ("BM25 어휘 인덱스 생성/검색 지연시간", bench_lexical),
+    "quant": ("float16/int8 저장 시 메모리와 recall 변화 [인덱스 디렉토리]", bench_quant),
+    "chunk": ("예전 청크 분할 대 토큰 기준 청크 분할 비교 [PDF 디렉토리]", bench_chunk),
+    "extract": ("PDF 텍스트 병렬 추출 워커 수별 처리 시간 [PDF 디렉토리]", bench_extract),
+    "singleflight": ("같은 질문 동시 요청 합치기 전후 LLM 호출 수 비교", bench_singleflight),
+    "calibrate": ("관련도 기준(LLM 호출 생략) 보정 후 인덱스 헤더에 저장 <인덱스 디렉토리> [질문 파일]", bench_calibrate),
+    "importtime": ("앱 시작 import 시간 예산 확인, 초과 시 종료 코드 1 [모듈]", bench_importtime),
+}
+
+def main():
+    if len(sys.argv) < 2 or sys.argv[1].lower() not in COMMANDS:
+        print("사용법:")
+        for name, (desc, _) in COMMANDS.items():
+            print(f"  python benchmark_rag.py {name:<10} - {desc}")
+        return
+
+    _, func = COMMANDS[sys.argv[1].lower()]
+    # 확인용 명령(importtime)은 실패하면 종료 코드 1 (CI 등에서 사용)
+    if func() is False:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
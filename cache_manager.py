@@ -11,7 +11,7 @@ from rag_utils import (
     force_rebuild_cache, 
     clear_cache,
     PDF_PATH,
-    CHROMA_PATH
+    VECTOR_INDEX_DIR
 )
 
 def print_cache_status():
@@ -20,7 +20,7 @@ def print_cache_status():
     status = get_cache_status()
     
     print(f"PDF 파일 경로: {PDF_PATH}")
-    print(f"벡터DB 경로: {CHROMA_PATH}")
+    print(f"벡터DB 경로: {VECTOR_INDEX_DIR}")
     print(f"상태: {status['status']}")
     print(f"메시지: {status['message']}")
     
@@ -30,6 +30,7 @@ def print_cache_status():
         print(f"청크 수: {status['chunk_count']}")
         print(f"생성 시간: {status['created_at']}")
         print(f"유효성: {'✅ 유효' if status['is_valid'] else '❌ 무효'}")
+        print(f"파일 확인: {status['validation']}")
 
 def main():
     if len(sys.argv) < 2:
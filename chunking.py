@@ -0,0 +1,158 @@
+"""
+토큰 기준 문장 단위 청크 분할
+
+페이지 텍스트를 문장으로 나눈 뒤 tiktoken 토큰 수 기준으로 문장을 채워 청크를 만듭니다.
+
+- 청크는 문장 목록을 한 번에 join해서 만듭니다. (문자열 += 반복 없음, 전체 길이에 선형)
+- 문장 경계: 마침표/물음표/느낌표(한글·영어 등), 。！？(중국어·일본어), 빈 줄, 글머리표로 시작하는 줄
+- 겹침(overlap)은 앞 청크의 마지막 문장들을 토큰 수 기준으로 가져오므로 단어/음절 중간에서 잘리지 않습니다.
+- 페이지 끝에 남은 짧은 문장들은 다음 페이지 청크와 합칩니다. (metadata의 page ~ page_end)
+- 토큰 수를 넘는 긴 문장(예: 태국어처럼 마침표가 없는 글)은 단어, 그래도 길면 글자 단위로 나눕니다.
+- 문장 사이에 넣는 공백(' ')의 토큰 수도 청크 토큰 수에 포함합니다.
+"""
+
+import re
+import unicodedata
+from token_utils import count_tokens_batch
+
+CHUNK_MAX_TOKENS = 500      # 청크당 최대 토큰 수
+CHUNK_OVERLAP_TOKENS = 50   # 앞 청크에서 가져올 겹침 토큰 수 (문장 단위)
+CHUNK_MIN_TOKENS = 100      # 이보다 짧은 페이지 끝 청크는 다음 페이지와 합침
+
+_CLOSERS = r'\'"”’」』)\]'
+_SENTENCE_BOUNDARY = re.compile(
+    rf'([.!?…]+[{_CLOSERS}]*(?=\s)|[。！？]+[{_CLOSERS}]*)\s*'   # 문장 끝 문장부호
+    r'|\n[ \t]*\n\s*'                                            # 빈 줄
+    r'|\n(?=[ \t]*(?:[•◦▪■□○●※▶►·\-–]|\d{1,2}[.)]\s))'           # 글머리표로 시작하는 줄
+)
+_WHITESPACE = re.compile(r'\s+')
+
+def split_sentences(text):
+    """텍스트를 문장 목록으로 나눕니다. (문장 안의 공백/줄바꿈은 공백 하나로 정리)"""
+    text = unicodedata.normalize('NFC', text)
+    sentences = []
+    start = 0
+    for match in _SENTENCE_BOUNDARY.finditer(text):
+        end = match.end(1) if match.group(1) else match.start()
+        sentence = _WHITESPACE.sub(' ', text[start:end]).strip()
+        if sentence:
+            sentences.append(sentence)
+        start = match.end()
+    sentence = _WHITESPACE.sub(' ', text[start:]).strip()
+    if sentence:
+        sentences.append(sentence)
+    return sentences
+
+def _slice_characters(word, step):
+    """긴 글자열을 step 글자 정도씩 자릅니다. (결합 문자 앞에서는 자르지 않음, 예: 태국어 모음/성조 기호)"""
+    pieces = []
+    start = 0
+    while start < len(word):
+        end = min(start + step, len(word))
+        while end < len(word) and unicodedata.category(word[end]) in ('Mn', 'Mc'):
+            end += 1
+        pieces.append(word[start:end])
+        start = end
+    return pieces
+
+def _split_long_sentence(sentence, max_tokens, model):
+    """max_tokens를 넘는 문장을 단어(공백) 단위로, 그래도 길면 글자 단위로 나눕니다."""
+    pieces = []  # (조각, 앞 조각과의 구분자)
+    for word in sentence.split(' '):
+        if count_tokens_batch([word], model)[0] <= max_tokens:
+            pieces.append((word, ' '))
+            continue
+        # 공백 없이 긴 글자열: 글자 하나가 여러 토큰일 수 있으므로 넉넉하게 자름
+        slices = _slice_characters(word, max(1, max_tokens // 3))
+        pieces.extend((piece, ' ' if i == 0 else '') for i, piece in enumerate(slices))
+    counts = count_tokens_batch([piece for piece, _ in pieces], model)
+    separator_tokens = count_tokens_batch([' '], model)[0]
+    parts, current, current_tokens = [], [], 0
+    for (piece, separator), tokens in zip(pieces, counts):
+        if current and current_tokens + tokens + (separator_tokens if separator else 0) > max_tokens:
+            parts.append(''.join(current))
+            current, current_tokens = [], 0
+        if current and separator:
+            tokens += separator_tokens
+        current.append(separator + piece if current else piece)
+        current_tokens += tokens
+    if current:
+        parts.append(''.join(current))
+    return parts
+
+class TokenChunker:
+    """페이지를 차례로 받아 토큰 수 기준 청크를 만드는 분할기"""
+    def __init__(self, model, max_tokens=CHUNK_MAX_TOKENS, overlap_tokens=CHUNK_OVERLAP_TOKENS, min_tokens=CHUNK_MIN_TOKENS):
+        self.model = model
+        self.max_tokens = max_tokens
+        self.overlap_tokens = overlap_tokens
+        self.min_tokens = min_tokens
+        self._sentences = []  # 현재 청크의 (문장, 토큰 수, 페이지)
+        self._tokens = 0  # 문장 사이 공백을 포함한 현재 청크 토큰 수
+        self._separator_tokens = count_tokens_batch([' '], model)[0]
+        self._has_new = False  # 겹침 문장 외에 새 문장이 있는지
+
+    def _emit(self, chunks):
+        first_page, last_page = self._sentences[0][2], self._sentences[-1][2]
+        metadata = {'page': first_page}
+        if last_page != first_page:
+            metadata['page_end'] = last_page
+        chunks.append({
+            'page_content': ' '.join(sentence for sentence, _, _ in self._sentences),
+            'metadata': metadata,
+        })
+        # 마지막 문장들을 겹침 토큰 수만큼 다음 청크로 넘김
+        carried, carried_tokens = [], 0
+        for item in reversed(self._sentences):
+            cost = item[1] + (self._separator_tokens if carried else 0)
+            if carried_tokens + cost > self.overlap_tokens:
+                break
+            carried.append(item)
+            carried_tokens += cost
+        self._sentences = carried[::-1]
+        self._tokens = carried_tokens
+        self._has_new = False
+
+    def add_page(self, text, page_num):
+        """페이지 하나를 추가하고 완성된 청크 목록을 반환합니다."""
+        chunks = []
+        sentences = split_sentences(text)
+        for sentence, tokens in zip(sentences, count_tokens_batch(sentences, self.model)):
+            parts = [(sentence, tokens)]
+            if tokens > self.max_tokens:
+                long_parts = _split_long_sentence(sentence, self.max_tokens, self.model)
+                parts = list(zip(long_parts, count_tokens_batch(long_parts, self.model)))
+            for part, part_tokens in parts:
+                if self._has_new and self._tokens + self._separator_tokens + part_tokens > self.max_tokens:
+                    self._emit(chunks)
+                # 겹침 문장과 합쳐도 넘치면 겹침을 버림
+                while self._sentences and self._tokens + self._separator_tokens + part_tokens > self.max_tokens:
+                    self._tokens -= self._sentences.pop(0)[1]
+                    if self._sentences:
+                        self._tokens -= self._separator_tokens
+                if self._sentences:
+                    self._tokens += self._separator_tokens
+                self._sentences.append((part, part_tokens, page_num))
+                self._tokens += part_tokens
+                self._has_new = True
+        # 페이지 끝: 충분히 길면 내보내고, 짧으면 다음 페이지와 합침
+        if self._has_new and self._tokens >= self.min_tokens:
+            self._emit(chunks)
+        return chunks
+
+    def finish(self):
+        """남은 문장으로 마지막 청크를 만들어 반환합니다."""
+        chunks = []
+        if self._has_new:
+            self._emit(chunks)
+        self._sentences, self._tokens = [], 0
+        return chunks
+
+def chunk_pages(pages, model, max_tokens=CHUNK_MAX_TOKENS, overlap_tokens=CHUNK_OVERLAP_TOKENS, min_tokens=CHUNK_MIN_TOKENS):
+    """[(페이지 번호, 텍스트), ...]를 토큰 기준 청크 목록으로 나눕니다."""
+    chunker = TokenChunker(model, max_tokens, overlap_tokens, min_tokens)
+    chunks = []
+    for page_num, text in pages:
+        chunks.extend(chunker.add_page(text or "", page_num))
+    chunks.extend(chunker.finish())
+    return chunks
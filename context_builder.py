@@ -0,0 +1,144 @@
+"""
+RAG 프롬프트 컨텍스트 구성 (토큰 예산)
+
+검색된 청크를 "\n\n"으로 그대로 이으면 이웃 청크끼리 겹치는 문장(청크 분할 overlap)이
+프롬프트에 두 번 들어갑니다. 여기서는
+
+- 같은 문서(metadata의 source가 같음)에서 나온 청크의 겹치는 부분(앞 청크 끝 = 뒤 청크 시작)을 한 번만 남기고 이어 붙이고,
+- 같은 문서의 바로 이웃한 청크(chunk_index 차이 1)는 하나의 구간으로 합치고,
+- 다른 청크에 통째로 들어 있는 청크는 버린 뒤,
+- 관련도 순서대로 토큰 예산(RAG_CONTEXT_MAX_TOKENS)이 찰 때까지 채웁니다.
+
+토큰 수는 token_utils(tiktoken)로 계산하며, 절약한 토큰 수를 통계로 돌려줍니다.
+"""
+
+import os
+from token_utils import count_tokens_batch, truncate_to_tokens
+
+RAG_CONTEXT_MAX_TOKENS = int(os.getenv("RAG_CONTEXT_MAX_TOKENS", "1500"))
+MIN_OVERLAP_CHARS = 20  # 이보다 짧게 겹치는 것은 우연히 같은 글자로 보고 합치지 않음
+CONTEXT_SEPARATOR = "\n\n"
+
+def find_overlap(left, right, min_chars=MIN_OVERLAP_CHARS):
+    """left의 끝과 right의 시작이 겹치는 가장 긴 길이를 반환합니다. (min_chars 미만이면 0)"""
+    if min(len(left), len(right)) < min_chars:
+        return 0
+    head = right[:min_chars]
+    start = max(0, len(left) - len(right))
+    while True:
+        i = left.find(head, start)
+        if i < 0:
+            return 0
+        # 앞쪽 위치일수록 겹침이 길다
+        if right.startswith(left[i:]):
+            return len(left) - i
+        start = i + 1
+
+def _doc_parts(doc):
+    """문서에서 (본문, 메타데이터)를 꺼냅니다."""
+    if isinstance(doc, dict):
+        return doc.get('page_content', ''), doc.get('metadata') or {}
+    if hasattr(doc, 'page_content'):
+        return doc.page_content, getattr(doc, 'metadata', None) or {}
+    return str(doc), {}
+
+def _merge(a, b):
+    """같은 문서의 두 구간을 합칠 수 있으면 합친 구간을, 아니면 None을 반환합니다."""
+    # 출처가 없는 청크(PDF 하나로 만든 인덱스, 예전 청크)는 같은 문서인지 알 수 없으므로 합치지 않음
+    if a['source'] is None or a['source'] != b['source']:
+        return None
+    rank = min(a['rank'], b['rank'])
+    if b['text'] in a['text']:
+        return dict(a, rank=rank, chunks=a['chunks'] + b['chunks'])
+    if a['text'] in b['text']:
+        return dict(b, rank=rank, chunks=a['chunks'] + b['chunks'])
+    if b['first'] is not None and a['first'] is not None and b['first'] < a['first']:
+        a, b = b, a  # 문서 안의 순서대로
+    for left, right in ((a, b), (b, a)):
+        overlap = find_overlap(left['text'], right['text'])
+        if overlap:
+            text = left['text'] + right['text'][overlap:]
+            break
+    else:
+        # 겹치는 글은 없지만 바로 이웃한 청크이면 이어 붙임
+        if a['last'] is None or b['first'] != a['last'] + 1:
+            return None
+        left, right = a, b
+        text = left['text'] + " " + right['text']
+    indices = [i for i in (left['first'], left['last'], right['first'], right['last']) if i is not None]
+    return {
+        'text': text,
+        'source': a['source'],
+        'first': min(indices) if indices else None,
+        'last': max(indices) if indices else None,
+        'rank': rank,
+        'chunks': a['chunks'] + b['chunks'],
+    }
+
+def build_context(docs, model, max_tokens=RAG_CONTEXT_MAX_TOKENS):
+    """관련도 순서의 검색 결과(docs)로 토큰 예산 안의 컨텍스트를 만듭니다.
+
+    반환값: (컨텍스트 문자열, 통계)
+    통계: chunks(검색 청크 수), segments(합친 뒤 구간 수), used_segments(예산 안에 넣은 구간 수),
+          naive_tokens(그대로 이었을 때), merged_tokens(겹침 제거/합친 뒤 전체), tokens(최종),
+          saved_tokens(겹침 제거로 줄인 토큰), dropped_tokens(예산 때문에 뺀 토큰)
+    """
+    texts = []
+    segments = []
+    for rank, doc in enumerate(docs):
+        text, metadata = _doc_parts(doc)
+        text = text.strip()
+        texts.append(text)
+        if not text:
+            continue
+        chunk_index = metadata.get('chunk_index')
+        segment = {
+            'text': text,
+            'source': metadata.get('source'),
+            'first': chunk_index,
+            'last': chunk_index,
+            'rank': rank,
+            'chunks': 1,
+        }
+        # 합쳐진 구간이 또 다른 구간과 이어질 수 있으므로 더 합칠 것이 없을 때까지 반복
+        merged = True
+        while merged:
+            merged = False
+            for i, other in enumerate(segments):
+                combined = _merge(other, segment)
+                # 합친 구간이 예산보다 길어지면 관련도 순서로 고를 수 있도록 따로 둠
+                if combined is not None and count_tokens_batch([combined['text']], model)[0] <= max_tokens:
+                    segment = combined
+                    del segments[i]
+                    merged = True
+                    break
+        segments.append(segment)
+
+    segments.sort(key=lambda segment: segment['rank'])
+    naive_tokens = count_tokens_batch([CONTEXT_SEPARATOR.join(texts)], model)[0] if texts else 0
+    segment_tokens = count_tokens_batch([segment['text'] for segment in segments], model) if segments else []
+    separator_tokens = count_tokens_batch([CONTEXT_SEPARATOR], model)[0]
+
+    parts, used = [], 0
+    for segment, tokens in zip(segments, segment_tokens):
+        cost = tokens + (separator_tokens if parts else 0)
+        if used + cost <= max_tokens:
+            parts.append(segment['text'])
+            used += cost
+        elif not parts:
+            # 가장 관련 있는 구간 하나가 예산보다 길면 잘라서라도 넣음
+            parts.append(truncate_to_tokens(segment['text'], max_tokens, model))
+            used = max_tokens
+    context = CONTEXT_SEPARATOR.join(parts)
+    tokens = count_tokens_batch([context], model)[0] if context else 0
+    merged_tokens = sum(segment_tokens) + separator_tokens * max(0, len(segments) - 1)
+    return context, {
+        "chunks": len(docs),
+        "segments": len(segments),
+        "used_segments": len(parts),
+        "naive_tokens": naive_tokens,
+        "merged_tokens": merged_tokens,
+        "tokens": tokens,
+        "saved_tokens": max(0, naive_tokens - merged_tokens),
+        "dropped_tokens": max(0, merged_tokens - tokens),
+    }
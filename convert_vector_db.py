@@ -1,12 +1,21 @@
 #!/usr/bin/env python3
 """
 기존 langchain 벡터DB를 SimpleVectorDB로 변환하는 스크립트
+pickle(vector_db.pkl, vector_db_merged.pkl)을 메모리 매핑 인덱스 디렉토리로 변환하는 기능도 포함합니다.
 """
 
 import os
+import sys
 import pickle
 import shutil
-from rag_utils import SimpleVectorDB, OpenAIEmbeddings
+from rag_utils import SimpleVectorDB, OpenAIEmbeddings, save_vector_db, get_doc_text, EMBEDDING_MODEL, VECTOR_DB_PATH, VECTOR_INDEX_DIR, VECTOR_INDEX_MERGED_DIR
+from embedding_cache import get_embedding_store
+
+# 예전 pickle → 인덱스 디렉토리 기본 변환 대상
+PICKLE_TO_INDEX = {
+    VECTOR_DB_PATH: VECTOR_INDEX_DIR,
+    "vector_db_merged.pkl": VECTOR_INDEX_MERGED_DIR,
+}
 
 def convert_langchain_to_simple_vector_db(input_path, output_path, openai_api_key):
     """
@@ -36,10 +45,11 @@ def convert_langchain_to_simple_vector_db(input_path, output_path, openai_api_ke
             
             print(f"추출된 문서 수: {len(documents)}")
             
-            # 새로운 임베딩 생성
+            # 새로운 임베딩 생성 (저장소에 있는 청크는 재사용)
             embeddings = OpenAIEmbeddings(
                 openai_api_key=openai_api_key,
-                model="text-embedding-3-small"
+                model="text-embedding-3-small",
+                document_store=get_embedding_store()
             )
             
             # 문서 임베딩 생성
@@ -68,7 +78,46 @@ def convert_langchain_to_simple_vector_db(input_path, output_path, openai_api_ke
         print(f"벡터DB 변환 실패: {e}")
         return None
 
+def convert_pickle_to_index(pkl_path, index_dir):
+    """
+    SimpleVectorDB pickle을 메모리 매핑 인덱스 디렉토리로 변환합니다.
+    저장된 임베딩을 그대로 옮기므로 OpenAI API를 호출하지 않습니다.
+    """
+    print(f"인덱스 변환 시작: {pkl_path} -> {index_dir}")
+    try:
+        with open(pkl_path, 'rb') as f:
+            old_db = pickle.load(f)
+    except Exception as e:
+        print(f"pickle 로드 실패: {e}")
+        print("langchain 형식이라면 먼저 'python convert_vector_db.py'로 SimpleVectorDB로 변환하세요.")
+        return None
+
+    if not hasattr(old_db, 'documents') or getattr(old_db, 'doc_embeddings', None) is None:
+        print("임베딩이 저장된 SimpleVectorDB가 아닙니다.")
+        print("langchain 형식이라면 먼저 'python convert_vector_db.py'로 SimpleVectorDB로 변환하세요.")
+        return None
+
+    # 옮기는 임베딩을 저장소에도 기록해 두면 이후 재생성/병합 시 재사용
+    get_embedding_store().put_many(EMBEDDING_MODEL, [get_doc_text(doc) for doc in old_db.documents], old_db.doc_embeddings)
+    return save_vector_db(old_db, index_dir)
+
+def convert_all_pickles_to_index():
+    """알려진 pickle 파일들을 모두 인덱스 디렉토리로 변환합니다."""
+    for pkl_path, index_dir in PICKLE_TO_INDEX.items():
+        if not os.path.exists(pkl_path):
+            print(f"건너뜀 (파일 없음): {pkl_path}")
+            continue
+        convert_pickle_to_index(pkl_path, index_dir)
+
 def main():
+    # pickle → 인덱스 디렉토리 변환
+    if len(sys.argv) >= 2 and sys.argv[1].lower() == "index":
+        if len(sys.argv) >= 4:
+            convert_pickle_to_index(sys.argv[2], sys.argv[3])
+        else:
+            convert_all_pickles_to_index()
+        return
+
     # 환경변수에서 API 키 가져오기
     openai_api_key = os.getenv("OPENAI_API_KEY")
     if not openai_api_key:
@@ -0,0 +1,132 @@
+"""
+MinHash + LSH 기반 중복 청크 제거
+
+다누리 안내 PDF들에는 긴급전화, 콜센터 안내 같은 같은 문단이 언어별 판마다 반복됩니다.
+임베딩하기 전에 거의 같은 청크를 걸러내면 임베딩 비용과 인덱스 크기가 줄고,
+검색 상위 k개가 같은 내용으로 채워지는 일도 줄어듭니다.
+
+- 청크 본문을 정규화(NFKC, 소문자, 공백 정리)한 뒤 글자 5-gram 집합으로 만듭니다.
+- 집합의 MinHash 서명(64개 해시)을 8개 밴드로 나눠 LSH 버킷에 넣고,
+  같은 버킷에 들어간 후보만 서명으로 추정한 Jaccard 유사도를 비교합니다.
+- 유사도가 DEDUP_THRESHOLD(기본 0.85) 이상이면 중복으로 보고 먼저 나온 청크만 남깁니다.
+"""
+
+import os
+import re
+import zlib
+import unicodedata
+import numpy as np
+from collections import defaultdict
+
+DEDUP_ENABLED = os.getenv("DEDUP_ENABLED", "1") == "1"
+DEDUP_THRESHOLD = float(os.getenv("DEDUP_THRESHOLD", "0.85"))
+MINHASH_PERMUTATIONS = 64
+LSH_BANDS = 8  # 밴드당 8행 → 유사도 약 0.77 이상부터 후보가 될 확률이 높아짐
+SHINGLE_SIZE = 5
+
+_MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+_MAX_HASH = np.uint64((1 << 32) - 1)
+_WHITESPACE = re.compile(r'\s+')
+
+def normalize_text(text):
+    """중복 비교용으로 텍스트를 정규화합니다."""
+    return _WHITESPACE.sub(' ', unicodedata.normalize('NFKC', text)).strip().lower()
+
+def shingle_hashes(text, size=SHINGLE_SIZE):
+    """글자 n-gram 집합의 32비트 해시 배열을 반환합니다."""
+    text = normalize_text(text)
+    if len(text) <= size:
+        shingles = {text}
+    else:
+        shingles = {text[i:i + size] for i in range(len(text) - size + 1)}
+    # 내장 hash는 프로세스마다 값이 달라(PYTHONHASHSEED) 실행마다 걸러지는 청크가 바뀌므로 crc32 사용
+    # (이어하기는 필터를 거친 항목 순서가 매번 같아야 함)
+    return np.fromiter((zlib.crc32(shingle.encode('utf-8')) for shingle in shingles), dtype=np.uint64, count=len(shingles))
+
+class NearDuplicateFilter:
+    """처음 본 청크를 기억해 두고, 그와 거의 같은 청크를 찾아내는 MinHash/LSH 필터"""
+    def __init__(self, threshold=DEDUP_THRESHOLD, num_perm=MINHASH_PERMUTATIONS, bands=LSH_BANDS, seed=1):
+        if num_perm % bands:
+            raise ValueError(f"num_perm({num_perm})은 bands({bands})로 나누어떨어져야 합니다.")
+        rng = np.random.default_rng(seed)
+        # (a * h + b) mod p: a, h < 2^32 이므로 곱이 uint64를 넘지 않음
+        self._a = rng.integers(1, 1 << 32, size=num_perm, dtype=np.uint64)
+        self._b = rng.integers(0, 1 << 32, size=num_perm, dtype=np.uint64)
+        self.threshold = threshold
+        self.bands = bands
+        self.rows = num_perm // bands
+        self._buckets = [defaultdict(list) for _ in range(bands)]
+        self._signatures = []
+        self.seen = 0
+        self.dropped = 0
+        self.dropped_by_source = defaultdict(int)
+
+    def signature(self, text):
+        """텍스트의 MinHash 서명을 반환합니다."""
+        hashes = shingle_hashes(text)
+        permuted = (np.outer(self._a, hashes) + self._b[:, None]) % _MERSENNE_PRIME & _MAX_HASH
+        return permuted.min(axis=1).astype(np.uint32)
+
+    def _band_keys(self, signature):
+        return [signature[i * self.rows:(i + 1) * self.rows].tobytes() for i in range(self.bands)]
+
+    def find_duplicate(self, signature):
+        """이미 등록된 청크 중 거의 같은 것의 번호를 반환합니다. (없으면 None)"""
+        candidates = set()
+        for bucket, key in zip(self._buckets, self._band_keys(signature)):
+            candidates.update(bucket.get(key, ()))
+        best, best_similarity = None, self.threshold
+        for candidate in sorted(candidates):
+            similarity = float(np.mean(self._signatures[candidate] == signature))
+            if similarity >= best_similarity:
+                best, best_similarity = candidate, similarity
+        return best
+
+    def add(self, signature):
+        """서명을 등록하고 번호를 반환합니다."""
+        doc_id = len(self._signatures)
+        self._signatures.append(signature)
+        for bucket, key in zip(self._buckets, self._band_keys(signature)):
+            bucket[key].append(doc_id)
+        return doc_id
+
+    def check(self, text, source=None):
+        """중복이면 True를 반환하고, 처음 보는 내용이면 등록한 뒤 False를 반환합니다."""
+        self.seen += 1
+        signature = self.signature(text)
+        if self.find_duplicate(signature) is not None:
+            self.dropped += 1
+            if source is not None:
+                self.dropped_by_source[source] += 1
+            return True
+        self.add(signature)
+        return False
+
+    def register(self, text):
+        """항상 남길 청크(예: 기존 인덱스의 청크)를 중복 비교 대상으로만 등록합니다."""
+        self.seen += 1
+        self.add(self.signature(text))
+
+    def filter(self, items):
+        """(문서, 임베딩) 항목 중 중복 청크를 빼고 반환하는 제너레이터입니다."""
+        for doc, vector in items:
+            source = doc.get('metadata', {}).get('source') if isinstance(doc, dict) else None
+            if not self.check(doc['page_content'], source):
+                yield doc, vector
+
+    def report(self):
+        """중복 제거 결과 (헤더 기록/출력용)"""
+        return {
+            "threshold": self.threshold,
+            "chunks_in": self.seen,
+            "chunks_dropped": self.dropped,
+            "ratio": self.dropped / self.seen if self.seen else 0.0,
+            "dropped_by_source": dict(self.dropped_by_source),
+        }
+
+def print_dedup_report(report):
+    """중복 제거 결과를 출력합니다."""
+    print(f"중복 청크 제거: {report['chunks_in']:,}개 중 {report['chunks_dropped']:,}개 제거 "
+          f"({report['ratio']:.1%}, 기준 유사도 {report['threshold']})")
+    for source, dropped in sorted(report["dropped_by_source"].items(), key=lambda item: -item[1])[:10]:
+        print(f"  - {source}: {dropped}개")
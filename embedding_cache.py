@@ -0,0 +1,216 @@
+"""
+질문(쿼리) 임베딩 캐시와 문서 청크 임베딩 저장소
+
+같은 질문("쓰레기 봉투는 어디서 사나요?")이 하루에도 수백 번 들어오므로,
+(모델, 정규화된 질문) 기준으로 임베딩을 2단계로 캐시합니다.
+
+    1단계: 프로세스 메모리 LRU (크기 제한)
+    2단계: SQLite 파일 (재시작 후에도 유지, 크기 제한 초과 시 오래 안 쓴 것부터 삭제)
+
+문서 청크 임베딩은 hash(모델, 청크 본문)을 키로 SQLite에 영구 보관합니다.
+벡터DB 생성/병합/변환 시 저장소를 먼저 확인하므로 바뀌지 않은 청크는 다시 임베딩하지 않습니다.
+"""
+
+import re
+import time
+import sqlite3
+import hashlib
+import threading
+import unicodedata
+import numpy as np
+from collections import OrderedDict
+
+QUERY_CACHE_PATH = "query_embedding_cache.sqlite3"
+EMBEDDING_STORE_PATH = "embedding_store.sqlite3"
+MAX_MEMORY_ITEMS = 1024
+MAX_DISK_ITEMS = 100_000
+
+_WHITESPACE = re.compile(r'\s+')
+
+def normalize_query_text(text):
+    """캐시 키용으로 질문을 정규화합니다. (NFKC, 공백 정리, 소문자)"""
+    return _WHITESPACE.sub(' ', unicodedata.normalize('NFKC', text)).strip().lower()
+
+def embedding_key(model, text):
+    """(모델, 텍스트) 캐시 키"""
+    return hashlib.sha256(f"{model}\0{text}".encode('utf-8')).hexdigest()
+
+def vector_to_blob(vector):
+    return np.asarray(vector, dtype=np.float32).tobytes()
+
+def blob_to_vector(blob):
+    return np.frombuffer(blob, dtype=np.float32)
+
+class QueryEmbeddingCache:
+    """메모리 LRU + SQLite 2단계 질문 임베딩 캐시"""
+    def __init__(self, db_path=QUERY_CACHE_PATH, max_memory_items=MAX_MEMORY_ITEMS, max_disk_items=MAX_DISK_ITEMS):
+        self.db_path = db_path
+        self.max_memory_items = max_memory_items
+        self.max_disk_items = max_disk_items
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits_memory = 0
+        self.hits_disk = 0
+        self.misses = 0
+        self.evictions = 0
+        self._conn = None
+        if db_path:
+            self._conn = sqlite3.connect(db_path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS query_embeddings ("
+                "key TEXT PRIMARY KEY, model TEXT, text TEXT, vector BLOB, last_used REAL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_query_last_used ON query_embeddings(last_used)")
+            self._conn.commit()
+            self._disk_items = self._conn.execute("SELECT COUNT(*) FROM query_embeddings").fetchone()[0]
+        else:
+            self._disk_items = 0
+
+    def _remember(self, key, vector):
+        self._memory[key] = vector
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_items:
+            self._memory.popitem(last=False)
+
+    def get(self, model, text):
+        """캐시된 임베딩을 반환합니다. (없으면 None)"""
+        key = embedding_key(model, normalize_query_text(text))
+        with self._lock:
+            vector = self._memory.get(key)
+            if vector is not None:
+                self._memory.move_to_end(key)
+                self.hits_memory += 1
+                return vector
+            if self._conn is not None:
+                row = self._conn.execute("SELECT vector FROM query_embeddings WHERE key = ?", (key,)).fetchone()
+                if row is not None:
+                    vector = blob_to_vector(row[0])
+                    self._conn.execute("UPDATE query_embeddings SET last_used = ? WHERE key = ?", (time.time(), key))
+                    self._conn.commit()
+                    self._remember(key, vector)
+                    self.hits_disk += 1
+                    return vector
+            self.misses += 1
+            return None
+
+    def put(self, model, text, vector):
+        """임베딩을 두 단계 캐시에 저장합니다."""
+        normalized = normalize_query_text(text)
+        key = embedding_key(model, normalized)
+        vector = np.asarray(vector, dtype=np.float32)
+        with self._lock:
+            self._remember(key, vector)
+            if self._conn is None:
+                return
+            # 여러 워커가 같은 파일을 공유하므로 개수 확인과 삭제를 한 쓰기 트랜잭션 안에서 처리
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                cursor = self._conn.execute(
+                    "INSERT OR IGNORE INTO query_embeddings (key, model, text, vector, last_used) VALUES (?, ?, ?, ?, ?)",
+                    (key, model, normalized, vector_to_blob(vector), time.time()),
+                )
+                if not cursor.rowcount:
+                    self._conn.execute(
+                        "UPDATE query_embeddings SET vector = ?, last_used = ? WHERE key = ?",
+                        (vector_to_blob(vector), time.time(), key),
+                    )
+                # 크기 제한을 넘으면 오래 안 쓴 항목부터 삭제
+                disk_items = self._conn.execute("SELECT COUNT(*) FROM query_embeddings").fetchone()[0]
+                overflow = disk_items - self.max_disk_items
+                if overflow > 0:
+                    self._conn.execute(
+                        "DELETE FROM query_embeddings WHERE key IN "
+                        "(SELECT key FROM query_embeddings ORDER BY last_used LIMIT ?)", (overflow,)
+                    )
+                    disk_items -= overflow
+                    self.evictions += overflow
+                self._conn.commit()
+            except BaseException:
+                self._conn.rollback()
+                raise
+            self._disk_items = disk_items
+
+    def stats(self):
+        """캐시 적중/실패 횟수와 크기를 반환합니다."""
+        with self._lock:
+            lookups = self.hits_memory + self.hits_disk + self.misses
+            return {
+                "hits_memory": self.hits_memory,
+                "hits_disk": self.hits_disk,
+                "misses": self.misses,
+                "hit_rate": (self.hits_memory + self.hits_disk) / lookups if lookups else 0.0,
+                "memory_items": len(self._memory),
+                "disk_items": self._disk_items,
+                "evictions": self.evictions,
+            }
+
+_default_query_cache = None
+_default_query_cache_lock = threading.Lock()
+
+def get_query_cache():
+    """프로세스 전체에서 공유하는 기본 질문 임베딩 캐시를 반환합니다."""
+    global _default_query_cache
+    with _default_query_cache_lock:
+        if _default_query_cache is None:
+            _default_query_cache = QueryEmbeddingCache()
+        return _default_query_cache
+
+class EmbeddingStore:
+    """hash(모델, 청크 본문) → 임베딩 영구 저장소 (SQLite)"""
+    LOOKUP_BATCH = 500  # SQLite 변수 개수 제한 안에서 한 번에 조회할 키 수
+
+    def __init__(self, db_path=EMBEDDING_STORE_PATH):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS chunk_embeddings (key TEXT PRIMARY KEY, model TEXT, vector BLOB)"
+        )
+        self._conn.commit()
+        self.hits = 0
+        self.misses = 0
+
+    def get_many(self, model, texts):
+        """텍스트 순서대로 저장된 임베딩(없으면 None) 목록을 반환합니다."""
+        keys = [embedding_key(model, text) for text in texts]
+        found = {}
+        with self._lock:
+            for start in range(0, len(keys), self.LOOKUP_BATCH):
+                batch = keys[start:start + self.LOOKUP_BATCH]
+                placeholders = ",".join("?" * len(batch))
+                for key, blob in self._conn.execute(
+                    f"SELECT key, vector FROM chunk_embeddings WHERE key IN ({placeholders})", batch
+                ):
+                    found[key] = blob_to_vector(blob)
+            vectors = [found.get(key) for key in keys]
+            self.hits += sum(vector is not None for vector in vectors)
+            self.misses += sum(vector is None for vector in vectors)
+        return vectors
+
+    def put_many(self, model, texts, vectors):
+        """텍스트별 임베딩을 저장합니다. (이미 있으면 덮어씀)"""
+        rows = [(embedding_key(model, text), model, vector_to_blob(vector)) for text, vector in zip(texts, vectors)]
+        with self._lock:
+            self._conn.executemany("INSERT OR REPLACE INTO chunk_embeddings (key, model, vector) VALUES (?, ?, ?)", rows)
+            self._conn.commit()
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM chunk_embeddings").fetchone()[0]
+
+    def stats(self):
+        """재사용/신규 청크 수와 저장된 임베딩 수를 반환합니다."""
+        return {"hits": self.hits, "misses": self.misses, "items": len(self)}
+
+_default_embedding_store = None
+_default_embedding_store_lock = threading.Lock()
+
+def get_embedding_store():
+    """프로세스 전체에서 공유하는 기본 문서 임베딩 저장소를 반환합니다."""
+    global _default_embedding_store
+    with _default_embedding_store_lock:
+        if _default_embedding_store is None:
+            _default_embedding_store = EmbeddingStore()
+        return _default_embedding_store
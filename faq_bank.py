@@ -0,0 +1,185 @@
+"""
+예시 질문 답변 미리 만들기 (FAQ 답변 모음)
+
+RAG 채팅방 안내(rag_guide.RAG_GUIDE_TEXTS)의 언어별 예시 질문은 사용자가 가장 많이 누르거나 따라 치는 질문입니다.
+오프라인에서 answer_with_rag로 모두 답해 두고, 앱은 이 답변을 바로 돌려줍니다.
+
+    faq_bank.json        질문, 언어, 답변, 만든 인덱스 버전
+    faq_embeddings.npy   질문 임베딩 (정규화된 float32 행렬, json 항목 순서)
+
+- 인덱스 디렉토리 안에 저장하고, 인덱스 버전이 다르면(인덱스를 다시 만들면) 사용하지 않습니다.
+- 질문이 정확히 같으면(공백, 글머리표, 끝 문장부호, 대소문자 무시) 임베딩 요청 없이 바로 답합니다.
+- 표현이 조금 다른 질문은 답변 캐시(SemanticAnswerCache)에 고정(pinned) 항목으로 넣어 임베딩 근접도로 찾습니다.
+
+사용법:
+    python faq_bank.py build [인덱스 디렉토리]   # 예시 질문 답변 생성 (OPENAI_API_KEY 필요, 같은 버전 답변은 재사용)
+    python faq_bank.py show [인덱스 디렉토리]    # 저장된 답변 수와 인덱스 버전 확인
+"""
+
+import os
+import sys
+import json
+import time
+import re
+import numpy as np
+
+FAQ_BANK_FILE = "faq_bank.json"
+FAQ_EMBEDDINGS_FILE = "faq_embeddings.npy"
+FAQ_BANK_VERSION = 1
+FAQ_BUILD_WORKERS = int(os.getenv("FAQ_BUILD_WORKERS", "4"))
+# 저장할 답변의 결과 (no_chunks, empty, error 같은 안내 메시지는 저장하지 않음)
+FAQ_STORED_OUTCOMES = ("llm", "cache", "faq")
+
+_BULLET = re.compile(r'^[\s•·\-*]+')
+_TRAILING_PUNCTUATION = re.compile(r'[\s?？.!。！]+$')
+
+def normalize_question(text):
+    """정확히 같은 질문인지 비교하기 위해 글머리표, 공백, 끝 문장부호, 대소문자 차이를 없앱니다."""
+    text = _BULLET.sub('', text)
+    text = _TRAILING_PUNCTUATION.sub('', text)
+    return " ".join(text.split()).casefold()
+
+def guide_questions():
+    """안내 문구의 언어별 예시 질문을 [(언어, 질문), ...]로 반환합니다. (글머리표 제거, 중복 제외)"""
+    from rag_guide import RAG_GUIDE_TEXTS
+    questions, seen = [], set()
+    for lang, guide in RAG_GUIDE_TEXTS.items():
+        for example in guide["examples"]:
+            question = _BULLET.sub('', example).strip()
+            key = normalize_question(question)
+            if key and key not in seen:
+                seen.add(key)
+                questions.append((lang, question))
+    return questions
+
+class FAQBank:
+    """미리 만든 예시 질문 답변 모음"""
+    def __init__(self, entries, embeddings, index_version):
+        self.entries = entries  # [{"lang", "question", "answer"}, ...]
+        self.embeddings = embeddings
+        self.index_version = index_version
+        self._answers = {normalize_question(entry["question"]): entry["answer"] for entry in entries}
+        self.hits = 0
+
+    def lookup(self, question):
+        """정확히 같은 예시 질문이면 답변을, 아니면 None을 반환합니다."""
+        answer = self._answers.get(normalize_question(question))
+        if answer is not None:
+            self.hits += 1
+        return answer
+
+    def save(self, index_dir):
+        """인덱스 디렉토리에 답변 모음을 저장합니다."""
+        data = {
+            "version": FAQ_BANK_VERSION,
+            "index_version": self.index_version,
+            "created_at": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "entries": self.entries,
+        }
+        np.save(os.path.join(index_dir, FAQ_EMBEDDINGS_FILE), self.embeddings)
+        path = os.path.join(index_dir, FAQ_BANK_FILE)
+        with open(path + ".tmp", 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, indent=1)
+        os.replace(path + ".tmp", path)
+
+    @classmethod
+    def load(cls, index_dir, index_version=None):
+        """답변 모음을 로드합니다. (없거나 index_version이 다르면 None)"""
+        path = os.path.join(index_dir, FAQ_BANK_FILE)
+        embeddings_path = os.path.join(index_dir, FAQ_EMBEDDINGS_FILE)
+        if not os.path.exists(path) or not os.path.exists(embeddings_path):
+            return None
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            embeddings = np.load(embeddings_path)
+        except (json.JSONDecodeError, OSError, ValueError):
+            return None
+        if data.get("version") != FAQ_BANK_VERSION or len(data["entries"]) != len(embeddings):
+            return None
+        if index_version is not None and data.get("index_version") != index_version:
+            print(f"⚠️ FAQ 답변이 다른 인덱스 버전으로 만들어져 사용하지 않습니다. ('python faq_bank.py build'로 다시 만드세요)")
+            return None
+        return cls(data["entries"], embeddings, data.get("index_version"))
+
+def warm_faq_bank(vector_db, index_dir, answer_cache=None):
+    """저장된 FAQ 답변을 벡터DB에 연결하고, 답변 캐시에 고정 항목으로 넣습니다."""
+    from rag_utils import detect_language
+    bank = FAQBank.load(index_dir, vector_db.index_version)
+    if bank is None:
+        return None
+    vector_db.faq_bank = bank
+    if answer_cache is not None:
+        for entry, embedding in zip(bank.entries, bank.embeddings):
+            # 답변 캐시는 질문에서 감지한 언어로 찾으므로 같은 방식으로 넣음
+            answer_cache.put(embedding, detect_language(entry["question"]), vector_db.index_version, entry["answer"], pinned=True)
+    print(f"FAQ 답변 {len(bank.entries)}개 준비 완료 (인덱스 버전: {bank.index_version})")
+    return bank
+
+def build_faq_bank(index_dir, openai_api_key, workers=FAQ_BUILD_WORKERS):
+    """예시 질문을 모두 answer_with_rag로 답해 인덱스 디렉토리에 저장합니다."""
+    from concurrent.futures import ThreadPoolExecutor
+    from rag_utils import load_vector_db, answer_with_rag_outcome, normalize_embeddings
+    vector_db = load_vector_db(index_dir, openai_api_key)
+    questions = guide_questions()
+    print(f"예시 질문 {len(questions)}개 (인덱스 버전: {vector_db.index_version})")
+
+    # 같은 인덱스 버전으로 만든 답변은 다시 만들지 않음
+    previous = FAQBank.load(index_dir, vector_db.index_version)
+    answers = {}
+    if previous is not None:
+        for entry in previous.entries:
+            answers[normalize_question(entry["question"])] = entry["answer"]
+    todo = [question for _, question in questions if normalize_question(question) not in answers]
+    print(f"재사용 {len(questions) - len(todo)}개, 새로 생성 {len(todo)}개")
+
+    start = time.perf_counter()
+    skipped = 0
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for question, (answer, outcome) in zip(todo, pool.map(lambda q: answer_with_rag_outcome(q, vector_db, openai_api_key), todo)):
+            if outcome not in FAQ_STORED_OUTCOMES:
+                # 관련 내용 없음(no_chunks)이나 오류 안내가 고정되면 인덱스를 다시 만들 때까지 계속 그렇게 답하게 됨
+                skipped += 1
+                print(f"  ❌ {question} ({outcome}): {answer}")
+                continue
+            answers[normalize_question(question)] = answer
+    print(f"답변 생성 완료 ({time.perf_counter() - start:.1f}초, 저장하지 않음 {skipped}개)")
+
+    entries = [{"lang": lang, "question": question, "answer": answers[normalize_question(question)]}
+               for lang, question in questions if normalize_question(question) in answers]
+    if not entries:
+        print("❌ 저장할 답변이 없습니다.")
+        return None
+    embeddings = vector_db.embeddings.embed_documents([entry["question"] for entry in entries])
+    bank = FAQBank(entries, normalize_embeddings(embeddings), vector_db.index_version)
+    bank.save(index_dir)
+    print(f"✅ FAQ 답변 {len(entries)}개 저장: {os.path.join(index_dir, FAQ_BANK_FILE)}")
+    return bank
+
+def main():
+    from rag_utils import VECTOR_INDEX_MERGED_DIR
+    command = sys.argv[1].lower() if len(sys.argv) > 1 else ""
+    index_dir = sys.argv[2] if len(sys.argv) > 2 else VECTOR_INDEX_MERGED_DIR
+    if command == "build":
+        openai_api_key = os.getenv("OPENAI_API_KEY")
+        if not openai_api_key:
+            print("❌ OPENAI_API_KEY 환경변수가 설정되지 않았습니다.")
+            return
+        build_faq_bank(index_dir, openai_api_key)
+    elif command == "show":
+        bank = FAQBank.load(index_dir)
+        if bank is None:
+            print(f"FAQ 답변이 없습니다: {index_dir}")
+            return
+        langs = {}
+        for entry in bank.entries:
+            langs[entry["lang"]] = langs.get(entry["lang"], 0) + 1
+        print(f"FAQ 답변 {len(bank.entries)}개 (인덱스 버전: {bank.index_version})")
+        print(", ".join(f"{lang}: {count}" for lang, count in langs.items()))
+    else:
+        print("사용법:")
+        print("  python faq_bank.py build [인덱스 디렉토리]  - 예시 질문 답변 생성 (OPENAI_API_KEY 필요)")
+        print("  python faq_bank.py show [인덱스 디렉토리]   - 저장된 답변 확인")
+
+if __name__ == "__main__":
+    main()
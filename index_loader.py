@@ -0,0 +1,70 @@
+"""
+RAG 벡터 인덱스 백그라운드 로더
+
+앱 시작(ft.app)을 막지 않도록 벡터 인덱스를 별도 스레드에서 로드하고,
+RAG 채팅방이 준비 상태를 확인할 수 있게 합니다.
+
+    loading      로드 중 (사용자에게는 "준비 중" 안내)
+    ready        로드 완료
+    unavailable  벡터DB 파일이 없음 (RAG 비활성화)
+    failed       로드 중 오류
+"""
+
+import threading
+import time
+
+LOADING = "loading"
+READY = "ready"
+UNAVAILABLE = "unavailable"
+FAILED = "failed"
+
+class BackgroundIndexLoader:
+    """load_func()를 백그라운드 스레드에서 한 번 실행해 벡터DB를 준비하는 로더"""
+    def __init__(self, load_func, name="rag-index-loader"):
+        self._load_func = load_func
+        self._name = name
+        self._ready_event = threading.Event()
+        self._lock = threading.Lock()
+        self._thread = None
+        self.state = LOADING
+        self.vector_db = None
+        self.error = None
+        self.started_at = None
+        self.elapsed = None
+
+    def start(self):
+        """로드를 시작합니다. (이미 시작했으면 아무것도 하지 않음)"""
+        with self._lock:
+            if self._thread is not None:
+                return self
+            self.started_at = time.perf_counter()
+            self._thread = threading.Thread(target=self._run, name=self._name, daemon=True)
+            self._thread.start()
+        return self
+
+    def _run(self):
+        try:
+            vector_db = self._load_func()
+            self.vector_db = vector_db
+            self.state = READY if vector_db is not None else UNAVAILABLE
+        except Exception as e:
+            self.error = e
+            self.state = FAILED
+            print(f"❌ RAG 벡터DB 로드 실패: {e}")
+        finally:
+            self.elapsed = time.perf_counter() - self.started_at
+            self._ready_event.set()
+            print(f"RAG 벡터DB 준비 상태: {self.state} ({self.elapsed:.1f}초)")
+
+    @property
+    def is_ready(self):
+        return self.state == READY
+
+    @property
+    def is_loading(self):
+        return self.state == LOADING
+
+    def wait(self, timeout=None):
+        """로드가 끝날 때까지 최대 timeout초 기다린 뒤 벡터DB(준비되지 않았으면 None)를 반환합니다."""
+        self._ready_event.wait(timeout)
+        return self.vector_db if self.is_ready else None
@@ -0,0 +1,93 @@
+"""
+여러 PDF로 만든 벡터 인덱스의 원본 파일 목록(manifest)
+
+인덱스 디렉토리 안의 manifest.json에 PDF별로 다음 정보를 기록합니다.
+
+    hash         파일 내용 해시
+    size         파일 크기 (bytes)
+    mtime_ns     수정 시각 (나노초)
+    inode        inode 번호 (파일을 교체하면 바뀜)
+    chunk_ids    이 PDF에서 나온 청크 ID 목록
+    row_start    인덱스 안에서 이 PDF 청크가 시작하는 행
+    row_end      끝 행 (포함하지 않음)
+
+다시 만들 때 크기/수정 시각/inode가 같은 PDF는 해시도 계산하지 않고 기존 행을 그대로 복사하고,
+추가되거나 바뀐 PDF만 청크 분할/임베딩하며, 목록에서 빠진 PDF의 행은 버립니다.
+"""
+
+import os
+import json
+import time
+
+MANIFEST_FILE = "manifest.json"
+MANIFEST_VERSION = 1
+
+def load_manifest(index_dir):
+    """인덱스 디렉토리의 manifest를 읽습니다. (없거나 읽을 수 없으면 None)"""
+    path = os.path.join(index_dir, MANIFEST_FILE)
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+    except (json.JSONDecodeError, OSError):
+        return None
+    if manifest.get("version") != MANIFEST_VERSION:
+        return None
+    return manifest
+
+def save_manifest(index_dir, sources, model):
+    """PDF별 정보(sources)를 manifest로 저장합니다."""
+    manifest = {"version": MANIFEST_VERSION, "model": model, "sources": sources}
+    path = os.path.join(index_dir, MANIFEST_FILE)
+    with open(path + ".tmp", 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False)
+    os.replace(path + ".tmp", path)
+    return manifest
+
+def file_signature(path):
+    """파일 크기, 수정 시각, inode를 반환합니다. (stat 한 번, 파일 내용은 읽지 않음)"""
+    stat = os.stat(path)
+    return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "inode": stat.st_ino}
+
+def signature_matches(entry, signature):
+    """기록된 파일 서명이 현재 서명과 같은지 확인합니다. (inode가 없는 예전 기록은 크기/수정 시각만 비교)"""
+    if not entry:
+        return False
+    return (entry.get("size") == signature["size"]
+            and entry.get("mtime_ns") == signature["mtime_ns"]
+            and entry.get("inode", signature["inode"]) == signature["inode"])
+
+def make_chunk_id(file_hash, chunk_index):
+    """파일 해시와 파일 안의 순번으로 청크 ID를 만듭니다."""
+    return f"{file_hash[:16]}-{chunk_index:05d}"
+
+def plan_update(pdf_paths, manifest, hash_func, timings=None):
+    """manifest와 현재 파일을 비교해 (그대로인 PDF, 새로/다시 처리할 PDF, 빠진 PDF)를 반환합니다.
+
+    그대로인 PDF: {경로: manifest 항목}
+    새로/다시 처리할 PDF: {경로: {"hash", "size", "mtime_ns", "inode"}}
+    빠진 PDF: [경로, ...]
+    timings가 주어지면 파일별 (확인 방법 "signature" | "hash", 걸린 시간 ms)를 기록합니다.
+    """
+    old_sources = manifest["sources"] if manifest else {}
+    unchanged, changed = {}, {}
+    for path in pdf_paths:
+        start = time.perf_counter()
+        signature = file_signature(path)
+        entry = old_sources.get(path)
+        if signature_matches(entry, signature):
+            unchanged[path] = dict(entry, **signature)
+            method = "signature"
+        else:
+            file_hash = hash_func(path)
+            method = "hash"
+            if entry and entry["hash"] == file_hash:
+                # 내용은 같고 수정 시각만 바뀐 경우
+                unchanged[path] = dict(entry, **signature)
+            else:
+                changed[path] = dict(signature, hash=file_hash)
+        if timings is not None:
+            timings[path] = (method, (time.perf_counter() - start) * 1000)
+    removed = [path for path in old_sources if path not in unchanged and path not in changed]
+    return unchanged, changed, removed
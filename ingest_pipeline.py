@@ -0,0 +1,149 @@
+"""
+스트리밍 인덱스 생성 파이프라인
+
+    PDF 페이지 추출(병렬) → 청크 분할 → 고정 크기 배치 임베딩 → 인덱스 파일에 이어 쓰기
+
+전체 말뭉치를 리스트로 모으지 않으므로 메모리 사용량은 배치 크기에 비례하고,
+배치마다 체크포인트를 남기므로 중단된 작업을 다시 실행하면 마지막 체크포인트부터 이어서 진행합니다.
+(입력 순서가 항상 같으므로 이미 기록한 항목 수만큼 건너뛰면 됩니다.)
+
+파이프라인 입력은 (문서, 임베딩 또는 None) 항목의 iterable입니다.
+임베딩이 None인 문서만 임베딩 API(문서 임베딩 저장소 경유)로 요청합니다.
+임베딩 전에 거의 같은 청크(dedup.py)를 걸러내고, 제거 비율은 인덱스 헤더의 "dedup"에 기록합니다.
+인덱스를 다 만들면 hybrid 검색용 BM25 파일(lexical_index.py)도 같은 디렉토리에 만듭니다.
+"""
+
+import os
+import json
+import hashlib
+import numpy as np
+from itertools import islice
+from vector_store import IndexWriter
+from lexical_index import build_lexical_index
+from dedup import NearDuplicateFilter, print_dedup_report, DEDUP_ENABLED
+from rag_utils import chunk_pdfs, normalize_embeddings, load_vector_db, EMBEDDING_MODEL
+
+INGEST_BATCH_SIZE = int(os.getenv("INGEST_BATCH_SIZE", "1024"))  # 한 번에 임베딩/기록할 청크 수
+
+def make_fingerprint(*parts):
+    """입력 구성을 나타내는 문자열을 만듭니다. (체크포인트가 같은 입력에서 나온 것인지 확인용)"""
+    return hashlib.sha256(json.dumps(parts, ensure_ascii=False, sort_keys=True, default=str).encode('utf-8')).hexdigest()[:16]
+
+def pdf_fingerprint(pdf_paths):
+    """PDF 목록과 각 파일의 크기/수정 시각으로 체크포인트 식별값을 만듭니다."""
+    return make_fingerprint([(path, os.path.getsize(path), os.stat(path).st_mtime_ns) for path in pdf_paths])
+
+def iter_pdf_items(pdf_paths, workers=None):
+    """PDF 청크를 (문서, None) 항목으로 하나씩 반환합니다. (파일/페이지 순서)"""
+    for pdf_path, chunks in chunk_pdfs(pdf_paths, workers=workers):
+        print(f"청크 분할: {pdf_path} → {len(chunks)}개")
+        for i, doc in enumerate(chunks):
+            doc['metadata'].update({'source': pdf_path, 'chunk_index': i})
+            yield doc, None
+
+def iter_vector_db_items(db_paths):
+    """기존 벡터DB(인덱스 디렉토리 또는 pkl)의 청크를 (문서, 임베딩) 항목으로 하나씩 반환합니다."""
+    for db_path in db_paths:
+        if not os.path.exists(db_path):
+            print(f"❌ DB 파일이 존재하지 않습니다: {db_path}")
+            continue
+        db = load_vector_db(db_path)
+        print(f"{db_path} → 청크 {len(db.documents)}개")
+        matrix = db.doc_embeddings
+        for i in range(len(db.documents)):
+            # 메모리 매핑된 행은 복사해서 넘김 (원본 파일을 계속 붙잡지 않도록)
+            yield db.documents[i], (np.array(matrix[i]) if matrix is not None else None)
+        del db, matrix
+
+def batched(items, batch_size):
+    """iterable을 batch_size개씩 리스트로 묶어 반환합니다."""
+    iterator = iter(items)
+    while True:
+        batch = list(islice(iterator, batch_size))
+        if not batch:
+            return
+        yield batch
+
+def embed_batch(batch, embeddings):
+    """배치의 (문서, 임베딩) 중 임베딩이 없는 문서만 요청해 정규화된 임베딩 행렬을 반환합니다."""
+    missing = [i for i, (_, vector) in enumerate(batch) if vector is None]
+    vectors = [vector for _, vector in batch]
+    store = getattr(embeddings, 'document_store', None)
+    if store is not None and len(missing) < len(batch):
+        # 이미 있는 임베딩은 저장소에도 기록해 두어 이후 재생성 시 재사용
+        known = [i for i, (_, vector) in enumerate(batch) if vector is not None]
+        store.put_many(embeddings.model, [batch[i][0]['page_content'] for i in known], [vectors[i] for i in known])
+    if missing:
+        if embeddings is None:
+            raise ValueError("임베딩이 없는 문서가 있지만 임베딩 객체가 주어지지 않았습니다.")
+        new_vectors = embeddings.embed_documents([batch[i][0]['page_content'] for i in missing])
+        for i, vector in zip(missing, new_vectors):
+            vectors[i] = vector
+    return normalize_embeddings(vectors)
+
+def build_index(index_dir, items, embeddings=None, fingerprint=None, batch_size=INGEST_BATCH_SIZE, before_close=None, dedup=None):
+    """(문서, 임베딩 또는 None) 항목을 배치 단위로 임베딩해 인덱스 디렉토리에 기록합니다.
+
+    fingerprint가 같은 중단된 작업이 있으면 이어서 진행합니다.
+    before_close(writer)는 인덱스를 교체하기 직전에 호출됩니다. (manifest 기록 등)
+    dedup(NearDuplicateFilter)이 주어지면 결과를 헤더에 기록합니다. (항목 필터링은 호출하는 쪽에서)
+    반환값: 인덱스 헤더 (기록한 청크가 없으면 None)
+    """
+    model = getattr(embeddings, 'model', EMBEDDING_MODEL)
+    writer = IndexWriter(index_dir, model=model, resume=True, fingerprint=fingerprint)
+    if writer.count:
+        print(f"중단된 작업을 이어서 진행합니다: {index_dir} ({writer.count}개 청크 완료)")
+    try:
+        # 이미 기록한 항목은 건너뜀 (입력 순서가 같으므로 앞에서부터 writer.count개)
+        for batch in batched(islice(items, writer.count, None), batch_size):
+            writer.add([doc for doc, _ in batch], embed_batch(batch, embeddings))
+            writer.checkpoint()
+            print(f"  - {writer.count}개 청크 기록 완료")
+    except BaseException:
+        # 체크포인트까지의 결과는 남겨 두고 다시 실행하면 이어서 진행
+        writer.suspend()
+        raise
+    if writer.count == 0:
+        print("❌ 기록할 청크가 없습니다.")
+        writer.abort()
+        return None
+    if before_close is not None:
+        before_close(writer)
+    extra_header = None
+    if dedup is not None:
+        # 이어서 진행한 경우에도 건너뛴 항목까지 필터를 거치므로 전체 빌드 기준 수치
+        extra_header = {"dedup": dedup.report()}
+        print_dedup_report(extra_header["dedup"])
+    header = writer.close(extra_header=extra_header)
+    # hybrid 검색용 BM25 파일 (앱 시작 시에는 만들지 않으므로 여기서 생성)
+    build_lexical_index(index_dir)
+    print(f"벡터 인덱스 저장 완료: {index_dir} (청크 수: {header['count']})")
+    return header
+
+def make_dedup_filter(enabled=DEDUP_ENABLED):
+    """설정에 따라 중복 청크 필터를 만듭니다. (꺼져 있으면 None)"""
+    return NearDuplicateFilter() if enabled else None
+
+def build_index_from_pdfs(pdf_paths, index_dir, embeddings, workers=None, batch_size=INGEST_BATCH_SIZE, dedup=DEDUP_ENABLED):
+    """PDF 목록으로 인덱스를 만듭니다. (중단되면 다시 실행 시 이어서 진행)"""
+    pdf_paths = [path for path in pdf_paths if os.path.exists(path)]
+    dedup_filter = make_dedup_filter(dedup)
+    items = iter_pdf_items(pdf_paths, workers)
+    if dedup_filter is not None:
+        items = dedup_filter.filter(items)
+    # 중복 제거 설정이 바뀌면 기록할 항목 순서가 달라지므로 체크포인트 식별값에 포함
+    fingerprint = make_fingerprint(pdf_fingerprint(pdf_paths), dedup_filter and dedup_filter.threshold)
+    return build_index(index_dir, items, embeddings, fingerprint=fingerprint,
+                       batch_size=batch_size, dedup=dedup_filter)
+
+def build_index_from_vector_dbs(db_paths, index_dir, embeddings=None, batch_size=INGEST_BATCH_SIZE, dedup=DEDUP_ENABLED):
+    """여러 벡터DB의 청크와 임베딩을 이어 붙여 인덱스를 만듭니다. (임베딩 API 호출 없음)"""
+    existing = [path for path in db_paths if os.path.exists(path)]
+    dedup_filter = make_dedup_filter(dedup)
+    items = iter_vector_db_items(existing)
+    if dedup_filter is not None:
+        items = dedup_filter.filter(items)
+    fingerprint = make_fingerprint([(path, os.path.getmtime(path)) for path in existing],
+                                   dedup_filter and dedup_filter.threshold)
+    return build_index(index_dir, items, embeddings, fingerprint=fingerprint,
+                       batch_size=batch_size, dedup=dedup_filter)
@@ -0,0 +1,199 @@
+"""
+BM25 어휘(lexical) 검색 인덱스
+
+형태소 분석기 없이 한글/한자/가나/태국어는 글자 2-gram, 라틴 문자는 단어 단위로 토큰화합니다.
+예) "전셋집이 뭐예요?" → 전셋, 셋집, 집이, 뭐예, 예요
+
+"외국인등록증" 같은 짧은 키워드 질문은 벡터보다 어휘 검색이 더 정확한 경우가 많고,
+결과가 확실하면 임베딩 API 호출 없이 바로 답할 수 있습니다.
+
+인덱스 디렉토리 안에 다음 파일로 저장됩니다.
+
+    bm25_vocab.json        토큰 → 번호
+    bm25_offsets.npy       토큰별 posting 목록 위치 (토큰 수 + 1)
+    bm25_doc_ids.npy       posting 청크 번호 (int32)
+    bm25_weights.npy       posting BM25 가중치 (idf 포함, float32)
+
+인덱스를 만들 때(ingest_pipeline, save_vector_db) 함께 생성하며, 예전 인덱스는 직접 생성합니다.
+    python lexical_index.py [인덱스 디렉토리]
+"""
+
+import os
+import sys
+import re
+import json
+import unicodedata
+import numpy as np
+from collections import Counter
+from vector_store import read_header, write_header, ChunkStore
+
+VOCAB_FILE = "bm25_vocab.json"
+OFFSETS_FILE = "bm25_offsets.npy"
+DOC_IDS_FILE = "bm25_doc_ids.npy"
+WEIGHTS_FILE = "bm25_weights.npy"
+
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+# 어휘 검색 결과만으로 답할 수 있다고 볼 기준
+CONFIDENT_COVERAGE = 0.6  # 1위 점수 / 질문 토큰이 모두 최대로 맞을 때의 점수
+CONFIDENT_MARGIN = 1.3    # 1위 점수 / 2위 점수
+LEXICAL_MIN_RELATIVE_SCORE = 0.5  # 어휘 검색만으로 답할 때 1위 점수의 이 비율 이상인 청크만 사용
+
+# 글자 n-gram으로 나눌 문자(한글, 한자, 가나, 태국어)와 단어 단위로 나눌 문자
+_NGRAM_SCRIPT = r'぀-ヿ㐀-䶿一-鿿가-힣฀-๿'
+_TOKEN_PATTERN = re.compile(rf'[{_NGRAM_SCRIPT}]+|[^\W_{_NGRAM_SCRIPT}]+')
+_NGRAM_RUN = re.compile(rf'[{_NGRAM_SCRIPT}]')
+
+def tokenize(text, n=2):
+    """텍스트를 BM25 토큰 목록으로 나눕니다."""
+    tokens = []
+    for run in _TOKEN_PATTERN.findall(unicodedata.normalize('NFKC', text).lower()):
+        if _NGRAM_RUN.match(run):
+            if len(run) <= n:
+                tokens.append(run)
+            else:
+                tokens.extend(run[i:i + n] for i in range(len(run) - n + 1))
+        elif len(run) > 1 or run.isdigit():
+            tokens.append(run)
+    return tokens
+
+class BM25Index:
+    """토큰별 posting 목록에 BM25 가중치를 미리 계산해 둔 역색인"""
+    def __init__(self, vocab, offsets, doc_ids, weights, n_docs):
+        self.vocab = vocab
+        self.offsets = offsets
+        self.doc_ids = doc_ids
+        self.weights = weights
+        self.n_docs = n_docs
+
+    @classmethod
+    def build(cls, texts, k1=BM25_K1, b=BM25_B):
+        """청크 본문 목록으로 BM25 인덱스를 만듭니다."""
+        vocab = {}
+        postings = []  # 토큰 번호별 [(청크 번호, tf), ...]
+        doc_lengths = []
+        for doc_id, text in enumerate(texts):
+            counts = Counter(tokenize(text))
+            doc_lengths.append(sum(counts.values()))
+            for token, tf in counts.items():
+                token_id = vocab.setdefault(token, len(vocab))
+                if token_id == len(postings):
+                    postings.append([])
+                postings[token_id].append((doc_id, tf))
+
+        n_docs = len(doc_lengths)
+        doc_lengths = np.asarray(doc_lengths, dtype=np.float32)
+        avg_length = float(doc_lengths.mean()) if n_docs else 0.0
+        length_norm = k1 * (1 - b + b * doc_lengths / avg_length) if avg_length else np.full(n_docs, k1, dtype=np.float32)
+
+        offsets = np.zeros(len(postings) + 1, dtype=np.int64)
+        offsets[1:] = np.cumsum([len(p) for p in postings])
+        doc_ids = np.empty(offsets[-1], dtype=np.int32)
+        weights = np.empty(offsets[-1], dtype=np.float32)
+        for token_id, plist in enumerate(postings):
+            start, end = offsets[token_id], offsets[token_id + 1]
+            ids = np.fromiter((d for d, _ in plist), dtype=np.int32, count=len(plist))
+            tfs = np.fromiter((tf for _, tf in plist), dtype=np.float32, count=len(plist))
+            idf = np.log(1 + (n_docs - len(plist) + 0.5) / (len(plist) + 0.5))
+            doc_ids[start:end] = ids
+            weights[start:end] = idf * tfs * (k1 + 1) / (tfs + length_norm[ids])
+        return cls(vocab, offsets, doc_ids, weights, n_docs)
+
+    def _max_token_weight(self, token_id):
+        start, end = self.offsets[token_id], self.offsets[token_id + 1]
+        return float(self.weights[start:end].max())
+
+    def score(self, query):
+        """질문의 BM25 점수 배열(청크 수)과, 질문 토큰이 모두 가장 잘 맞을 때의 점수를 반환합니다."""
+        scores = np.zeros(self.n_docs, dtype=np.float32)
+        best_possible = 0.0
+        for token, count in Counter(tokenize(query)).items():
+            token_id = self.vocab.get(token)
+            if token_id is None:
+                continue
+            start, end = self.offsets[token_id], self.offsets[token_id + 1]
+            # 같은 토큰의 posting에는 청크 번호가 중복되지 않으므로 fancy index 덧셈으로 충분
+            scores[self.doc_ids[start:end]] += count * self.weights[start:end]
+            best_possible += count * self._max_token_weight(token_id)
+        return scores, best_possible
+
+    def search(self, query, k=3):
+        """상위 k개 청크의 (인덱스 배열, 점수 배열, 확신 여부)를 반환합니다."""
+        scores, best_possible = self.score(query)
+        n_hits = int(np.count_nonzero(scores))
+        if n_hits == 0:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32), False
+        k = min(k, n_hits)
+        top = np.argpartition(-scores, k - 1)[:k] if k < self.n_docs else np.arange(self.n_docs)
+        top = top[np.argsort(-scores[top], kind='stable')][:k]
+        return top, scores[top], self.is_confident(scores[top], best_possible)
+
+    @staticmethod
+    def is_confident(top_scores, best_possible):
+        """1위가 질문 토큰을 충분히 덮고 2위와 차이가 분명하면 확신한다고 봅니다."""
+        if len(top_scores) == 0 or best_possible <= 0:
+            return False
+        coverage = top_scores[0] / best_possible
+        margin = top_scores[0] / top_scores[1] if len(top_scores) > 1 and top_scores[1] > 0 else np.inf
+        return coverage >= CONFIDENT_COVERAGE and margin >= CONFIDENT_MARGIN
+
+    def save(self, index_dir):
+        """인덱스 디렉토리에 BM25 파일을 저장하고 헤더에 기록합니다."""
+        with open(os.path.join(index_dir, VOCAB_FILE), 'w', encoding='utf-8') as f:
+            json.dump(self.vocab, f, ensure_ascii=False)
+        np.save(os.path.join(index_dir, OFFSETS_FILE), self.offsets)
+        np.save(os.path.join(index_dir, DOC_IDS_FILE), self.doc_ids)
+        np.save(os.path.join(index_dir, WEIGHTS_FILE), self.weights)
+        header = read_header(index_dir)
+        header["lexical"] = {"type": "bm25_char_ngram", "n_docs": self.n_docs, "vocab_size": len(self.vocab)}
+        write_header(index_dir, header)
+
+    @classmethod
+    def load(cls, index_dir):
+        """인덱스 디렉토리에서 BM25 인덱스를 로드합니다. (없으면 None)"""
+        lexical_info = read_header(index_dir).get("lexical")
+        if not lexical_info:
+            return None
+        with open(os.path.join(index_dir, VOCAB_FILE), 'r', encoding='utf-8') as f:
+            vocab = json.load(f)
+        return cls(
+            vocab,
+            np.load(os.path.join(index_dir, OFFSETS_FILE)),
+            np.load(os.path.join(index_dir, DOC_IDS_FILE), mmap_mode='r'),
+            np.load(os.path.join(index_dir, WEIGHTS_FILE), mmap_mode='r'),
+            lexical_info["n_docs"],
+        )
+
+def top_lexical_hits(ids, scores, k=3, min_relative=LEXICAL_MIN_RELATIVE_SCORE):
+    """어휘 검색 결과 중 상위 k개에서 1위 점수의 min_relative 비율 이상인 청크만 (인덱스 배열, 점수 배열)로 반환합니다.
+
+    질문 토큰 하나만 우연히 겹친 점수가 거의 0인 청크가 프롬프트에 들어가지 않도록 합니다.
+    """
+    ids, scores = ids[:k], scores[:k]
+    if len(scores) == 0:
+        return ids, scores
+    keep = scores >= scores[0] * min_relative
+    return ids[keep], scores[keep]
+
+def reciprocal_rank_fusion(rankings, k=3, rrf_k=60):
+    """여러 검색 결과(청크 번호 배열 목록)를 RRF로 합쳐 (인덱스 배열, 점수 배열)을 반환합니다."""
+    fused = {}
+    for ranking in rankings:
+        for rank, doc_id in enumerate(ranking):
+            fused[int(doc_id)] = fused.get(int(doc_id), 0.0) + 1.0 / (rrf_k + rank + 1)
+    ordered = sorted(fused.items(), key=lambda item: item[1], reverse=True)[:k]
+    return (np.asarray([doc_id for doc_id, _ in ordered], dtype=np.int64),
+            np.asarray([score for _, score in ordered], dtype=np.float32))
+
+def build_lexical_index(index_dir):
+    """벡터 인덱스 디렉토리의 청크 본문으로 BM25 인덱스를 만들어 같은 디렉토리에 저장합니다."""
+    chunks = ChunkStore(index_dir)
+    print(f"BM25 어휘 인덱스 생성 중: {index_dir} (청크 수: {len(chunks)})")
+    lexical_index = BM25Index.build(chunks.get_text(i) for i in range(len(chunks)))
+    lexical_index.save(index_dir)
+    print(f"BM25 어휘 인덱스 저장 완료 (토큰 수: {len(lexical_index.vocab)})")
+    return lexical_index
+
+if __name__ == "__main__":
+    build_lexical_index(sys.argv[1] if len(sys.argv) > 1 else "vector_index_merged")
@@ -1,6 +1,4 @@
 import os
-import pickle
-import shutil
 
 # 환경변수에서 firebase_key.json 내용을 읽어서 파일로 저장
 firebase_key_json = os.getenv("FIREBASE_KEY_JSON")
@@ -20,25 +18,19 @@ FIREBASE_KEY_PATH = os.getenv("FIREBASE_KEY_PATH", "firebase_key.json")
 ''')
 
 import flet as ft
-from flet_webview import WebView
 from pages.nationality_select import NationalitySelectPage
 from pages.home import HomePage
 from pages.create_room import CreateRoomPage
 from pages.room_list import RoomListPage
 from pages.chat_room import ChatRoomPage
 from pages.foreign_country_select import ForeignCountrySelectPage
-import openai
 from config import OPENAI_API_KEY, MODEL_NAME, FIREBASE_DB_URL, FIREBASE_KEY_PATH
 import uuid
-import qrcode
-import io
-import base64
-import geocoder
 import time
 import firebase_admin
 from firebase_admin import credentials, db
-from rag_utils import get_or_create_vector_db, answer_with_rag
-from rag_utils import SimpleVectorDB, OpenAIEmbeddings
+from index_loader import BackgroundIndexLoader
+# numpy/openai/pypdf를 쓰는 RAG 모듈(rag_utils 등)과 qrcode는 처음 사용할 때 import (시작 시간 단축)
 
 
 IS_SERVER = os.environ.get("CLOUDTYPE") == "1"  # Cloudtype 환경변수 등으로 구분
@@ -76,97 +68,47 @@ except Exception as e:
     print("⚠️ Firebase 기능이 비활성화됩니다. 채팅방 생성 및 메시지 저장이 불가능합니다.")
     FIREBASE_AVAILABLE = False
 
-client = openai.OpenAI(api_key=OPENAI_API_KEY)
-
 # RAG용 벡터DB 준비 (무조건 병합본만 사용)
-print("RAG 벡터DB 준비 중...")
 VECTOR_DB_MERGED_PATH = "vector_db_merged.pkl"
-vector_db = None
-
-try:
+# 근사 검색용 임베딩 저장 방식 (float32, float16, int8)
+VECTOR_STORAGE_MODE = os.getenv("VECTOR_STORAGE_MODE", "float32")
+# 검색 방식 (vector, hybrid: BM25 어휘 검색 + 벡터 검색 RRF 결합)
+# hybrid는 인덱스 디렉토리에 BM25 파일이 있어야 함 (python lexical_index.py <인덱스 디렉토리>)
+VECTOR_SEARCH_MODE = os.getenv("VECTOR_SEARCH_MODE", "vector")
+# 0이면 시작할 때 미리 로드하지 않고 첫 RAG 질문 때 로드 시작
+RAG_INDEX_PRELOAD = os.getenv("RAG_INDEX_PRELOAD", "1") == "1"
+# 1이면 RAG 답변을 토큰 단위로 스트리밍해 말풍선에 바로 표시
+RAG_STREAMING = os.getenv("RAG_STREAMING", "1") == "1"
+
+def load_rag_vector_db():
+    """RAG용 병합 벡터DB를 로드합니다. (백그라운드 스레드에서 실행, 변환/임베딩은 하지 않음)"""
+    from rag_utils import load_vector_db, VECTOR_INDEX_MERGED_DIR
+    from vector_store import is_vector_index
+    if is_vector_index(VECTOR_INDEX_MERGED_DIR):
+        # 메모리 매핑 인덱스 (복사 없이 즉시 로드)
+        print("병합 벡터 인덱스를 로드합니다...")
+        vector_db = load_vector_db(VECTOR_INDEX_MERGED_DIR, OPENAI_API_KEY, storage_mode=VECTOR_STORAGE_MODE, search_mode=VECTOR_SEARCH_MODE)
+        print(f"병합 벡터 인덱스 로드 완료! (청크 수: {len(vector_db.documents)})")
+        # 예시 질문 답변(python faq_bank.py build로 생성)을 답변 캐시에 미리 넣음
+        from faq_bank import warm_faq_bank
+        from answer_cache import get_answer_cache
+        warm_faq_bank(vector_db, VECTOR_INDEX_MERGED_DIR, get_answer_cache())
+        return vector_db
     if os.path.exists(VECTOR_DB_MERGED_PATH):
-        print("기존 벡터DB 파일을 로드합니다...")
-        with open(VECTOR_DB_MERGED_PATH, "rb") as f:
-            vector_db = pickle.load(f)
-        # 임베딩 객체 다시 생성
-        vector_db.embeddings = OpenAIEmbeddings(
-            openai_api_key=OPENAI_API_KEY,
-            model="text-embedding-3-small"
-        )
-        print("기존 병합 벡터DB 로드 완료!")
-    else:
-        print("벡터DB 파일이 없습니다.")
-        print("RAG 기능이 비활성화됩니다.")
-except Exception as e:
-    print(f"벡터DB 로드 중 오류 발생: {e}")
-    if "langchain" in str(e).lower():
-        print("langchain 의존성 오류로 인해 기존 벡터DB를 변환합니다...")
-        try:
-            # 기존 벡터DB 파일을 백업
-            backup_path = VECTOR_DB_MERGED_PATH + ".backup"
-            if os.path.exists(VECTOR_DB_MERGED_PATH):
-                shutil.copy2(VECTOR_DB_MERGED_PATH, backup_path)
-                print(f"기존 벡터DB 백업 완료: {backup_path}")
-            
-            # 기존 벡터DB에서 데이터 추출
-            with open(VECTOR_DB_MERGED_PATH, 'rb') as f:
-                old_db = pickle.load(f)
-            
-            print("기존 벡터DB에서 데이터 추출 중...")
-            
-            # 기존 벡터DB에서 문서 추출
-            documents = []
-            if hasattr(old_db, 'documents'):
-                documents = old_db.documents
-                print(f"기존 문서 수: {len(documents)}")
-            elif hasattr(old_db, 'docstore') and hasattr(old_db.docstore, '_dict'):
-                # ChromaDB 형식에서 문서 추출
-                for doc_id, doc in old_db.docstore._dict.items():
-                    if hasattr(doc, 'page_content') and hasattr(doc, 'metadata'):
-                        documents.append({
-                            'page_content': doc.page_content,
-                            'metadata': doc.metadata
-                        })
-                print(f"추출된 문서 수: {len(documents)}")
-            
-            if documents:
-                # 새로운 임베딩 생성
-                from rag_utils import SimpleVectorDB
-                embeddings = OpenAIEmbeddings(
-                    openai_api_key=OPENAI_API_KEY,
-                    model="text-embedding-3-small"
-                )
-                
-                # 문서 임베딩 생성
-                print("새로운 임베딩 생성 중...")
-                doc_embeddings = embeddings.embed_documents([doc['page_content'] for doc in documents])
-                
-                # SimpleVectorDB 생성
-                vector_db = SimpleVectorDB(documents, embeddings, doc_embeddings)
-                
-                # 새로운 벡터DB 저장
-                with open(VECTOR_DB_MERGED_PATH, "wb") as f:
-                    pickle.dump(vector_db, f)
-                
-                # 변환 완료 표시
-                with open(VECTOR_DB_MERGED_PATH + ".converted", "w") as f:
-                    f.write("converted")
-                print("벡터DB 변환 완료!")
-            else:
-                print("추출할 문서가 없습니다.")
-                vector_db = None
-                
-        except Exception as e2:
-            print(f"벡터DB 변환 실패: {e2}")
-            vector_db = None
-    else:
-        print("RAG 기능이 비활성화됩니다.")
-        vector_db = None
-
-# RAG 기능 사용 가능 여부 설정 (vector_db 정의 후)
-RAG_AVAILABLE = vector_db is not None
-
-print("RAG 벡터DB 준비 완료!")
+        # 예전 형식 변환은 오프라인 작업: python convert_vector_db.py index
+        print("⚠️ 예전 pickle 형식 벡터DB를 로드합니다. 'python convert_vector_db.py index'로 변환하면 시작이 빨라집니다.")
+        vector_db = load_vector_db(VECTOR_DB_MERGED_PATH, OPENAI_API_KEY, storage_mode=VECTOR_STORAGE_MODE, search_mode=VECTOR_SEARCH_MODE)
+        print(f"기존 병합 벡터DB 로드 완료! (청크 수: {len(vector_db.documents)})")
+        return vector_db
+    print("벡터DB 파일이 없습니다.")
+    print("RAG 기능이 비활성화됩니다.")
+    return None
+
+# 서버 시작을 막지 않도록 백그라운드에서 로드 (준비 전 질문에는 "준비 중" 안내)
+rag_index_loader = BackgroundIndexLoader(load_rag_vector_db)
+if RAG_INDEX_PRELOAD:
+    print("RAG 벡터DB 준비 시작 (백그라운드)...")
+    rag_index_loader.start()
 
 FIND_ROOM_TEXTS = {
     "ko": {
@@ -313,6 +255,11 @@ def main(page: ft.Page):
                 page.overlay.pop()
                 page.update()
 
+        # QR 생성 모듈은 공유 버튼을 누를 때만 로드
+        import io
+        import base64
+        import qrcode
+
         # QR코드에 전체 URL이 들어가도록 수정
         qr_data = f"{BASE_URL}/join_room/{room_id}"
         qr = qrcode.QRCode(version=1, box_size=10, border=5)
@@ -687,9 +634,30 @@ def main(page: ft.Page):
             if is_rag:
                 def rag_translate_message(text, target_lang):
                     # RAG 답변만 반환 (번역 X)
+                    from rag_utils import answer_with_rag, detect_language, get_error_message
+                    from answer_cache import get_answer_cache
+                    rag_index_loader.start()  # 미리 로드하지 않은 경우 여기서 시작
+                    if rag_index_loader.is_loading:
+                        # 로드가 끝날 때까지 서버를 붙잡지 않고 바로 안내
+                        return get_error_message(detect_language(text), 'warming_up')
+                    vector_db = rag_index_loader.vector_db
                     if vector_db is None:
                         return "죄송합니다. RAG 기능이 현재 사용할 수 없습니다. (벡터DB가 로드되지 않았습니다.)"
-                    return answer_with_rag(text, vector_db, OPENAI_API_KEY)
+                    return answer_with_rag(text, vector_db, OPENAI_API_KEY, answer_cache=get_answer_cache())
+
+                def rag_stream_message(text, target_lang):
+                    # RAG 답변을 토큰 단위로 스트리밍 (지금까지의 답변 전체를 차례로 반환)
+                    from rag_utils import answer_with_rag_stream, detect_language, get_error_message
+                    from answer_cache import get_answer_cache
+                    rag_index_loader.start()
+                    if rag_index_loader.is_loading:
+                        yield get_error_message(detect_language(text), 'warming_up')
+                        return
+                    vector_db = rag_index_loader.vector_db
+                    if vector_db is None:
+                        yield "죄송합니다. RAG 기능이 현재 사용할 수 없습니다. (벡터DB가 로드되지 않았습니다.)"
+                        return
+                    yield from answer_with_rag_stream(text, vector_db, OPENAI_API_KEY, answer_cache=get_answer_cache())
                 
                 page.views.append(ChatRoomPage(
                     page,
@@ -700,6 +668,7 @@ def main(page: ft.Page):
                     on_back=lambda e: go_home(lang),
                     on_share=on_share_clicked,
                     custom_translate_message=rag_translate_message,
+                    custom_translate_stream=rag_stream_message if RAG_STREAMING else None,
                     firebase_available=FIREBASE_AVAILABLE
                 ))
             else:
@@ -806,4 +775,6 @@ def main(page: ft.Page):
     page.on_route_change = route_change
     page.go(page.route)
 
-ft.app(target=main)
+# import만 할 때(시작 시간 측정 등)는 앱을 실행하지 않음
+if __name__ == "__main__":
+    ft.app(target=main)
@@ -1,38 +1,34 @@
 import os
-import pickle
-from rag_utils import SimpleVectorDB, OpenAIEmbeddings, chunk_pdf_to_text_chunks
+from rag_utils import OpenAIEmbeddings, VECTOR_INDEX_MERGED_DIR
+from embedding_cache import get_embedding_store
+from ingest_pipeline import build_index_from_pdfs
 
 PDF_DIR = r"C:\Users\yonom\Downloads\다누리"
-OUTPUT_PATH = "vector_db_merged.pkl"
+OUTPUT_PATH = VECTOR_INDEX_MERGED_DIR
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 
-# PDF 파일 목록 수집
-pdf_files = [os.path.join(PDF_DIR, f) for f in os.listdir(PDF_DIR) if f.lower().endswith('.pdf')]
-pdf_files.sort()
+def main():
+    # PDF 파일 목록 수집
+    pdf_files = [os.path.join(PDF_DIR, f) for f in os.listdir(PDF_DIR) if f.lower().endswith('.pdf')]
+    pdf_files.sort()
 
-print(f"PDF 파일 {len(pdf_files)}개 발견:")
-for f in pdf_files:
-    print(f"- {f}")
+    print(f"PDF 파일 {len(pdf_files)}개 발견:")
+    for f in pdf_files:
+        print(f"- {f}")
 
-all_chunks = []
-for pdf_path in pdf_files:
-    print(f"청크 분할: {pdf_path}")
-    chunks = chunk_pdf_to_text_chunks(pdf_path)
-    all_chunks.extend(chunks)
-    print(f"  → {len(chunks)}개 청크 생성")
+    # 임베딩 생성 (저장소에 있는 청크는 재사용)
+    embeddings = OpenAIEmbeddings(
+        openai_api_key=OPENAI_API_KEY,
+        model="text-embedding-3-small",
+        document_store=get_embedding_store()
+    )
 
-print(f"총 청크 개수: {len(all_chunks)}")
+    # PDF 추출(병렬) → 청크 분할 → 배치 임베딩 → 인덱스 기록
+    # 중간에 멈추면 다시 실행했을 때 마지막 체크포인트부터 이어서 진행
+    header = build_index_from_pdfs(pdf_files, OUTPUT_PATH, embeddings)
+    if header:
+        print(f"SimpleVectorDB 저장 완료: {OUTPUT_PATH} (총 청크 개수: {header['count']})")
 
-# 임베딩 생성
-embeddings = OpenAIEmbeddings(
-    openai_api_key=OPENAI_API_KEY,
-    model="text-embedding-3-small"
-)
-print("문서 임베딩 생성 중...")
-doc_embeddings = embeddings.embed_documents([doc['page_content'] for doc in all_chunks])
-
-# SimpleVectorDB 생성 및 저장
-vector_db = SimpleVectorDB(all_chunks, embeddings, doc_embeddings)
-with open(OUTPUT_PATH, "wb") as f:
-    pickle.dump(vector_db, f)
-print(f"SimpleVectorDB 저장 완료: {OUTPUT_PATH}") 
\ No newline at end of file
+# 병렬 추출 워커가 이 파일을 다시 import해도 실행되지 않도록 가드 (Windows)
+if __name__ == "__main__":
+    main()
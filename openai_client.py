@@ -0,0 +1,135 @@
+"""
+공용 OpenAI 클라이언트
+
+RAG 답변, 번역, 음성 인식(Whisper), 임베딩이 API 키별로 클라이언트 하나(= httpx 연결 풀 하나)를 함께 씁니다.
+요청마다 클라이언트를 만들면 TCP/TLS 연결을 매번 새로 맺으므로, keep-alive 연결을 재사용합니다.
+
+- HTTP/2 (h2 패키지가 있을 때, OPENAI_HTTP2=0이면 끔): 연결 하나로 여러 요청을 동시에 보냄
+- 연결 풀: 최대 연결 OPENAI_MAX_CONNECTIONS(기본 20), 유지할 keep-alive 연결 OPENAI_MAX_KEEPALIVE(기본 10)
+- 요청 종류별 제한 시간: CHAT_TIMEOUT, EMBEDDING_TIMEOUT, TRANSCRIPTION_TIMEOUT (연결 제한은 OPENAI_CONNECT_TIMEOUT)
+- get_pool_stats()로 요청 수, 진행 중 요청, 평균 응답 시간, 열린/유휴 연결 수를 확인
+
+openai/httpx는 클라이언트를 처음 만들 때 import합니다. (앱 시작 시간에 포함되지 않도록)
+"""
+
+import os
+import time
+import threading
+
+OPENAI_MAX_CONNECTIONS = int(os.getenv("OPENAI_MAX_CONNECTIONS", "20"))
+OPENAI_MAX_KEEPALIVE = int(os.getenv("OPENAI_MAX_KEEPALIVE", "10"))
+OPENAI_KEEPALIVE_EXPIRY = float(os.getenv("OPENAI_KEEPALIVE_EXPIRY", "60"))
+OPENAI_HTTP2 = os.getenv("OPENAI_HTTP2", "1") == "1"
+OPENAI_CONNECT_TIMEOUT = float(os.getenv("OPENAI_CONNECT_TIMEOUT", "5"))
+
+# 요청 종류별 응답 제한 시간(초)
+CHAT_TIMEOUT = float(os.getenv("OPENAI_CHAT_TIMEOUT", "30"))
+EMBEDDING_TIMEOUT = float(os.getenv("OPENAI_EMBEDDING_TIMEOUT", "30"))
+TRANSCRIPTION_TIMEOUT = float(os.getenv("OPENAI_TRANSCRIPTION_TIMEOUT", "60"))
+
+_clients = {}  # API 키 → (OpenAI 클라이언트, 전송 계층)
+_clients_lock = threading.Lock()
+
+def http2_available():
+    """HTTP/2를 쓸 수 있는지 확인합니다. (h2 패키지 필요)"""
+    if not OPENAI_HTTP2:
+        return False
+    try:
+        import h2  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+def request_timeout(seconds):
+    """요청 한 번의 제한 시간을 만듭니다. (연결은 OPENAI_CONNECT_TIMEOUT 안에 맺어야 함)"""
+    import httpx
+    return httpx.Timeout(seconds, connect=OPENAI_CONNECT_TIMEOUT)
+
+def _make_transport(http2):
+    """요청 수/지연시간을 집계하는 httpx 전송 계층을 만듭니다."""
+    import httpx
+
+    class CountingTransport(httpx.HTTPTransport):
+        """연결 풀을 그대로 쓰면서 요청 통계를 모으는 전송 계층"""
+        def __init__(self, **kwargs):
+            super().__init__(**kwargs)
+            self.http2 = kwargs.get("http2", False)
+            self._stats_lock = threading.Lock()
+            self.requests = 0
+            self.failures = 0  # 응답을 받지 못한 요청 (연결 실패, 시간 초과 등)
+            self.error_responses = 0  # 상태 코드 400 이상
+            self.in_flight = 0
+            self.total_seconds = 0.0
+
+        def handle_request(self, request):
+            start = time.perf_counter()
+            with self._stats_lock:
+                self.requests += 1
+                self.in_flight += 1
+            try:
+                response = super().handle_request(request)
+            except Exception:
+                with self._stats_lock:
+                    self.failures += 1
+                raise
+            finally:
+                with self._stats_lock:
+                    self.in_flight -= 1
+                    self.total_seconds += time.perf_counter() - start
+            if response.status_code >= 400:
+                with self._stats_lock:
+                    self.error_responses += 1
+            return response
+
+        def stats(self):
+            connections = list(self._pool.connections)
+            with self._stats_lock:
+                return {
+                    "requests": self.requests,
+                    "in_flight": self.in_flight,
+                    "failures": self.failures,
+                    "error_responses": self.error_responses,
+                    "avg_ms": self.total_seconds / self.requests * 1000 if self.requests else 0.0,
+                    "connections": len(connections),
+                    "idle_connections": sum(1 for connection in connections if connection.is_idle()),
+                    "http2": self.http2,
+                }
+
+    limits = httpx.Limits(
+        max_connections=OPENAI_MAX_CONNECTIONS,
+        max_keepalive_connections=OPENAI_MAX_KEEPALIVE,
+        keepalive_expiry=OPENAI_KEEPALIVE_EXPIRY,
+    )
+    return CountingTransport(http2=http2, limits=limits)
+
+def get_openai_client(api_key=None):
+    """API 키별 공용 OpenAI 클라이언트를 반환합니다. (없으면 환경변수 OPENAI_API_KEY)
+
+    재시도 횟수 등을 바꿔야 하면 client.with_options(...)를 쓰세요. 같은 연결 풀을 공유합니다.
+    """
+    api_key = api_key or os.getenv("OPENAI_API_KEY")
+    with _clients_lock:
+        entry = _clients.get(api_key)
+        if entry is None:
+            import openai
+            transport = _make_transport(http2_available())
+            http_client = openai.DefaultHttpxClient(transport=transport, timeout=request_timeout(CHAT_TIMEOUT))
+            client = openai.OpenAI(api_key=api_key, http_client=http_client)
+            entry = _clients[api_key] = (client, transport)
+            print(f"OpenAI 공용 클라이언트 생성 (HTTP/2: {transport.http2}, 최대 연결: {OPENAI_MAX_CONNECTIONS})")
+        return entry[0]
+
+def get_pool_stats():
+    """공용 클라이언트들의 연결 풀/요청 통계를 합쳐 반환합니다."""
+    with _clients_lock:
+        transports = [transport for _, transport in _clients.values()]
+    totals = {"clients": len(transports), "requests": 0, "in_flight": 0, "failures": 0,
+              "error_responses": 0, "connections": 0, "idle_connections": 0}
+    total_ms = 0.0
+    for transport in transports:
+        stats = transport.stats()
+        for key in ("requests", "in_flight", "failures", "error_responses", "connections", "idle_connections"):
+            totals[key] += stats[key]
+        total_ms += stats["avg_ms"] * stats["requests"]
+    totals["avg_ms"] = total_ms / totals["requests"] if totals["requests"] else 0.0
+    return totals
@@ -0,0 +1,93 @@
+"""
+PDF 텍스트 병렬 추출
+
+pypdf의 page.extract_text()는 CPU를 많이 쓰므로, (파일, 페이지 범위) 단위로 나눠
+ProcessPoolExecutor로 여러 코어에서 추출합니다. 결과는 항상 파일 순서, 페이지 순서대로 돌려줍니다.
+
+동시에 처리 중인 작업 수를 워커 수의 몇 배로 제한하므로 결과를 차례로 소비하면
+전체 말뭉치를 메모리에 올리지 않습니다.
+
+워커 수는 PDF_EXTRACT_WORKERS 환경변수로 조정합니다. (1이면 현재 프로세스에서 순서대로 추출)
+Windows에서는 워커가 실행 스크립트를 다시 import하므로 호출하는 스크립트에
+반드시 if __name__ == "__main__": 가드가 있어야 합니다.
+"""
+
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+PDF_EXTRACT_WORKERS = int(os.getenv("PDF_EXTRACT_WORKERS", str(os.cpu_count() or 1)))
+PAGES_PER_UNIT = 8  # 작업 단위 하나에 넣을 페이지 수
+PENDING_UNITS_PER_WORKER = 4  # 워커당 미리 보내 둘 작업 수
+
+def count_pages(pdf_path):
+    """PDF의 페이지 수를 반환합니다. (열 수 없으면 0)"""
+    from pypdf import PdfReader  # PDF를 처리할 때만 로드
+    try:
+        return len(PdfReader(pdf_path).pages)
+    except Exception as e:
+        print(f"❌ PDF를 열 수 없습니다: {pdf_path} ({e})")
+        return 0
+
+def extract_page_range(pdf_path, start, end):
+    """PDF의 [start, end) 페이지 텍스트를 [(페이지 번호(1부터), 텍스트), ...]로 반환합니다."""
+    from pypdf import PdfReader
+    try:
+        reader = PdfReader(pdf_path)
+    except Exception as e:
+        print(f"❌ PDF를 열 수 없습니다: {pdf_path} ({e})")
+        return []
+    pages = []
+    for page_num in range(start, end):
+        try:
+            text = reader.pages[page_num].extract_text() or ""
+        except Exception as e:
+            print(f"⚠️ 페이지 텍스트 추출 실패: {pdf_path} {page_num + 1}쪽 ({e})")
+            text = ""
+        pages.append((page_num + 1, text))
+    return pages
+
+def make_work_units(pdf_path, n_pages, pages_per_unit=PAGES_PER_UNIT):
+    """한 PDF를 (파일, 시작 페이지, 끝 페이지) 작업 단위로 나눕니다."""
+    return [(pdf_path, start, min(start + pages_per_unit, n_pages)) for start in range(0, n_pages, pages_per_unit)]
+
+def iter_pdf_pages(pdf_paths, workers=None, pages_per_unit=PAGES_PER_UNIT):
+    """PDF별 (경로, [(페이지 번호, 텍스트), ...])를 입력 순서대로 하나씩 반환하는 제너레이터입니다."""
+    workers = PDF_EXTRACT_WORKERS if workers is None else workers
+    pdf_paths = list(pdf_paths)
+    if workers <= 1:
+        for pdf_path in pdf_paths:
+            yield pdf_path, extract_page_range(pdf_path, 0, count_pages(pdf_path))
+        return
+
+    def units():
+        # 파일별 마지막 작업 단위에 표시를 붙여 파일 경계를 알 수 있게 함
+        for pdf_path in pdf_paths:
+            file_units = make_work_units(pdf_path, count_pages(pdf_path), pages_per_unit)
+            if not file_units:
+                yield pdf_path, None, True
+            for i, unit in enumerate(file_units):
+                yield pdf_path, unit, i == len(file_units) - 1
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = deque()
+        unit_iter = units()
+        current_pages = []
+        max_pending = workers * PENDING_UNITS_PER_WORKER
+        while True:
+            while len(pending) < max_pending:
+                item = next(unit_iter, None)
+                if item is None:
+                    break
+                pdf_path, unit, is_last = item
+                future = executor.submit(extract_page_range, *unit) if unit is not None else None
+                pending.append((pdf_path, future, is_last))
+            if not pending:
+                break
+            # 제출 순서대로 결과를 받아 결정적인 순서를 유지
+            pdf_path, future, is_last = pending.popleft()
+            if future is not None:
+                current_pages.extend(future.result())
+            if is_last:
+                yield pdf_path, current_pages
+                current_pages = []
@@ -0,0 +1,159 @@
+"""
+양자화된 임베딩 저장 (float16 / int8)
+
+근사 점수 계산용으로 임베딩을 작게 저장하고, 상위 후보(shortlist)만
+원본 float32 임베딩(메모리 매핑, 필요할 때만 디스크에서 읽음)으로 다시 점수를 매깁니다.
+
+    float16   청크당 2 * dim 바이트
+    int8      청크당 dim + 4 바이트 (벡터별 scale 하나)
+
+NumPy에는 저정밀도 행렬곱이 없어 근사 점수는 블록별로 float32로 변환해 계산합니다.
+int8 변환은 빠르지만 float16 변환은 CPU에 따라 느릴 수 있으므로, 전체 검색에는 int8을,
+float16은 IVF 인덱스와 함께(후보만 채점) 쓰는 것을 권장합니다.
+
+인덱스 디렉토리 안에 다음 파일로 저장됩니다.
+
+    embeddings_f16.npy     float16 임베딩
+    embeddings_int8.npy    int8 임베딩
+    int8_scales.npy        int8 임베딩의 벡터별 scale (float32)
+
+양자화 파일은 오프라인에서 만듭니다. (앱은 인덱스 디렉토리에 쓰지 않음)
+    python quantization.py [인덱스 디렉토리] [float16|int8]
+"""
+
+import os
+import sys
+import numpy as np
+from vector_store import read_header, write_header, EMBEDDINGS_FILE
+
+STORAGE_MODES = ("float32", "float16", "int8")
+
+FLOAT16_FILE = "embeddings_f16.npy"
+INT8_FILE = "embeddings_int8.npy"
+INT8_SCALES_FILE = "int8_scales.npy"
+
+QUANTIZE_BLOCK_ROWS = 16384  # 양자화 시 한 번에 읽을 행 수
+SCORE_BLOCK_ROWS = 1024  # 점수 계산 시 한 번에 float32로 바꿀 행 수 (캐시에 들어가는 크기)
+
+def _score_blocks(vectors, query, ids=None, scales=None):
+    """작은 블록 단위로 float32 버퍼에 변환한 뒤 내적을 계산합니다."""
+    n_rows = len(ids) if ids is not None else vectors.shape[0]
+    scores = np.empty(n_rows, dtype=np.float32)
+    buffer = np.empty((min(n_rows, SCORE_BLOCK_ROWS), vectors.shape[1]), dtype=np.float32)
+    for start in range(0, n_rows, SCORE_BLOCK_ROWS):
+        rows = ids[start:start + SCORE_BLOCK_ROWS] if ids is not None else slice(start, start + SCORE_BLOCK_ROWS)
+        block = vectors[rows]
+        converted = buffer[:len(block)]
+        np.copyto(converted, block, casting='unsafe')
+        block_scores = scores[start:start + len(block)]
+        np.matmul(converted, query, out=block_scores)
+        if scales is not None:
+            block_scores *= scales[rows]
+    return scores
+
+class Float16Vectors:
+    """float16으로 저장된 임베딩"""
+    mode = "float16"
+
+    def __init__(self, vectors):
+        self.vectors = vectors
+
+    @classmethod
+    def from_matrix(cls, matrix):
+        return cls(np.asarray(matrix, dtype=np.float16))
+
+    @property
+    def nbytes(self):
+        return self.vectors.nbytes
+
+    def score(self, query, ids=None):
+        """근사 점수 (ids가 주어지면 해당 행만)"""
+        return _score_blocks(self.vectors, query, ids)
+
+    def save(self, index_dir):
+        np.save(os.path.join(index_dir, FLOAT16_FILE), self.vectors)
+
+    @classmethod
+    def load(cls, index_dir):
+        return cls(np.load(os.path.join(index_dir, FLOAT16_FILE)))
+
+class Int8Vectors:
+    """벡터별 scale을 갖는 int8 스칼라 양자화 임베딩"""
+    mode = "int8"
+
+    def __init__(self, codes, scales):
+        self.codes = codes
+        self.scales = scales
+
+    @classmethod
+    def from_matrix(cls, matrix):
+        codes = np.empty(matrix.shape, dtype=np.int8)
+        scales = np.empty(matrix.shape[0], dtype=np.float32)
+        for start in range(0, matrix.shape[0], QUANTIZE_BLOCK_ROWS):
+            block = np.asarray(matrix[start:start + QUANTIZE_BLOCK_ROWS], dtype=np.float32)
+            block_scales = np.abs(block).max(axis=1) / 127.0
+            block_scales[block_scales == 0] = 1.0
+            codes[start:start + len(block)] = np.clip(np.rint(block / block_scales[:, None]), -127, 127)
+            scales[start:start + len(block)] = block_scales
+        return cls(codes, scales)
+
+    @property
+    def nbytes(self):
+        return self.codes.nbytes + self.scales.nbytes
+
+    def score(self, query, ids=None):
+        """근사 점수 (ids가 주어지면 해당 행만)"""
+        return _score_blocks(self.codes, query, ids, scales=self.scales)
+
+    def save(self, index_dir):
+        np.save(os.path.join(index_dir, INT8_FILE), self.codes)
+        np.save(os.path.join(index_dir, INT8_SCALES_FILE), self.scales)
+
+    @classmethod
+    def load(cls, index_dir):
+        return cls(np.load(os.path.join(index_dir, INT8_FILE)), np.load(os.path.join(index_dir, INT8_SCALES_FILE)))
+
+QUANTIZERS = {
+    "float16": Float16Vectors,
+    "int8": Int8Vectors,
+}
+
+def quantize(matrix, mode):
+    """정규화된 float32 행렬을 주어진 저장 방식으로 양자화합니다. (float32이면 None)"""
+    if mode not in STORAGE_MODES:
+        raise ValueError(f"알 수 없는 저장 방식입니다: {mode} (지원: {', '.join(STORAGE_MODES)})")
+    if mode == "float32":
+        return None
+    return QUANTIZERS[mode].from_matrix(matrix)
+
+def save_quantized(index_dir, quantized):
+    """양자화된 임베딩을 인덱스 디렉토리에 저장하고 헤더에 기록합니다."""
+    quantized.save(index_dir)
+    header = read_header(index_dir)
+    modes = set(header.get("quantized", []))
+    modes.add(quantized.mode)
+    header["quantized"] = sorted(modes)
+    write_header(index_dir, header)
+
+def load_quantized(index_dir, mode):
+    """인덱스 디렉토리에서 양자화된 임베딩을 로드합니다. (없으면 None)"""
+    if mode == "float32" or mode not in read_header(index_dir).get("quantized", []):
+        return None
+    return QUANTIZERS[mode].load(index_dir)
+
+def build_quantized(index_dir, mode):
+    """벡터 인덱스 디렉토리의 임베딩을 양자화해 같은 디렉토리에 저장합니다."""
+    matrix = np.load(os.path.join(index_dir, EMBEDDINGS_FILE), mmap_mode='r')
+    print(f"양자화 임베딩({mode}) 생성 중: {index_dir} (청크 수: {matrix.shape[0]})")
+    quantized = quantize(matrix, mode)
+    if quantized is None:
+        print("float32는 양자화 파일이 필요 없습니다.")
+        return None
+    save_quantized(index_dir, quantized)
+    print(f"양자화 임베딩({mode}) 저장 완료")
+    return quantized
+
+if __name__ == "__main__":
+    target_dir = sys.argv[1] if len(sys.argv) > 1 else "vector_index_merged"
+    target_mode = sys.argv[2] if len(sys.argv) > 2 else "int8"
+    build_quantized(target_dir, target_mode)
@@ -0,0 +1,327 @@
+"""
+RAG 채팅방 안내 문구 (다국어)
+
+채팅방 화면(pages/chat_room.py)과 FAQ 답변 미리 만들기(faq_bank.py)가 함께 사용합니다.
+"""
+
+# RAG 가이드 텍스트 다국어 사전 (상세 구조)
+RAG_GUIDE_TEXTS = {
+    "ko": {
+        "title": "다문화가족 한국생활안내",
+        "info": "다음과 같은 정보를 질문할 수 있습니다:",
+        "items": [
+            "🏥 병원, 약국 이용 방법",
+            "🏦 은행, 우체국, 관공서 이용",
+            "🚌 교통수단 이용 (버스, 지하철, 기차)",
+            "🚗 운전면허, 자가용, 택시 이용",
+            "🏠 집 구하기",
+            "📱 핸드폰 사용하기",
+            "🗑️ 쓰레기 버리기 (종량제, 분리배출)",
+            "🆔 외국인등록증 신청, 체류기간 연장"
+        ],
+        "example_title": "질문 예시:",
+        "examples": [
+            "• 외국인등록을 하려면 어디로 가요?",
+            "• 대한민국에서 더 살게 됐는데 어떡하죠?",
+            "• 외국인은 핸드폰을 어떻게 사용하나요?",
+            "• 전셋집이 뭐예요?",
+            "• 공인중개사무소가 뭐죠?",
+            "• 집 계약서는 어떻게 쓰면 되나요?",
+            "• 대한민국 운전면허증을 받는 과정은?",
+            "• 쓰레기 봉투는 어디서 사나요?",
+            "• 쓰레기 버리는 방법은요?",
+            "• 몸이 아픈데 어떡하죠?",
+            "• 병원에 갈 때 필요한 건강보험증이 뭐죠?",
+            "• 한의원은 일반병원과 다른가요?",
+            "• 처방전이 없는데 어떻게 하나요?",
+            "• 은행계좌는 어떻게 만들어요?",
+            "• 외국에 물건을 보내고 싶은데 어떻게 하죠?",
+            "• 24시간 콜센터 번호는 어떻게 되죠?",
+            "• 긴급전화 번호는 뭐에요?",
+            "• 한국어를 배울 수 있는 방법은요?"
+        ],
+        "input_hint": "아래에 질문을 입력해보세요! 💬"
+    },
+    "en": {
+        "title": "Korean Life Guide for Multicultural Families",
+        "info": "You can ask about the following topics:",
+        "items": [
+            "🏥 How to use hospitals and pharmacies",
+            "🏦 How to use banks, post offices, government offices",
+            "🚌 How to use public transport (bus, subway, train)",
+            "🚗 Driver's license, private car, taxi",
+            "🏠 Finding a house",
+            "📱 Using a mobile phone",
+            "🗑️ How to dispose of trash (volume-based, recycling)",
+            "🆔 Alien registration, extension of stay"
+        ],
+        "example_title": "Example questions:",
+        "examples": [
+            "• Where do I go to register as a foreigner?",
+            "• I need to stay longer in Korea, what should I do?",
+            "• How do foreigners use mobile phones?",
+            "• What is jeonse (deposit-based housing)?",
+            "• What is a real estate agency?",
+            "• How do I write a housing contract?",
+            "• What is the process for getting a Korean driver's license?",
+            "• Where do I buy trash bags?",
+            "• How do I dispose of trash?",
+            "• I'm sick, what should I do?",
+            "• What is health insurance card needed for hospitals?",
+            "• Is oriental medicine different from regular hospitals?",
+            "• What if I don't have a prescription?",
+            "• How do I open a bank account?",
+            "• How do I send things abroad?",
+            "• What are the 24-hour call center numbers?",
+            "• What are the emergency numbers?",
+            "• How can I learn Korean?"
+        ],
+        "input_hint": "Type your question below! 💬"
+    },
+    "ja": {
+        "title": "多文化家族のための韓国生活ガイド",
+        "info": "以下のトピックについて質問できます:",
+        "items": [
+            "🏥 病院、薬局の利用方法",
+            "🏦 銀行、郵便局、政府機関の利用",
+            "🚌 公共交通機関の利用（バス、地下鉄、電車）",
+            "🚗 運転免許、自家用車、タクシー",
+            "🏠 家探し",
+            "📱 携帯電話の使用",
+            "🗑️ ゴミの捨て方（従量制、リサイクル）",
+            "🆔 外国人登録、滞在期間延長"
+        ],
+        "example_title": "質問例:",
+        "examples": [
+            "• 外国人登録はどこで行いますか？",
+            "• 韓国でより長く滞在する必要がありますが、どうすればいいですか？",
+            "• 外国人は携帯電話をどのように使用しますか？",
+            "• 全税（保証金ベースの住宅）とは何ですか？",
+            "• 不動産会社とは何ですか？",
+            "• 住宅契約書はどのように書けばいいですか？",
+            "• 韓国の運転免許を取得する手続きは？",
+            "• ゴミ袋はどこで買えますか？",
+            "• ゴミの捨て方は？",
+            "• 体調が悪いのですが、どうすればいいですか？",
+            "• 病院に行く際に必要な健康保険証とは？",
+            "• 韓医院は一般병원と違いますか？",
+            "• 処方箋がない場合はどうすればいいですか？",
+            "• 銀行口座はどのように開設しますか？",
+            "• 海外に物を送りたいのですが、どうすればいいですか？",
+            "• 24時間コールセンターの番号は？",
+            "• 緊急전화番号は何ですか？",
+            "• 韓国語を学ぶ方法は？"
+        ],
+        "input_hint": "下に質問を入力してください！💬"
+    },
+    "zh": {
+        "title": "多元文化家庭韩国生活指南",
+        "info": "您可以询问以下主题:",
+        "items": [
+            "🏥 如何使用医院和药房",
+            "🏦 如何使用银行、邮局、政府机关",
+            "🚌 如何使用公共交通（公交车、地铁、火车）",
+            "🚗 驾照、私家车、出租车",
+            "🏠 找房子",
+            "📱 使用手机",
+            "🗑️ 如何丢弃垃圾（按量收费、回收）",
+            "🆔 外国人登记、延长停留时间"
+        ],
+        "example_title": "问题示例:",
+        "examples": [
+            "• 我要去哪里办理外国人登记？",
+            "• 我需要在韩国停留更久，该怎么办？",
+            "• 外国人如何使用手机？",
+            "• 什么是全租房？",
+            "• 什么是房地产中介？",
+            "• 我该如何写房屋合约？",
+            "• 取得韩国驾照的流程是什么？",
+            "• 我在哪里买垃圾袋？",
+            "• 我该如何丢垃圾？",
+            "• 我生病了该怎么办？",
+            "• 去医院需要的健康保险卡是什么？",
+            "• 韩医院和一般医院有什麽不同？",
+            "• 如果没有处方怎么办？",
+            "• 我该如何开银行账户？",
+            "• 我该如何寄东西到国外？",
+            "• 24小时客服电话是多少？",
+            "• 紧急电话号码是什么？",
+            "• 我该如何学韩文？"
+        ],
+        "input_hint": "请在下方输入您的问题！💬"
+    },
+    "zh-TW": {
+        "title": "多元文化家庭韓國生活指南",
+        "info": "您可以詢問以下主題:",
+        "items": [
+            "🏥 如何使用醫院和藥局",
+            "🏦 如何使用銀行、郵局、政府機關",
+            "🚌 如何搭乘大眾運輸（公車、地鐵、火車）",
+            "🚗 駕照、私家車、計程車",
+            "🏠 找房子",
+            "📱 使用手機",
+            "🗑️ 如何丟垃圾（按量收費、回收）",
+            "🆔 外國人登記、延長停留時間"
+        ],
+        "example_title": "問題範例:",
+        "examples": [
+            "• 我要去哪裡辦理外國人登記？",
+            "• 我需要在韓國停留更久，該怎麼辦？",
+            "• 外國人如何使用手機？",
+            "• 什麼是全租房？",
+            "• 什麼是房地產仲介？",
+            "• 我該如何寫房屋合約？",
+            "• 取得韓國駕照的流程是什麼？",
+            "• 我在哪裡買垃圾袋？",
+            "• 我該如何丟垃圾？",
+            "• 我生病了該怎麼辦？",
+            "• 去醫院需要的健康保險卡是什麼？",
+            "• 韓醫院和一般醫院有什麼不同？",
+            "• 如果沒有處方怎麼辦？",
+            "• 我該如何開銀行帳戶？",
+            "• 我該如何寄東西到國外？",
+            "• 24小時客服電話是多少？",
+            "• 緊急電話號碼是什麼？",
+            "• 我該如何學韓文？"
+        ],
+        "input_hint": "請在下方輸入您的問題！💬"
+    },
+    "id": {
+        "title": "Panduan Hidup di Korea untuk Keluarga Multikultural",
+        "info": "Anda dapat bertanya tentang topik berikut:",
+        "items": [
+            "🏥 Cara menggunakan rumah sakit dan apotek",
+            "🏦 Cara menggunakan bank, kantor pos, kantor pemerintah",
+            "🚌 Cara menggunakan transportasi umum (bus, subway, kereta)",
+            "🚗 SIM, mobil pribadi, taksi",
+            "🏠 Mencari rumah",
+            "📱 Menggunakan ponsel",
+            "🗑️ Cara membuang sampah (berdasarkan volume, daur ulang)",
+            "🆔 Pendaftaran orang asing, perpanjangan masa tinggal"
+        ],
+        "example_title": "Contoh pertanyaan:",
+        "examples": [
+            "• Ke mana saya harus pergi untuk mendaftar sebagai orang asing?",
+            "• Saya perlu tinggal lebih lama di Korea, apa yang harus saya lakukan?",
+            "• Bagaimana orang asing menggunakan ponsel?",
+            "• Apa itu jeonse (rumah sewa deposit)?",
+            "• Apa itu agen real estat?",
+            "• Bagaimana cara menulis kontrak rumah?",
+            "• Apa proses mendapatkan SIM Korea?",
+            "• Di mana saya membeli kantong sampah?",
+            "• Bagaimana cara membuang sampah?",
+            "• Saya sakit, apa yang harus saya lakukan?",
+            "• Apa itu kartu asuransi kesehatan untuk rumah sakit?",
+            "• Apakah pengobatan oriental berbeda dengan rumah sakit biasa?",
+            "• Bagaimana jika saya tidak punya resep?",
+            "• Bagaimana cara membuka rekening bank?",
+            "• Bagaimana cara mengirim barang ke luar negeri?",
+            "• Berapa nomor call center 24 jam?",
+            "• Berapa nomor darurat?",
+            "• Bagaimana cara belajar bahasa Korea?"
+        ],
+        "input_hint": "Tulis pertanyaan Anda di bawah ini! 💬"
+    },
+    "vi": {
+        "title": "Hướng dẫn cuộc sống Hàn Quốc cho gia đình đa văn hóa",
+        "info": "Bạn có thể hỏi về các chủ đề sau:",
+        "items": [
+            "🏥 Cách sử dụng bệnh viện và nhà thuốc",
+            "🏦 Cách sử dụng ngân hàng, bưu điện, cơ quan chính phủ",
+            "🚌 Cách sử dụng phương tiện công cộng (xe buýt, tàu điện ngầm, tàu)",
+            "🚗 Bằng lái xe, xe riêng, taxi",
+            "🏠 Tìm nhà",
+            "📱 Sử dụng điện thoại di động",
+            "🗑️ Cách vứt rác (theo thể tích, tái chế)",
+            "🆔 Đăng ký người nước ngoài, gia hạn thời gian lưu trú"
+        ],
+        "example_title": "Ví dụ câu hỏi:",
+        "examples": [
+            "• Tôi đi đâu để đăng ký người nước ngoài?",
+            "• Tôi cần ở lại Hàn Quốc lâu hơn, tôi nên làm gì?",
+            "• Người nước ngoài sử dụng điện thoại di động như thế nào?",
+            "• Jeonse (nhà ở theo tiền đặt cọc) là gì?",
+            "• Công ty bất động sản là gì?",
+            "• Tôi viết hợp đồng nhà như thế nào?",
+            "• Quy trình lấy bằng lái xe Hàn Quốc là gì?",
+            "• Tôi mua túi rác ở đâu?",
+            "• Tôi vứt rác như thế nào?",
+            "• Tôi bị bệnh, tôi nên làm gì?",
+            "• Thẻ bảo hiểm y tế cần thiết cho bệnh viện là gì?",
+            "• Y học cổ truyền có khác với bệnh viện thường không?",
+            "• Nếu tôi không có đơn thuốc thì sao?",
+            "• Tôi mở tài khoản ngân hàng như thế nào?",
+            "• Tôi gửi đồ ra nước ngoài như thế nào?",
+            "• Số điện thoại trung tâm cuộc gọi 24 giờ là gì?",
+            "• Số điện thoại khẩn cấp là gì?",
+            "• Tôi có thể học tiếng Hàn như thế nào?"
+        ],
+        "input_hint": "Nhập câu hỏi của bạn bên dưới! 💬"
+    },
+    "fr": {
+        "title": "Guide de vie en Corée pour familles multiculturelles",
+        "info": "Vous pouvez poser des questions sur les sujets suivants :",
+        "items": [
+            "🏥 Comment utiliser les hôpitaux et pharmacies",
+            "🏦 Comment utiliser les banques, bureaux de poste, bureaux gouvernementaux",
+            "🚌 Comment utiliser les transports publics (bus, métro, train)",
+            "🚗 Permis de conduire, voiture privée, taxi",
+            "🏠 Trouver une maison",
+            "📱 Utiliser un téléphone portable",
+            "🗑️ Comment jeter les déchets (basé sur le volume, recyclage)",
+            "🆔 Enregistrement des étrangers, prolongation du séjour"
+        ],
+        "example_title": "Exemples de questions :",
+        "examples": [
+            "• Comment inscrire mon enfant à l'école coréenne ?",
+            "• Comment demander l'assurance maladie coréenne ?",
+            "• Parlez-moi de la culture culinaire coréenne",
+            "• Comment utiliser les transports publics coréens ?"
+        ],
+        "input_hint": "Tapez votre question ci-dessous ! 💬"
+    },
+    "de": {
+        "title": "Leitfaden für das Leben in Korea für multikulturelle Familien",
+        "info": "Sie können Fragen zu folgenden Themen stellen:",
+        "items": [
+            "🏥 Wie man Krankenhäuser und Apotheken nutzt",
+            "🏦 Wie man Banken, Postämter, Regierungsbüros nutzt",
+            "🚌 Wie man öffentliche Verkehrsmittel nutzt (Bus, U-Bahn, Zug)",
+            "🚗 Führerschein, Privatauto, Taxi",
+            "🏠 Haus finden",
+            "📱 Mobiltelefon nutzen",
+            "🗑️ Wie man Müll entsorgt (volumenbasiert, Recycling)",
+            "🆔 Ausländerregistrierung, Aufenthaltsverlängerung"
+        ],
+        "example_title": "Beispielfragen:",
+        "examples": [
+            "• Wie melde ich mein Kind in einer koreanischen Schule an?",
+            "• Wie beantrage ich koreanische Krankenversicherung?",
+            "• Erzählen Sie mir von der koreanischen Esskultur",
+            "• Wie benutze ich koreanische öffentliche Verkehrsmittel?"
+        ],
+        "input_hint": "Geben Sie Ihre Frage unten ein! 💬"
+    },
+    "th": {
+        "title": "คู่มือการใช้ชีวิตในเกาหลีสำหรับครอบครัวพหุวัฒนธรรม",
+        "info": "คุณสามารถถามเกี่ยวกับหัวข้อต่อไปนี้:",
+        "items": [
+            "🏥 วิธีใช้โรงพยาบาลและร้านขายยา",
+            "🏦 วิธีใช้ธนาคาร ที่ทำการไปรษณีย์ สำนักงานรัฐบาล",
+            "🚌 วิธีใช้ระบบขนส่งสาธารณะ (รถบัส รถไฟใต้ดิน รถไฟ)",
+            "🚗 ใบขับขี่ รถส่วนตัว แท็กซี่",
+            "🏠 หาบ้าน",
+            "📱 ใช้โทรศัพท์มือถือ",
+            "🗑️ วิธีทิ้งขยะ (ตามปริมาณ การรีไซเคิล)",
+            "🆔 การลงทะเบียนชาวต่างชาติ การขยายเวลาพำนัก"
+        ],
+        "example_title": "ตัวอย่างคำถาม:",
+        "examples": [
+            "• ฉันจะลงทะเบียนลูกในโรงเรียนเกาหลีได้อย่างไร?",
+            "• ฉันจะสมัครประกันสุขภาพเกาหลีได้อย่างไร?",
+            "• บอกฉันเกี่ยวกับวัฒนธรรมอาหารเกาหลี",
+            "• ฉันจะใช้ระบบขนส่งสาธารณะของเกาหลีได้อย่างไร?"
+        ],
+        "input_hint": "พิมพ์คำถามของคุณด้านล่าง! 💬"
+    }
+}
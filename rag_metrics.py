@@ -0,0 +1,216 @@
+"""
+RAG 단계별 지연시간/토큰 측정과 로그
+
+요청 하나(RequestTrace) 안에서 단계마다 span을 열어 걸린 시간과 토큰 수를 기록합니다.
+
+    trace = RequestTrace("answer")
+    with trace.span("vector_scoring"):
+        ...
+    with trace.span("llm_call") as span:
+        ...
+        span.tokens_in, span.tokens_out = usage.prompt_tokens, usage.completion_tokens
+    trace.finish("llm")
+
+- 단계별 지연시간은 고정 구간(ms) 히스토그램으로 모아 p50/p95/p99를 계산합니다. (요청 수와 관계없이 메모리 일정)
+- 단계: detect_language, faq_lookup, embed_query, answer_cache, vector_scoring, context_build,
+        llm_call, llm_first_token(스트리밍 첫 토큰), postprocess, total
+  (질문 임베딩은 어디서 만들든 embed_query, 스트리밍 llm_call은 마지막 청크를 받을 때까지이며 화면 갱신 시간은 제외)
+- 로그는 "rag" 로거로 남깁니다. 단계 세부 내용은 DEBUG, 요청마다 한 줄 요약은 INFO
+  (RAG_LOG_LEVEL 환경변수, 기본 INFO)
+- get_rag_metrics() / print_rag_metrics()로 단계별 통계를 확인합니다.
+  요청 RAG_METRICS_REPORT_EVERY개(기본 100)마다 단계별 p50/p95를 INFO 로그로 남깁니다.
+"""
+
+import os
+import sys
+import time
+import uuid
+import logging
+import threading
+from contextlib import contextmanager
+
+RAG_LOG_LEVEL = os.getenv("RAG_LOG_LEVEL", "INFO").upper()
+RAG_METRICS_REPORT_EVERY = int(os.getenv("RAG_METRICS_REPORT_EVERY", "100"))  # 요청 N개마다 단계별 p50/p95 로그 (0이면 끔)
+
+# 히스토그램 구간 상한(ms), 마지막은 그 이상 전부
+LATENCY_BUCKETS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 300, 500, 750, 1000, 1500, 2000, 3000, 5000, 10000, 30000, float("inf"))
+
+def _make_logger():
+    logger = logging.getLogger("rag")
+    if not logger.handlers:
+        handler = logging.StreamHandler(sys.stdout)
+        handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s rag: %(message)s"))
+        logger.addHandler(handler)
+        logger.propagate = False
+    logger.setLevel(getattr(logging, RAG_LOG_LEVEL, logging.INFO))
+    return logger
+
+logger = _make_logger()
+
+def log_event(level, message, **fields):
+    """메시지와 key=value 필드를 한 줄로 기록합니다. (레벨이 꺼져 있으면 문자열도 만들지 않음)"""
+    if not logger.isEnabledFor(level):
+        return
+    if fields:
+        message = f"{message} | " + " ".join(f"{key}={value}" for key, value in fields.items())
+    logger.log(level, message)
+
+class LatencyHistogram:
+    """고정 구간 지연시간 히스토그램"""
+    def __init__(self, buckets=LATENCY_BUCKETS_MS):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    def observe(self, ms):
+        for i, upper in enumerate(self.buckets):
+            if ms <= upper:
+                self.counts[i] += 1
+                break
+        self.count += 1
+        self.total_ms += ms
+        self.max_ms = max(self.max_ms, ms)
+
+    def percentile(self, p):
+        """p 백분위수가 들어 있는 구간의 상한(ms)을 반환합니다. (마지막 구간이면 최댓값)"""
+        if not self.count:
+            return 0.0
+        target = self.count * p / 100
+        seen = 0
+        for upper, count in zip(self.buckets, self.counts):
+            seen += count
+            if seen >= target:
+                return min(upper, self.max_ms)
+        return self.max_ms
+
+class StageStats:
+    """단계 하나의 누적 통계"""
+    def __init__(self):
+        self.histogram = LatencyHistogram()
+        self.errors = 0
+        self.tokens_in = 0
+        self.tokens_out = 0
+
+    def to_dict(self):
+        histogram = self.histogram
+        return {
+            "count": histogram.count,
+            "errors": self.errors,
+            "avg_ms": histogram.total_ms / histogram.count if histogram.count else 0.0,
+            "p50_ms": histogram.percentile(50),
+            "p95_ms": histogram.percentile(95),
+            "p99_ms": histogram.percentile(99),
+            "max_ms": histogram.max_ms,
+            "tokens_in": self.tokens_in,
+            "tokens_out": self.tokens_out,
+        }
+
+_stages = {}
+_outcomes = {}
+_stages_lock = threading.Lock()
+
+def record_stage(name, ms, tokens_in=0, tokens_out=0, error=False):
+    """단계 하나의 측정값을 누적합니다."""
+    with _stages_lock:
+        stats = _stages.get(name)
+        if stats is None:
+            stats = _stages[name] = StageStats()
+        stats.histogram.observe(ms)
+        stats.tokens_in += tokens_in
+        stats.tokens_out += tokens_out
+        if error:
+            stats.errors += 1
+
+class Span:
+    """측정 중인 단계 (토큰 수는 with 블록 안에서 채움)"""
+    def __init__(self, name):
+        self.name = name
+        self.tokens_in = 0
+        self.tokens_out = 0
+        self.ms = 0.0
+        self.error = False
+
+class RequestTrace:
+    """RAG 요청 하나의 단계별 측정"""
+    def __init__(self, operation):
+        self.id = uuid.uuid4().hex[:8]
+        self.operation = operation
+        self.start = time.perf_counter()
+        self.spans = []
+
+    @contextmanager
+    def span(self, name):
+        span = Span(name)
+        start = time.perf_counter()
+        try:
+            yield span
+        except BaseException:
+            span.error = True
+            raise
+        finally:
+            span.ms = (time.perf_counter() - start) * 1000
+            self.add_span(span)
+
+    def add_span(self, span):
+        """호출한 쪽에서 시간을 잰 단계를 기록합니다. (예: 화면 갱신 시간을 뺀 스트리밍 호출)"""
+        self.spans.append(span)
+        record_stage(span.name, span.ms, span.tokens_in, span.tokens_out, span.error)
+        log_event(logging.DEBUG, "단계 완료", request=self.id, stage=span.name, ms=f"{span.ms:.1f}",
+                  tokens_in=span.tokens_in, tokens_out=span.tokens_out)
+
+    def mark(self, name):
+        """요청 시작부터 지금까지의 시간을 단계로 기록합니다. (예: 스트리밍 첫 토큰)"""
+        ms = (time.perf_counter() - self.start) * 1000
+        record_stage(name, ms)
+        return ms
+
+    def debug(self, message, **fields):
+        log_event(logging.DEBUG, message, request=self.id, **fields)
+
+    def finish(self, outcome):
+        """요청을 마치고 전체 시간과 결과(outcome: llm, faq, cache, no_chunks, error, abandoned 등)를 기록합니다."""
+        total_ms = (time.perf_counter() - self.start) * 1000
+        record_stage("total", total_ms)
+        with _stages_lock:
+            _outcomes[outcome] = _outcomes.get(outcome, 0) + 1
+            requests = sum(_outcomes.values())
+        stages = " ".join(f"{span.name}:{span.ms:.0f}" for span in self.spans)
+        log_event(logging.INFO, "RAG 요청", request=self.id, op=self.operation, outcome=outcome,
+                  total_ms=f"{total_ms:.0f}", tokens_in=sum(span.tokens_in for span in self.spans),
+                  tokens_out=sum(span.tokens_out for span in self.spans), stages=stages)
+        if RAG_METRICS_REPORT_EVERY and requests % RAG_METRICS_REPORT_EVERY == 0:
+            log_metrics_summary()
+        return total_ms
+
+def get_rag_metrics():
+    """단계별 통계와 결과별 요청 수를 반환합니다."""
+    with _stages_lock:
+        return {
+            "stages": {name: stats.to_dict() for name, stats in _stages.items()},
+            "outcomes": dict(_outcomes),
+        }
+
+def reset_rag_metrics():
+    """누적 통계를 비웁니다."""
+    with _stages_lock:
+        _stages.clear()
+        _outcomes.clear()
+
+def log_metrics_summary():
+    """단계별 p50/p95(ms)를 INFO 로그 한 줄로 남깁니다."""
+    metrics = get_rag_metrics()
+    stages = " ".join(f"{name}:{stats['p50_ms']:.0f}/{stats['p95_ms']:.0f}" for name, stats in metrics["stages"].items())
+    outcomes = ",".join(f"{outcome}:{count}" for outcome, count in metrics["outcomes"].items())
+    log_event(logging.INFO, "RAG 단계별 지연시간 p50/p95(ms)", stages=stages, outcomes=outcomes)
+
+def print_rag_metrics():
+    """단계별 지연시간 표를 출력합니다."""
+    metrics = get_rag_metrics()
+    print(f"{'단계':<16} | {'횟수':>6} | {'평균(ms)':>9} | {'p50':>7} | {'p95':>7} | {'p99':>7} | {'입력 토큰':>9} | {'출력 토큰':>9}")
+    for name, stats in metrics["stages"].items():
+        print(f"{name:<16} | {stats['count']:>6} | {stats['avg_ms']:>9.1f} | {stats['p50_ms']:>7.0f} | "
+              f"{stats['p95_ms']:>7.0f} | {stats['p99_ms']:>7.0f} | {stats['tokens_in']:>9} | {stats['tokens_out']:>9}")
+    if metrics["outcomes"]:
+        print("결과: " + ", ".join(f"{outcome} {count}" for outcome, count in metrics["outcomes"].items()))
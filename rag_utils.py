@@ -6,11 +6,41 @@ import numpy as np
 import re
 import openai
 import shutil
-from pypdf import PdfReader
+import time
+import random
+import logging
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from vector_store import is_vector_index, open_vector_index, write_vector_index, index_size_bytes
+from ingest_manifest import load_manifest, save_manifest, plan_update, make_chunk_id, file_signature, signature_matches
+from pdf_extract import iter_pdf_pages
+from chunking import chunk_pages, CHUNK_MAX_TOKENS, CHUNK_OVERLAP_TOKENS
+from ann_index import IVFIndex
+from quantization import quantize, load_quantized
+from lexical_index import BM25Index, reciprocal_rank_fusion, top_lexical_hits
+from embedding_cache import get_query_cache, get_embedding_store
+from token_utils import count_tokens_batch, truncate_to_tokens
+from rag_metrics import RequestTrace, Span, log_event
+from relevance import relevance_threshold, select_relevant, RAG_TOP_K
+from context_builder import build_context, RAG_CONTEXT_MAX_TOKENS
+from singleflight import get_singleflight, normalize_key_text, FlightAbandoned
+from openai_client import get_openai_client, get_pool_stats, request_timeout, CHAT_TIMEOUT, EMBEDDING_TIMEOUT
 
 PDF_PATH = "pdf/ban.pdf"
-VECTOR_DB_PATH = "vector_db.pkl"
+VECTOR_DB_PATH = "vector_db.pkl"  # 예전 pickle 형식 (변환용)
+VECTOR_INDEX_DIR = "vector_index"
+VECTOR_INDEX_MULTI_DIR = "vector_index_multi"
+VECTOR_INDEX_MERGED_DIR = "vector_index_merged"
 CACHE_INFO_PATH = "cache_info.json"
+EMBEDDING_MODEL = "text-embedding-3-small"
+
+# 문서 임베딩 요청 설정 (API 제한: 입력당 8,191토큰, 요청당 2,048개/300,000토큰)
+EMBED_MAX_INPUT_TOKENS = 8191
+EMBED_MAX_BATCH_INPUTS = 2048
+EMBED_MAX_BATCH_TOKENS = 250_000
+EMBED_CONCURRENCY = int(os.getenv("EMBED_CONCURRENCY", "4"))
+EMBED_MAX_RETRIES = 6
+EMBED_BACKOFF_BASE = 1.0  # 초, 재시도마다 2배
+EMBED_BACKOFF_MAX = 60.0
 
 # 언어 감지 함수
 def detect_language(text):
@@ -123,7 +153,8 @@ ERROR_MESSAGES = {
         'auth_error': 'OpenAI API 인증에 실패했습니다. API Key를 확인해주세요.',
         'rate_limit': 'OpenAI API 요청 제한에 도달했습니다. 잠시 후 다시 시도해주세요.',
         'api_error': 'OpenAI API 오류가 발생했습니다: {error}',
-        'unknown_error': '답변 생성 중 오류가 발생했습니다: {error}'
+        'unknown_error': '답변 생성 중 오류가 발생했습니다: {error}',
+        'warming_up': '안내 자료를 불러오는 중입니다. 잠시 후 다시 질문해주세요.'
     },
     'en': {
         'no_chunks': 'No relevant information found in the reference.',
@@ -131,7 +162,8 @@ ERROR_MESSAGES = {
         'auth_error': 'OpenAI API authentication failed. Please check your API Key.',
         'rate_limit': 'OpenAI API rate limit reached. Please try again later.',
         'api_error': 'OpenAI API error occurred: {error}',
-        'unknown_error': 'An error occurred while generating response: {error}'
+        'unknown_error': 'An error occurred while generating response: {error}',
+        'warming_up': 'The guide is still loading. Please ask again in a moment.'
     },
     'ja': {
         'no_chunks': '参考情報に関連する内容が見つかりません。',
@@ -139,7 +171,8 @@ ERROR_MESSAGES = {
         'auth_error': 'OpenAI API認証に失敗しました。API Keyを確認してください。',
         'rate_limit': 'OpenAI APIリクエスト制限に達しました。しばらくしてから再試行してください。',
         'api_error': 'OpenAI APIエラーが発生しました: {error}',
-        'unknown_error': '回答生成中にエラーが発生しました: {error}'
+        'unknown_error': '回答生成中にエラーが発生しました: {error}',
+        'warming_up': '案内資料を読み込み中です。しばらくしてからもう一度質問してください。'
     },
     'zh': {
         'no_chunks': '在参考信息中找不到相关内容。',
@@ -147,7 +180,8 @@ ERROR_MESSAGES = {
         'auth_error': 'OpenAI API认证失败。请检查您的API密钥。',
         'rate_limit': '达到OpenAI API请求限制。请稍后重试。',
         'api_error': '发生OpenAI API错误: {error}',
-        'unknown_error': '生成回答时发生错误: {error}'
+        'unknown_error': '生成回答时发生错误: {error}',
+        'warming_up': '正在加载指南资料，请稍后再提问。'
     },
     'vi': {
         'no_chunks': 'Không tìm thấy thông tin liên quan trong tài liệu tham khảo.',
@@ -155,7 +189,8 @@ ERROR_MESSAGES = {
         'auth_error': 'Xác thực OpenAI API thất bại. Vui lòng kiểm tra API Key của bạn.',
         'rate_limit': 'Đã đạt giới hạn yêu cầu OpenAI API. Vui lòng thử lại sau.',
         'api_error': 'Lỗi OpenAI API xảy ra: {error}',
-        'unknown_error': 'Đã xảy ra lỗi khi tạo phản hồi: {error}'
+        'unknown_error': 'Đã xảy ra lỗi khi tạo phản hồi: {error}',
+        'warming_up': 'Tài liệu hướng dẫn đang được tải. Vui lòng hỏi lại sau giây lát.'
     },
     'fr': {
         'no_chunks': 'Aucune information pertinente trouvée dans la référence.',
@@ -163,7 +198,8 @@ ERROR_MESSAGES = {
         'auth_error': 'Échec de l\'authentification OpenAI API. Veuillez vérifier votre clé API.',
         'rate_limit': 'Limite de taux OpenAI API atteinte. Veuillez réessayer plus tard.',
         'api_error': 'Erreur OpenAI API survenue: {error}',
-        'unknown_error': 'Une erreur s\'est produite lors de la génération de la réponse: {error}'
+        'unknown_error': 'Une erreur s\'est produite lors de la génération de la réponse: {error}',
+        'warming_up': 'Le guide est en cours de chargement. Veuillez reposer votre question dans un instant.'
     },
     'de': {
         'no_chunks': 'Keine relevanten Informationen in der Referenz gefunden.',
@@ -171,7 +207,8 @@ ERROR_MESSAGES = {
         'auth_error': 'OpenAI API-Authentifizierung fehlgeschlagen. Bitte überprüfen Sie Ihren API-Schlüssel.',
         'rate_limit': 'OpenAI API-Ratenlimit erreicht. Bitte versuchen Sie es später erneut.',
         'api_error': 'OpenAI API-Fehler aufgetreten: {error}',
-        'unknown_error': 'Fehler bei der Antwortgenerierung aufgetreten: {error}'
+        'unknown_error': 'Fehler bei der Antwortgenerierung aufgetreten: {error}',
+        'warming_up': 'Der Leitfaden wird noch geladen. Bitte fragen Sie gleich noch einmal.'
     },
     'th': {
         'no_chunks': 'ไม่พบข้อมูลที่เกี่ยวข้องในเอกสารอ้างอิง',
@@ -179,24 +216,37 @@ ERROR_MESSAGES = {
         'auth_error': 'การยืนยันตัวตน OpenAI API ล้มเหลว กรุณาตรวจสอบ API Key ของคุณ',
         'rate_limit': 'ถึงขีดจำกัดการร้องขอ OpenAI API แล้ว กรุณาลองใหม่อีกครั้ง',
         'api_error': 'เกิดข้อผิดพลาด OpenAI API: {error}',
-        'unknown_error': 'เกิดข้อผิดพลาดในการสร้างคำตอบ: {error}'
+        'unknown_error': 'เกิดข้อผิดพลาดในการสร้างคำตอบ: {error}',
+        'warming_up': 'กำลังโหลดข้อมูลคู่มือ กรุณาถามใหม่อีกครั้งในอีกสักครู่'
     }
 }
 
+def get_error_message(lang, key, **kwargs):
+    """언어별 안내/오류 메시지를 반환합니다. (없는 언어는 영어)"""
+    message = ERROR_MESSAGES.get(lang, ERROR_MESSAGES['en'])[key]
+    return message.format(**kwargs) if kwargs else message
+
 # 파일 해시 계산 함수
-def calculate_file_hash(file_path):
-    """파일의 MD5 해시를 계산합니다."""
-    hash_md5 = hashlib.md5()
-    with open(file_path, "rb") as f:
-        for chunk in iter(lambda: f.read(4096), b""):
-            hash_md5.update(chunk)
-    return hash_md5.hexdigest()
+FILE_HASH_ALGORITHM = "blake2b"
+HASH_READ_SIZE = 1024 * 1024  # 1MB 단위로 읽음
+
+def calculate_file_hash(file_path, algorithm=FILE_HASH_ALGORITHM):
+    """파일 내용의 해시를 계산합니다. (기본 blake2b)"""
+    digest = hashlib.new(algorithm)
+    buffer = bytearray(HASH_READ_SIZE)
+    view = memoryview(buffer)
+    with open(file_path, "rb", buffering=0) as f:
+        for size in iter(lambda: f.readinto(buffer), 0):
+            digest.update(view[:size])
+    return digest.hexdigest()
 
 # 캐시 정보 저장/로드 함수
 def save_cache_info(file_hash, chunk_count):
     """캐시 정보를 JSON 파일로 저장합니다."""
     cache_info = {
         "file_hash": file_hash,
+        "hash_algorithm": FILE_HASH_ALGORITHM,
+        "signature": file_signature(PDF_PATH),
         "chunk_count": chunk_count,
         "created_at": str(os.path.getctime(PDF_PATH))
     }
@@ -213,83 +263,293 @@ def load_cache_info():
     except (json.JSONDecodeError, FileNotFoundError):
         return None
 
+def validate_cached_file(file_path, cache_info):
+    """PDF 파일이 캐시를 만들 때와 같은지 확인합니다.
+
+    크기/수정 시각/inode가 기록과 같으면 파일을 읽지 않고 유효로 판단하고,
+    다를 때만 전체 해시를 계산해 비교합니다. (내용이 같으면 기록을 갱신해 다음부터 빠른 경로 사용)
+    반환값: {"is_valid", "current_hash", "method": "signature" | "hash", "elapsed_ms"}
+    """
+    start = time.perf_counter()
+    cached_hash = cache_info.get("file_hash", "")
+    signature = file_signature(file_path)
+    if signature_matches(cache_info.get("signature"), signature):
+        is_valid, current_hash, method = True, cached_hash, "signature"
+    else:
+        # 예전 cache_info에는 알고리즘 기록이 없음 (MD5)
+        algorithm = cache_info.get("hash_algorithm", "md5")
+        current_hash = calculate_file_hash(file_path, algorithm)
+        is_valid, method = current_hash == cached_hash, "hash"
+        if is_valid:
+            if algorithm != FILE_HASH_ALGORITHM:
+                current_hash = calculate_file_hash(file_path)
+            save_cache_info(current_hash, cache_info.get("chunk_count"))
+    return {
+        "is_valid": is_valid,
+        "current_hash": current_hash,
+        "method": method,
+        "elapsed_ms": (time.perf_counter() - start) * 1000
+    }
+
+def describe_validation(validation):
+    """파일 확인 방법과 걸린 시간을 출력용 문자열로 만듭니다."""
+    method = "서명 일치, 해시 생략" if validation["method"] == "signature" else "전체 해시 계산"
+    return f"{validation['elapsed_ms']:.1f}ms ({method})"
+
 def is_cache_valid():
-    """현재 PDF 파일의 해시와 캐시된 해시를 비교하여 캐시가 유효한지 확인합니다."""
+    """현재 PDF 파일과 캐시 정보를 비교하여 캐시가 유효한지 확인합니다."""
     if not os.path.exists(PDF_PATH):
         print(f"PDF 파일이 존재하지 않습니다: {PDF_PATH}")
         return False
     
-    if not os.path.exists(VECTOR_DB_PATH):
+    if not is_vector_index(VECTOR_INDEX_DIR) and not os.path.exists(VECTOR_DB_PATH):
         print("벡터DB 파일이 존재하지 않습니다.")
         return False
     
-    current_hash = calculate_file_hash(PDF_PATH)
     cache_info = load_cache_info()
     
     if cache_info is None:
         print("캐시 정보가 없습니다.")
         return False
     
-    if cache_info.get("file_hash") != current_hash:
-        print(f"PDF 파일이 변경되었습니다. (이전 해시: {cache_info.get('file_hash')[:8]}..., 현재 해시: {current_hash[:8]}...)")
+    validation = validate_cached_file(PDF_PATH, cache_info)
+    current_hash = validation["current_hash"]
+    if not validation["is_valid"]:
+        print(f"PDF 파일이 변경되었습니다. (이전 해시: {cache_info.get('file_hash', '')[:8]}..., 현재 해시: {current_hash[:8]}...)")
         return False
     
-    print(f"캐시가 유효합니다. (파일 해시: {current_hash[:8]}...)")
+    print(f"캐시가 유효합니다. (파일 해시: {current_hash[:8]}..., 확인: {describe_validation(validation)})")
     return True
 
-# 1. PDF 청크 분할 함수 (pypdf 사용)
-def chunk_pdf_to_text_chunks(pdf_path, chunk_size=1000, chunk_overlap=100):
+# 1. PDF 청크 분할 함수 (pypdf 사용, 토큰 기준 문장 단위 분할)
+def chunk_pdf_to_text_chunks(pdf_path, max_tokens=CHUNK_MAX_TOKENS, overlap_tokens=CHUNK_OVERLAP_TOKENS):
     """PDF를 텍스트 청크로 분할합니다."""
+    from pypdf import PdfReader  # PDF를 처리할 때만 로드
     reader = PdfReader(pdf_path)
-    text_chunks = []
-    
-    for page_num, page in enumerate(reader.pages):
-        text = page.extract_text()
-        if not text.strip():
-            continue
-            
-        # 텍스트를 청크로 분할
-        words = text.split()
-        current_chunk = ""
-        chunks = []
-        
-        for word in words:
-            if len(current_chunk) + len(word) + 1 <= chunk_size:
-                current_chunk += (word + " ")
-            else:
-                if current_chunk:
-                    chunks.append(current_chunk.strip())
-                current_chunk = word + " "
-        
-        if current_chunk:
-            chunks.append(current_chunk.strip())
-        
-        # 청크 오버랩 처리
-        final_chunks = []
-        for i, chunk in enumerate(chunks):
-            if i > 0 and chunk_overlap > 0:
-                # 이전 청크의 끝 부분을 현재 청크 앞에 추가
-                overlap_text = chunks[i-1][-chunk_overlap:] if len(chunks[i-1]) > chunk_overlap else chunks[i-1]
-                chunk = overlap_text + " " + chunk
-            
-            # Document 객체 대신 딕셔너리 사용
-            final_chunks.append({
-                'page_content': chunk,
-                'metadata': {'page': page_num + 1}
-            })
-        
-        text_chunks.extend(final_chunks)
-    
-    return text_chunks
+    pages = ((page_num + 1, page.extract_text()) for page_num, page in enumerate(reader.pages))
+    return chunk_pages(pages, EMBEDDING_MODEL, max_tokens=max_tokens, overlap_tokens=overlap_tokens)
+
+def chunk_pdfs(pdf_paths, workers=None, max_tokens=CHUNK_MAX_TOKENS, overlap_tokens=CHUNK_OVERLAP_TOKENS):
+    """여러 PDF를 병렬로 추출해 PDF별 (경로, 청크 목록)을 입력 순서대로 반환하는 제너레이터입니다."""
+    for pdf_path, pages in iter_pdf_pages(pdf_paths, workers=workers):
+        yield pdf_path, chunk_pages(pages, EMBEDDING_MODEL, max_tokens=max_tokens, overlap_tokens=overlap_tokens)
+
+# 문서 텍스트 추출 (다양한 형식 지원)
+def get_doc_text(doc):
+    """딕셔너리/Document 객체/문자열 형식의 문서에서 본문 텍스트를 꺼냅니다."""
+    if isinstance(doc, dict) and 'page_content' in doc:
+        # 딕셔너리 형식
+        return doc['page_content']
+    elif hasattr(doc, 'page_content'):
+        # Document 객체 형식
+        return doc.page_content
+    elif isinstance(doc, str):
+        # 문자열 형식
+        return doc
+    # 기타 형식은 문자열로 변환
+    return str(doc)
+
+def normalize_embeddings(vectors):
+    """임베딩을 L2 정규화된 연속(C-contiguous) float32 행렬로 변환합니다."""
+    matrix = np.array(vectors, dtype=np.float32, order='C')
+    if matrix.ndim == 1:
+        matrix = matrix.reshape(1, -1)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    matrix /= norms
+    return matrix
+
+def top_k_indices(scores, k):
+    """점수 배열에서 상위 k개의 인덱스를 내림차순으로 반환합니다 (argpartition 사용)."""
+    n = scores.shape[0]
+    if k <= 0 or n == 0:
+        return np.empty(0, dtype=np.int64)
+    if k >= n:
+        return np.argsort(-scores, kind='stable')
+    candidates = np.argpartition(-scores, k - 1)[:k]
+    return candidates[np.argsort(-scores[candidates], kind='stable')]
+
+def top_k_indices_batch(scores, k):
+    """(쿼리 수 x 문서 수) 점수 행렬에서 행별 상위 k개 인덱스를 내림차순으로 반환합니다."""
+    n = scores.shape[1]
+    k = min(k, n)
+    if k <= 0:
+        return np.empty((scores.shape[0], 0), dtype=np.int64)
+    if k < n:
+        candidates = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    else:
+        candidates = np.broadcast_to(np.arange(n), scores.shape)
+    candidate_scores = np.take_along_axis(scores, candidates, axis=1)
+    order = np.argsort(-candidate_scores, axis=1, kind='stable')
+    return np.take_along_axis(candidates, order, axis=1)
 
 # 간단한 벡터DB 클래스
 class SimpleVectorDB:
-    def __init__(self, documents, embeddings=None, doc_embeddings=None):
+    def __init__(self, documents, embeddings=None, doc_embeddings=None, normalized=False):
         self.documents = documents
         self.embeddings = embeddings
-        self.doc_embeddings = doc_embeddings
-    
-    def similarity_search(self, query, k=3):
+        # 문서 임베딩은 정규화된 float32 행렬로 보관 (코사인 유사도 = 내적)
+        # normalized=True 이면 이미 정규화된 행렬(예: 메모리 매핑)을 복사 없이 그대로 사용
+        if doc_embeddings is None or normalized:
+            self.doc_embeddings = doc_embeddings
+        else:
+            self.doc_embeddings = normalize_embeddings(doc_embeddings)
+        # 근사 검색(IVF) 인덱스 (없으면 전체 행렬 정확 검색)
+        self.ann_index = None
+        # 양자화 임베딩 (float16/int8, 없으면 float32 행렬로만 검색)
+        self.quantized = None
+        self.rerank_factor = 4  # 양자화 검색 시 k * rerank_factor개를 원본 정밀도로 재채점
+        # 어휘(BM25) 인덱스와 검색 방식 ('vector' 또는 어휘+벡터 RRF 결합 'hybrid')
+        self.lexical_index = None
+        self.search_mode = "vector"
+        self.fusion_depth = 20  # RRF 결합 시 각 검색에서 가져올 후보 수
+        # 인덱스 디렉토리에서 로드한 경우 헤더 (index_version 등)
+        self.index_header = None
+        self._index_version = None
+        # 미리 만든 예시 질문 답변 (faq_bank.warm_faq_bank에서 연결)
+        self.faq_bank = None
+
+    @property
+    def index_version(self):
+        """답변 캐시 무효화에 쓰는 인덱스 버전을 반환합니다."""
+        if self.index_header and self.index_header.get("index_version"):
+            return self.index_header["index_version"]
+        if self._index_version is None:
+            # 헤더가 없으면(pickle, 메모리에서 생성) 청크 수와 처음/마지막 청크 내용으로 계산
+            digest = hashlib.md5(str(len(self.documents)).encode())
+            for doc in (self.documents[:1] + self.documents[-1:]) if self.documents else []:
+                digest.update(get_doc_text(doc).encode('utf-8'))
+            self._index_version = "mem-" + digest.hexdigest()[:12]
+        return self._index_version
+
+    def _ensure_doc_embeddings(self):
+        """문서 임베딩이 없으면 한 번만 생성해서 보관합니다."""
+        if self.doc_embeddings is None:
+            print("문서 임베딩이 없어 한 번 생성합니다...")
+            doc_texts = [get_doc_text(doc) for doc in self.documents]
+            self.doc_embeddings = normalize_embeddings(self.embeddings.embed_documents(doc_texts))
+        return self.doc_embeddings
+
+    def build_ann_index(self, nlist=None, nprobe=8):
+        """IVF 근사 검색 인덱스를 만듭니다. (nprobe는 ann_index.nprobe로 조정 가능)"""
+        self.ann_index = IVFIndex.build(self._ensure_doc_embeddings(), nlist=nlist, nprobe=nprobe)
+        return self.ann_index
+
+    def set_storage_mode(self, mode):
+        """근사 검색용 임베딩 저장 방식을 바꿉니다. ('float32', 'float16', 'int8')"""
+        self.quantized = quantize(self._ensure_doc_embeddings(), mode)
+        return self.quantized
+
+    def build_lexical_index(self):
+        """청크 본문으로 BM25 어휘 인덱스를 만듭니다."""
+        print(f"BM25 어휘 인덱스 생성 중... (청크 수: {len(self.documents)})")
+        self.lexical_index = BM25Index.build(get_doc_text(doc) for doc in self.documents)
+        return self.lexical_index
+
+    def lexical_search(self, query, k=3):
+        """hybrid 모드이면 어휘 검색 결과 (인덱스 배열, 점수 배열, 확실한지 여부)를, 아니면 None을 반환합니다.
+
+        확실하면 질문 임베딩 없이 답할 수 있으므로, 임베딩을 만들기 전에 먼저 확인할 때 사용합니다.
+        결과는 hybrid_search(lexical=...)에 넘겨 다시 계산하지 않습니다.
+        """
+        if self.search_mode != "hybrid" or self.lexical_index is None:
+            return None
+        return self.lexical_index.search(query, k=max(k, self.fusion_depth))
+
+    def hybrid_search(self, query, k=3, query_embedding=None, lexical=None):
+        """어휘 검색과 벡터 검색을 RRF로 결합합니다.
+
+        어휘 검색 결과가 확실하면 임베딩 API를 호출하지 않고 바로 반환합니다. (1위 점수와 비슷한 청크만)
+        query_embedding이 주어지면 질문 임베딩을, lexical(lexical_search 결과)이 주어지면 어휘 검색을 다시 하지 않습니다.
+        어휘 인덱스가 없으면 벡터 검색만 합니다.
+        반환값: (인덱스 배열, 점수 배열, 검색 경로 'lexical', 'hybrid' 또는 'vector', 질문 임베딩)
+        질문 임베딩은 어휘 검색만으로 끝났으면 None입니다. (새로 만든 경우 호출한 쪽에서 재사용)
+        """
+        if self.lexical_index is None:
+            # 어휘 인덱스는 오프라인에서 만듦 (요청 처리 중에 만들지 않음)
+            if query_embedding is None:
+                query_embedding = self.embeddings.embed_query(query)
+            vector_ids, vector_scores = self.search_vector(query_embedding, k=k)
+            return vector_ids, vector_scores, "vector", query_embedding
+        if lexical is None:
+            lexical = self.lexical_index.search(query, k=max(k, self.fusion_depth))
+        lexical_ids, lexical_scores, confident = lexical
+        if confident or (self.embeddings is None and query_embedding is None):
+            # 1위와 함께 점수가 비슷한 청크만 (점수가 거의 0인 나머지는 버림)
+            lexical_ids, lexical_scores = top_lexical_hits(lexical_ids, lexical_scores, k=k)
+            return lexical_ids, lexical_scores, "lexical", None
+        if query_embedding is None:
+            query_embedding = self.embeddings.embed_query(query)
+        vector_ids, _ = self.search_vector(query_embedding, k=self.fusion_depth)
+        fused_ids, fused_scores = reciprocal_rank_fusion([lexical_ids, vector_ids], k=k)
+        return fused_ids, fused_scores, "hybrid", query_embedding
+
+    def search_vector(self, query_embedding, k=3):
+        """쿼리 임베딩으로 상위 k개 문서의 (인덱스 배열, 점수 배열)을 반환합니다."""
+        matrix = self._ensure_doc_embeddings()
+        query = normalize_embeddings(query_embedding)[0]
+        if self.quantized is not None:
+            # 1차: 양자화 행렬로 근사 점수 → 후보 추림
+            candidate_ids = self.ann_index.candidates(query) if self.ann_index is not None else None
+            approx_scores = self.quantized.score(query, candidate_ids)
+            shortlist = top_k_indices(approx_scores, k * self.rerank_factor)
+            if candidate_ids is not None:
+                shortlist = candidate_ids[shortlist]
+            # 2차: 후보만 원본 float32로 재채점 (메모리 매핑이면 해당 행만 디스크에서 읽음)
+            shortlist = np.sort(shortlist)
+            scores = matrix[shortlist] @ query
+            order = top_k_indices(scores, k)
+            return shortlist[order], scores[order]
+        if self.ann_index is not None:
+            # 가까운 클러스터의 청크만 점수 계산
+            candidate_ids = self.ann_index.candidates(query)
+            scores = matrix[candidate_ids] @ query
+            order = top_k_indices(scores, k)
+            return candidate_ids[order], scores[order]
+        # 행렬-벡터 곱 한 번으로 전체 문서 점수 계산
+        scores = matrix @ query
+        order = top_k_indices(scores, k)
+        return order, scores[order]
+
+    def search_vector_batch(self, query_embeddings, k=3):
+        """여러 쿼리 임베딩을 한 번에 검색해 (인덱스 행렬, 점수 행렬)을 반환합니다."""
+        queries = normalize_embeddings(query_embeddings)
+        if self.ann_index is not None or self.quantized is not None:
+            # 근사 검색은 쿼리마다 후보가 달라 쿼리별로 처리
+            results = [self.search_vector(query, k=k) for query in queries]
+            return [indices for indices, _ in results], [scores for _, scores in results]
+        matrix = self._ensure_doc_embeddings()
+        # 행렬-행렬 곱 한 번으로 모든 쿼리의 점수 계산
+        scores = queries @ matrix.T
+        indices = top_k_indices_batch(scores, k)
+        return indices, np.take_along_axis(scores, indices, axis=1)
+
+    def similarity_search_batch(self, queries, k=3):
+        """여러 질문을 한 번의 임베딩 요청으로 검색해 질문별 [(문서, 점수), ...]를 반환합니다."""
+        if not queries:
+            return []
+        if self.embeddings is None:
+            print("임베딩 객체가 없습니다. 새로 생성합니다...")
+            return [[(doc, 0.0) for doc in self.documents[:k]] for _ in queries]
+        # 모든 질문을 한 번의 임베딩 요청으로 처리
+        query_embeddings = self.embeddings.embed_documents(list(queries))
+        indices, scores = self.search_vector_batch(query_embeddings, k=k)
+        return [
+            [(self.documents[i], float(score)) for i, score in zip(row_indices, row_scores)]
+            for row_indices, row_scores in zip(indices, scores)
+        ]
+
+    def similarity_search_by_vector(self, query_embedding, k=3):
+        """쿼리 임베딩으로 상위 k개 문서를 검색합니다."""
+        indices, _ = self.search_vector(query_embedding, k=k)
+        return [self.documents[i] for i in indices]
+
+    def similarity_search(self, query, k=3, query_embedding=None):
+        if self.search_mode == "hybrid":
+            indices, _, _, _ = self.hybrid_search(query, k=k, query_embedding=query_embedding)
+            return [self.documents[i] for i in indices]
+        if query_embedding is not None:
+            return self.similarity_search_by_vector(query_embedding, k=k)
         if self.embeddings is None:
             print("임베딩 객체가 없습니다. 새로 생성합니다...")
             # 임베딩 객체를 다시 생성해야 하는 경우
@@ -297,90 +557,255 @@ class SimpleVectorDB:
         
         # 쿼리 임베딩 생성
         query_embedding = self.embeddings.embed_query(query)
-        
-        # 문서 텍스트 추출 (다양한 형식 지원)
-        doc_texts = []
-        for doc in self.documents:
-            if isinstance(doc, dict) and 'page_content' in doc:
-                # 딕셔너리 형식
-                doc_texts.append(doc['page_content'])
-            elif hasattr(doc, 'page_content'):
-                # Document 객체 형식
-                doc_texts.append(doc.page_content)
-            elif isinstance(doc, str):
-                # 문자열 형식
-                doc_texts.append(doc)
-            else:
-                # 기타 형식은 문자열로 변환
-                doc_texts.append(str(doc))
-        
-        # 코사인 유사도 계산
-        similarities = []
-        for doc_embedding in self.embeddings.embed_documents(doc_texts):
-            similarity = np.dot(query_embedding, doc_embedding) / (np.linalg.norm(query_embedding) * np.linalg.norm(doc_embedding))
-            similarities.append(similarity)
-        
-        # 상위 k개 문서 반환
-        top_indices = np.argsort(similarities)[-k:][::-1]
-        return [self.documents[i] for i in top_indices]
+        return self.similarity_search_by_vector(query_embedding, k=k)
+
+    def similarity_search_with_scores(self, query, k=3, query_embedding=None, lexical=None):
+        """상위 k개 문서를 [(문서, 코사인 유사도), ...]로 반환합니다.
+
+        hybrid 검색도 순서는 RRF 결과를 따르고 점수는 코사인 유사도로 계산합니다.
+        어휘 검색만으로 끝나 질문 임베딩이 없으면 점수는 None입니다. (1위와 점수가 비슷한 어휘 검색 결과만)
+        질문 임베딩도 임베딩 객체도 없으면 관련도를 알 수 없으므로 빈 목록을 반환합니다.
+        """
+        if self.search_mode == "hybrid":
+            # 점수 계산에는 hybrid_search가 쓴 질문 임베딩을 그대로 사용 (임베딩 요청은 한 번)
+            indices, _, _, query_embedding = self.hybrid_search(query, k=k, query_embedding=query_embedding, lexical=lexical)
+            if query_embedding is None:
+                return [(self.documents[i], None) for i in indices]
+            query = normalize_embeddings(query_embedding)[0]
+            scores = self._ensure_doc_embeddings()[np.asarray(indices, dtype=np.int64)] @ query if len(indices) else []
+            return [(self.documents[i], float(score)) for i, score in zip(indices, scores)]
+        if query_embedding is None:
+            if self.embeddings is None:
+                # 앞쪽 청크를 관련도 확인 없이 프롬프트에 넣지 않음
+                return []
+            query_embedding = self.embeddings.embed_query(query)
+        indices, scores = self.search_vector(query_embedding, k=k)
+        return [(self.documents[i], float(score)) for i, score in zip(indices, scores)]
     
     def __getstate__(self):
         # pickle 저장 시 임베딩 객체 제외
         state = self.__dict__.copy()
         state['embeddings'] = None  # 임베딩 객체는 저장하지 않음
+        state['faq_bank'] = None
         return state
     
     def __setstate__(self, state):
         # pickle 로드 시 임베딩 객체는 None으로 유지
         self.__dict__.update(state)
+        # 예전 pickle은 임베딩을 float 리스트로 저장했으므로 행렬로 변환
+        self.__dict__.setdefault('ann_index', None)
+        self.__dict__.setdefault('quantized', None)
+        self.__dict__.setdefault('rerank_factor', 4)
+        self.__dict__.setdefault('lexical_index', None)
+        self.__dict__.setdefault('search_mode', "vector")
+        self.__dict__.setdefault('fusion_depth', 20)
+        self.__dict__.setdefault('index_header', None)
+        self.__dict__.setdefault('_index_version', None)
+        self.__dict__.setdefault('faq_bank', None)
+        doc_embeddings = self.__dict__.setdefault('doc_embeddings', None)
+        if doc_embeddings is not None and not isinstance(doc_embeddings, np.ndarray):
+            self.doc_embeddings = normalize_embeddings(self.doc_embeddings)
+
+def is_retryable_error(error):
+    """요청 제한(429), 서버 오류(5xx), 연결/시간 초과이면 다시 시도할 수 있는 오류로 봅니다."""
+    if isinstance(error, (openai.RateLimitError, openai.APIConnectionError, openai.InternalServerError)):
+        return True
+    return isinstance(error, openai.APIStatusError) and error.status_code >= 500
+
+def make_embedding_batches(token_counts, max_inputs=EMBED_MAX_BATCH_INPUTS, max_tokens=EMBED_MAX_BATCH_TOKENS):
+    """입력 수와 토큰 수 제한에 맞춰 연속된 (시작, 끝) 구간 목록으로 나눕니다."""
+    batches = []
+    start, batch_tokens = 0, 0
+    for i, tokens in enumerate(token_counts):
+        if i > start and (i - start >= max_inputs or batch_tokens + tokens > max_tokens):
+            batches.append((start, i))
+            start, batch_tokens = i, 0
+        batch_tokens += tokens
+    if start < len(token_counts):
+        batches.append((start, len(token_counts)))
+    return batches
 
 # OpenAI 임베딩 클래스
 class OpenAIEmbeddings:
-    def __init__(self, openai_api_key, model="text-embedding-3-small"):
-        self.client = openai.OpenAI(api_key=openai_api_key)
+    def __init__(self, openai_api_key, model="text-embedding-3-small", query_cache=None, document_store=None, max_workers=EMBED_CONCURRENCY):
+        # 공용 클라이언트의 연결 풀을 쓰고, 재시도는 _create_embeddings에서 직접 처리 (지수 백오프)
+        self.client = get_openai_client(openai_api_key).with_options(max_retries=0)
         self.model = model
+        # 질문 임베딩 캐시 (메모리 LRU + SQLite), None이면 캐시하지 않음
+        self.query_cache = query_cache
+        # 문서 청크 임베딩 저장소 (hash(모델, 본문) → 임베딩), None이면 매번 새로 요청
+        self.document_store = document_store
+        self.max_workers = max_workers
+        self.max_retries = EMBED_MAX_RETRIES
+
+    def _create_embeddings(self, texts):
+        """임베딩 요청 한 번을 보내고, 일시적인 오류는 지수 백오프로 다시 시도합니다."""
+        for attempt in range(self.max_retries + 1):
+            try:
+                response = self.client.embeddings.create(
+                    model=self.model,
+                    input=texts,
+                    timeout=request_timeout(EMBEDDING_TIMEOUT)
+                )
+                return [data.embedding for data in sorted(response.data, key=lambda data: data.index)]
+            except Exception as e:
+                if attempt == self.max_retries or not is_retryable_error(e):
+                    raise
+                delay = min(EMBED_BACKOFF_MAX, EMBED_BACKOFF_BASE * 2 ** attempt) * random.uniform(0.5, 1.0)
+                print(f"⚠️ 임베딩 요청 실패 ({type(e).__name__}), {delay:.1f}초 후 재시도 ({attempt + 1}/{self.max_retries})")
+                time.sleep(delay)
     
     def embed_query(self, text):
-        response = self.client.embeddings.create(
-            model=self.model,
-            input=text
-        )
-        return response.data[0].embedding
+        if self.query_cache is not None:
+            cached = self.query_cache.get(self.model, text)
+            if cached is not None:
+                return cached
+        embedding = self._create_embeddings(text)[0]
+        if self.query_cache is not None:
+            self.query_cache.put(self.model, text, embedding)
+        return embedding
     
     def embed_documents(self, texts):
-        response = self.client.embeddings.create(
-            model=self.model,
-            input=texts
+        """문서 임베딩을 입력 순서대로 반환합니다. 저장소에 있는 청크는 다시 요청하지 않습니다."""
+        texts = list(texts)
+        if self.document_store is None:
+            return self._embed_batches(texts)
+        results = self.document_store.get_many(self.model, texts)
+        missing = [i for i, vector in enumerate(results) if vector is None]
+        print(f"임베딩 저장소: {len(texts) - len(missing)}개 재사용, {len(missing)}개 새로 요청")
+        if missing:
+            missing_texts = [texts[i] for i in missing]
+            # 배치가 끝날 때마다 저장해 두므로 중간에 실패해도 다시 실행하면 이어서 진행
+            on_batch = lambda start, end, vectors: self.document_store.put_many(self.model, missing_texts[start:end], vectors)
+            for i, vector in zip(missing, self._embed_batches(missing_texts, on_batch)):
+                results[i] = vector
+        return results
+
+    def _embed_batches(self, texts, on_batch=None):
+        """토큰 수 기준 배치로 나눠 동시에 요청하고, 입력 순서대로 임베딩을 반환합니다."""
+        if not texts:
+            return []
+        texts = list(texts)
+        token_counts = count_tokens_batch(texts, self.model)
+        for i, tokens in enumerate(token_counts):
+            if tokens > EMBED_MAX_INPUT_TOKENS:
+                print(f"⚠️ {i}번 입력이 {tokens}토큰이라 {EMBED_MAX_INPUT_TOKENS}토큰으로 자릅니다.")
+                texts[i] = truncate_to_tokens(texts[i], EMBED_MAX_INPUT_TOKENS, self.model)
+                token_counts[i] = EMBED_MAX_INPUT_TOKENS
+        batches = make_embedding_batches(token_counts)
+        if len(batches) == 1:
+            results = self._create_embeddings(texts)
+            if on_batch is not None:
+                on_batch(0, len(texts), results)
+            return results
+
+        print(f"문서 임베딩 요청: {len(texts)}개 입력, {sum(token_counts):,}토큰 → {len(batches)}개 배치 (동시 {self.max_workers}개)")
+        results = [None] * len(texts)
+        executor = ThreadPoolExecutor(max_workers=min(self.max_workers, len(batches)))
+        try:
+            futures = {executor.submit(self._create_embeddings, texts[start:end]): (start, end) for start, end in batches}
+            for done, future in enumerate(as_completed(futures), 1):
+                start, end = futures[future]
+                results[start:end] = future.result()
+                if on_batch is not None:
+                    on_batch(start, end, results[start:end])
+                print(f"  - 배치 {done}/{len(batches)} 완료")
+        finally:
+            # 한 배치가 재시도 끝에 실패하면 남은 배치는 보내지 않음
+            executor.shutdown(wait=True, cancel_futures=True)
+        return results
+
+def save_vector_db(vector_db, index_dir):
+    """SimpleVectorDB를 메모리 매핑용 인덱스 디렉토리로 저장합니다."""
+    model = getattr(vector_db.embeddings, 'model', EMBEDDING_MODEL)
+    vector_db._ensure_doc_embeddings()
+    header = write_vector_index(index_dir, vector_db.documents, vector_db.doc_embeddings, model=model)
+    # hybrid 검색용 BM25 파일도 함께 저장 (앱 시작 시에는 만들지 않음)
+    (vector_db.lexical_index or vector_db.build_lexical_index()).save(index_dir)
+    print(f"벡터 인덱스 저장 완료: {index_dir} (청크 수: {header['count']}, 크기: {index_size_bytes(index_dir)} bytes)")
+    return header
+
+def load_vector_db(path, openai_api_key=None, storage_mode="float32", search_mode="vector"):
+    """인덱스 디렉토리(권장) 또는 예전 pickle 파일에서 SimpleVectorDB를 로드합니다.
+
+    storage_mode가 'float16'/'int8'이면 양자화 행렬만 메모리에 올리고,
+    원본 float32 임베딩은 재채점할 행만 디스크에서 읽습니다.
+    (양자화 파일이 없으면 메모리에서만 만들고 인덱스 디렉토리에는 쓰지 않음, 생성은 python quantization.py <인덱스 디렉토리> <방식>)
+    search_mode가 'hybrid'이면 BM25 어휘 인덱스를 함께 사용합니다.
+    (BM25 파일이 없으면 만들지 않고 벡터 검색만 사용, 생성은 python lexical_index.py <인덱스 디렉토리>)
+    """
+    if is_vector_index(path):
+        documents, matrix, header = open_vector_index(path)
+        vector_db = SimpleVectorDB(documents, doc_embeddings=matrix, normalized=True)
+        vector_db.index_header = header
+        # 인덱스 디렉토리에 IVF 인덱스가 함께 저장되어 있으면 사용
+        vector_db.ann_index = IVFIndex.load(path)
+        if storage_mode != "float32":
+            vector_db.quantized = load_quantized(path, storage_mode)
+            if vector_db.quantized is None:
+                # 배포된 인덱스 디렉토리는 읽기 전용이거나 여러 워커가 공유할 수 있으므로 파일은 만들지 않음
+                print(f"⚠️ 양자화 임베딩({storage_mode}) 파일이 없어 메모리에서만 만듭니다: {path} "
+                      f"('python quantization.py {path} {storage_mode}'로 생성)")
+                vector_db.set_storage_mode(storage_mode)
+        vector_db.lexical_index = BM25Index.load(path)
+    else:
+        with open(path, 'rb') as f:
+            vector_db = pickle.load(f)
+        if storage_mode != "float32":
+            vector_db.set_storage_mode(storage_mode)
+    if search_mode == "hybrid" and vector_db.lexical_index is None:
+        # 배포된 인덱스 디렉토리는 읽기 전용이거나 여러 워커가 공유할 수 있으므로 여기서 만들지 않음
+        print(f"⚠️ BM25 어휘 인덱스가 없어 벡터 검색만 사용합니다: {path} ('python lexical_index.py {path}'로 생성)")
+        search_mode = "vector"
+    vector_db.search_mode = search_mode
+    if openai_api_key:
+        # 임베딩 객체 다시 생성 (절대 변경 불가), 질문 임베딩은 공용 캐시 사용
+        # (문서 임베딩 저장소는 오프라인 인덱스 생성에서만 사용하므로 서버에서는 열지 않음)
+        vector_db.embeddings = OpenAIEmbeddings(
+            openai_api_key=openai_api_key,
+            model=EMBEDDING_MODEL,
+            query_cache=get_query_cache()
         )
-        return [data.embedding for data in response.data]
+    return vector_db
+
+def remove_vector_db(path):
+    """인덱스 디렉토리 또는 pickle 파일을 삭제합니다."""
+    if os.path.isdir(path):
+        shutil.rmtree(path)
+    elif os.path.exists(path):
+        os.remove(path)
+    else:
+        return False
+    return True
 
 # 2. 임베딩 및 벡터DB 저장/로드 함수
 def get_or_create_vector_db(openai_api_key):
-    # 벡터DB 파일 존재 확인
-    print(f"벡터DB 파일 확인: {VECTOR_DB_PATH}")
-    if not os.path.exists(VECTOR_DB_PATH):
-        print(f"❌ 벡터DB 파일이 존재하지 않습니다: {VECTOR_DB_PATH}")
+    # 벡터DB 인덱스(또는 예전 pickle) 존재 확인
+    print(f"벡터DB 인덱스 확인: {VECTOR_INDEX_DIR}")
+    if is_vector_index(VECTOR_INDEX_DIR):
+        print(f"✅ 벡터DB 인덱스 확인됨: {os.path.abspath(VECTOR_INDEX_DIR)}")
+        print(f"벡터DB 인덱스 크기: {index_size_bytes(VECTOR_INDEX_DIR)} bytes")
+    elif os.path.exists(VECTOR_DB_PATH):
+        print(f"✅ 예전 형식 벡터DB 파일 확인됨: {os.path.abspath(VECTOR_DB_PATH)}")
+        print(f"벡터DB 파일 크기: {os.path.getsize(VECTOR_DB_PATH)} bytes")
+    else:
+        print(f"❌ 벡터DB 파일이 존재하지 않습니다: {VECTOR_INDEX_DIR}")
         print(f"현재 작업 디렉토리: {os.getcwd()}")
-        print(f"벡터DB 파일 절대 경로: {os.path.abspath(VECTOR_DB_PATH)}")
+        print(f"벡터DB 인덱스 절대 경로: {os.path.abspath(VECTOR_INDEX_DIR)}")
         return None
     
-    print(f"✅ 벡터DB 파일 확인됨: {os.path.abspath(VECTOR_DB_PATH)}")
-    print(f"벡터DB 파일 크기: {os.path.getsize(VECTOR_DB_PATH)} bytes")
-    
     # 캐시 유효성 검사
     if is_cache_valid():
         print("유효한 캐시가 있어 기존 벡터DB를 로드합니다...")
         try:
-            with open(VECTOR_DB_PATH, 'rb') as f:
-                vector_db = pickle.load(f)
-            # 임베딩 객체 다시 생성 (절대 변경 불가)
-            embeddings = OpenAIEmbeddings(
-                openai_api_key=openai_api_key,
-                model="text-embedding-3-small"
-            )
-            vector_db.embeddings = embeddings
-            cache_info = load_cache_info()
-            print(f"벡터DB 로드 완료 (청크 수: {cache_info.get('chunk_count', '알 수 없음')})")
+            if is_vector_index(VECTOR_INDEX_DIR):
+                vector_db = load_vector_db(VECTOR_INDEX_DIR, openai_api_key)
+            else:
+                # 예전 pickle은 한 번 읽어서 인덱스 형식으로 옮겨 둠
+                print("예전 pickle 형식을 인덱스 형식으로 변환합니다...")
+                save_vector_db(load_vector_db(VECTOR_DB_PATH), VECTOR_INDEX_DIR)
+                vector_db = load_vector_db(VECTOR_INDEX_DIR, openai_api_key)
+            print(f"벡터DB 로드 완료 (청크 수: {len(vector_db.documents)})")
             return vector_db
         except Exception as e:
             print(f"벡터DB 로드 실패: {e}")
@@ -390,9 +815,8 @@ def get_or_create_vector_db(openai_api_key):
     print("새로운 임베딩을 생성합니다...")
     
     # 기존 파일 삭제 (있다면)
-    for file_path in [VECTOR_DB_PATH, CACHE_INFO_PATH]:
-        if os.path.exists(file_path):
-            os.remove(file_path)
+    for file_path in [VECTOR_INDEX_DIR, VECTOR_DB_PATH, CACHE_INFO_PATH]:
+        if remove_vector_db(file_path):
             print(f"기존 파일 삭제: {file_path}")
     
     # 새로운 임베딩 생성 (절대 변경 불가)
@@ -407,10 +831,11 @@ def get_or_create_vector_db(openai_api_key):
     print("OpenAI 임베딩 생성 시작...")
     embeddings = OpenAIEmbeddings(
         openai_api_key=openai_api_key,
-        model="text-embedding-3-small"
+        model="text-embedding-3-small",
+        document_store=get_embedding_store()
     )
     
-    # 모든 문서의 임베딩을 미리 생성
+    # 모든 문서의 임베딩을 미리 생성 (저장소에 있는 청크는 재사용)
     print("문서 임베딩 생성 중...")
     doc_embeddings = embeddings.embed_documents([doc['page_content'] for doc in pdf_chunks])
     
@@ -419,8 +844,7 @@ def get_or_create_vector_db(openai_api_key):
     
     # 벡터DB 저장
     print("벡터DB 저장 중...")
-    with open(VECTOR_DB_PATH, 'wb') as f:
-        pickle.dump(vector_db, f)
+    save_vector_db(vector_db, VECTOR_INDEX_DIR)
     
     # 캐시 정보 저장
     file_hash = calculate_file_hash(PDF_PATH)
@@ -434,201 +858,526 @@ def get_or_create_vector_db(openai_api_key):
 # 캐시 관리 유틸리티 함수들
 def get_cache_status():
     """현재 캐시 상태를 반환합니다."""
-    if not os.path.exists(VECTOR_DB_PATH):
+    if not is_vector_index(VECTOR_INDEX_DIR) and not os.path.exists(VECTOR_DB_PATH):
         return {"status": "not_exists", "message": "벡터DB가 존재하지 않습니다."}
     
     cache_info = load_cache_info()
     if cache_info is None:
         return {"status": "no_cache_info", "message": "캐시 정보가 없습니다."}
     
-    current_hash = calculate_file_hash(PDF_PATH)
-    is_valid = cache_info.get("file_hash") == current_hash
+    if not os.path.exists(PDF_PATH):
+        return {"status": "no_pdf", "message": f"PDF 파일이 존재하지 않습니다: {PDF_PATH}"}
+    
+    cached_hash = cache_info.get("file_hash", "")
+    validation = validate_cached_file(PDF_PATH, cache_info)
+    is_valid = validation["is_valid"]
     
     return {
         "status": "valid" if is_valid else "invalid",
-        "current_hash": current_hash[:8] + "...",
-        "cached_hash": cache_info.get("file_hash", "")[:8] + "...",
+        "message": "캐시가 유효합니다." if is_valid else "PDF 파일이 변경되었습니다.",
+        "current_hash": validation["current_hash"][:8] + "...",
+        "cached_hash": cached_hash[:8] + "...",
         "chunk_count": cache_info.get("chunk_count"),
         "created_at": cache_info.get("created_at"),
-        "is_valid": is_valid
+        "is_valid": is_valid,
+        "validation": describe_validation(validation),
+        "validation_ms": validation["elapsed_ms"]
     }
 
 def force_rebuild_cache(openai_api_key):
     """캐시를 강제로 재생성합니다."""
     print("캐시를 강제로 재생성합니다...")
-    if os.path.exists(VECTOR_DB_PATH):
-        os.remove(VECTOR_DB_PATH)
+    if remove_vector_db(VECTOR_INDEX_DIR):
         print("기존 벡터DB를 삭제했습니다.")
     
     return get_or_create_vector_db(openai_api_key)
 
 def clear_cache():
     """캐시를 완전히 삭제합니다."""
-    if os.path.exists(VECTOR_DB_PATH):
-        os.remove(VECTOR_DB_PATH)
+    removed = [path for path in (VECTOR_INDEX_DIR, VECTOR_DB_PATH) if remove_vector_db(path)]
+    if removed:
         print("캐시가 완전히 삭제되었습니다.")
     else:
         print("삭제할 캐시가 없습니다.")
 
 # 3. 유사 청크 검색 함수
-def retrieve_relevant_chunks(query, vector_db, k=3):
+def retrieve_relevant_chunks(query, vector_db, k=3, query_embedding=None):
     print(f"  - 유사 청크 검색 시작 (k={k})")
     try:
-        docs = vector_db.similarity_search(query, k=k)
+        docs = vector_db.similarity_search(query, k=k, query_embedding=query_embedding)
         print(f"  - 유사 청크 검색 완료: {len(docs)}개 찾음")
         return docs
     except Exception as e:
         print(f"  - ❌ 유사 청크 검색 실패: {e}")
         return []
 
+def retrieve_relevant_chunks_with_scores(query, vector_db, k=RAG_TOP_K, query_embedding=None, trace=None, lexical=None):
+    """유사 청크를 [(문서, 점수), ...]로 검색합니다."""
+    request = trace.id if trace is not None else "-"
+    try:
+        scored_docs = vector_db.similarity_search_with_scores(query, k=k, query_embedding=query_embedding, lexical=lexical)
+        scores = ",".join("-" if score is None else f"{score:.3f}" for _, score in scored_docs)
+        log_event(logging.DEBUG, "유사 청크 검색 완료", request=request, k=k, found=len(scored_docs), scores=scores)
+        return scored_docs
+    except Exception as e:
+        log_event(logging.ERROR, "유사 청크 검색 실패", request=request, error=e)
+        return []
+
+def retrieve_relevant_chunks_batch(queries, vector_db, k=3):
+    """여러 질문의 유사 청크를 한 번에 검색합니다. 질문별 [(문서, 점수), ...] 목록을 반환합니다."""
+    print(f"  - 유사 청크 일괄 검색 시작 (질문 수={len(queries)}, k={k})")
+    try:
+        results = vector_db.similarity_search_batch(queries, k=k)
+        print(f"  - 유사 청크 일괄 검색 완료: {sum(len(r) for r in results)}개 찾음")
+        return results
+    except Exception as e:
+        print(f"  - ❌ 유사 청크 일괄 검색 실패: {e}")
+        return [[] for _ in queries]
+
+_SENTENCE_END = re.compile(r'[.!?]\s+')
+_COMMA = re.compile(r'([,，])\s*')
+RAG_ANSWER_MODEL = "gpt-4.1-nano-2025-04-14"  # OpenAI 답변 모델을 절대 변경하지 않음
+
+def _break_commas(text):
+    """쉼표 뒤에 줄바꿈을 넣습니다."""
+    return _COMMA.sub('\\1\n', text)
+
+class StreamingLineBreaker:
+    """insert_linebreaks와 같은 줄바꿈을 토큰 스트림에 점진적으로 적용합니다.
+
+    문장 끝(마침표 등 + 공백)이 확정된 부분만 줄로 묶어 내보내고, 나머지는 다음 토큰을 기다립니다.
+    feed()로 넣은 결과를 이어 붙이고 finish()를 더하면 insert_linebreaks(전체 텍스트)와 같습니다.
+    """
+    def __init__(self, max_length=60):
+        self.max_length = max_length
+        self._pending = ""  # 문장 경계가 아직 확정되지 않은 텍스트
+        self._line = ""     # 현재 줄
+
+    def _add_piece(self, piece):
+        if not piece.strip():
+            return ""
+        if len(self._line) + len(piece) > self.max_length:
+            completed = self._line.strip() + "\n"
+            self._line = piece
+            return _break_commas(completed)
+        self._line += piece
+        return ""
+
+    def _consume(self, final):
+        output = []
+        start = 0
+        for match in _SENTENCE_END.finditer(self._pending):
+            if not final and match.end() == len(self._pending):
+                break  # 공백이 더 이어질 수 있으므로 다음 조각을 기다림
+            output.append(self._add_piece(self._pending[start:match.start()]))
+            output.append(self._add_piece(match.group()))
+            start = match.end()
+        if final:
+            output.append(self._add_piece(self._pending[start:]))
+            start = len(self._pending)
+        self._pending = self._pending[start:]
+        return "".join(output)
+
+    def feed(self, text):
+        """텍스트 조각을 넣고, 줄바꿈이 확정된 부분을 반환합니다."""
+        self._pending += text
+        return self._consume(final=False)
+
+    def preview(self):
+        """아직 확정되지 않은 부분을 화면 표시용으로 반환합니다."""
+        return _break_commas((self._line + self._pending).lstrip())
+
+    def finish(self):
+        """남은 텍스트를 모두 내보냅니다."""
+        output = self._consume(final=True) + _break_commas(self._line.strip())
+        self._pending, self._line = "", ""
+        return output
+
 def insert_linebreaks(text, max_length=60):
-    result = ""
-    line = ""
-    for sentence in re.split(r'([.!?]\s+)', text):  # 문장 단위로 분리
-        if not sentence.strip():
-            continue
-        if len(line) + len(sentence) > max_length:
-            result += line.strip() + "\n"
-            line = sentence
-        else:
-            line += sentence
-    result += line.strip()
-    # 쉼표 등에서도 추가로 줄바꿈
-    result = re.sub(r'([,，])\s*', '\1\n', result)
-    return result
+    """문장 단위로 max_length 글자 정도씩 줄을 나누고, 쉼표 뒤에서도 줄을 바꿉니다."""
+    breaker = StreamingLineBreaker(max_length)
+    return breaker.feed(text) + breaker.finish()
 
-# 4. RAG 답변 생성 함수
-def answer_with_rag(query, vector_db, openai_api_key, model=None):
-    # OpenAI 답변 모델을 절대 변경하지 않음
-    model = "gpt-4.1-nano-2025-04-14"
-    print(f"  - RAG 답변 생성 시작")
+def _prepare_rag_prompt(query, vector_db, answer_cache, trace):
+    """답변 캐시 확인 → 유사 청크 검색 → 프롬프트 생성까지 진행합니다.
 
+    반환값: (언어, 질문 임베딩, 프롬프트, 바로 돌려줄 답변, 결과) - FAQ/캐시 적중, 청크 없음이면 프롬프트는 None
+    """
     # 질문 언어 감지
-    lang = detect_language(query)
-    print(f"  - 감지된 언어: {lang}")
+    with trace.span("detect_language"):
+        lang = detect_language(query)
+    trace.debug("언어 감지", lang=lang)
     prompt_template = LANGUAGE_PROMPTS.get(lang, LANGUAGE_PROMPTS['en'])
     error_msg = ERROR_MESSAGES.get(lang, ERROR_MESSAGES['en'])
 
+    # 0단계: 미리 만든 예시 질문 답변 (임베딩 요청도 하지 않음)
+    faq_bank = getattr(vector_db, 'faq_bank', None)
+    if faq_bank is not None:
+        with trace.span("faq_lookup"):
+            faq_answer = faq_bank.lookup(query)
+        if faq_answer is not None:
+            trace.debug("FAQ 답변 적중")
+            return lang, None, None, faq_answer, "faq"
+
+    # hybrid 검색에서 어휘 검색 결과가 확실하면 임베딩 없이 답하므로, 답변 캐시용 임베딩을 만들기 전에 확인
+    # (이 경우 답변 캐시는 건너뜀, 같은 예시 질문은 FAQ 답변이 처리)
+    lexical = vector_db.lexical_search(query, k=RAG_TOP_K)
+    lexical_confident = lexical is not None and lexical[2]
+    if lexical_confident:
+        trace.debug("어휘 검색 결과가 확실해 질문 임베딩 생략")
+
+    # 질문 임베딩 (답변 캐시와 검색에 함께 사용, 검색 단계에서 다시 만들지 않도록 여기서 한 번만)
+    query_embedding = None
+    if vector_db.embeddings is not None and not lexical_confident:
+        try:
+            query_tokens = count_tokens_batch([query], EMBEDDING_MODEL)[0]
+            with trace.span("embed_query") as span:
+                span.tokens_in = query_tokens
+                query_embedding = vector_db.embeddings.embed_query(query)
+        except Exception as e:
+            log_event(logging.WARNING, "질문 임베딩 실패", request=trace.id, error=e)
+
+    # 답변 캐시 확인
+    if answer_cache is not None and query_embedding is not None:
+        try:
+            with trace.span("answer_cache"):
+                cached_answer = answer_cache.lookup(query_embedding, lang, vector_db.index_version)
+            if cached_answer is not None:
+                trace.debug("답변 캐시 적중")
+                return lang, query_embedding, None, cached_answer, "cache"
+        except Exception as e:
+            log_event(logging.WARNING, "답변 캐시 확인 실패", request=trace.id, error=e)
+
     # 1단계: 유사 청크 검색
-    print(f"  - 1단계: 유사 청크 검색")
-    relevant_chunks = retrieve_relevant_chunks(query, vector_db)
+    with trace.span("vector_scoring"):
+        scored_chunks = retrieve_relevant_chunks_with_scores(query, vector_db, query_embedding=query_embedding, trace=trace, lexical=lexical)
+    threshold = relevance_threshold(vector_db)
+    relevant_chunks, best_score = select_relevant(scored_chunks, threshold)
 
     if not relevant_chunks:
-        print(f"  - ❌ 유사한 청크를 찾지 못했습니다.")
-        return error_msg['no_chunks']
-
-    # 2단계: 컨텍스트 생성
-    print(f"  - 2단계: 컨텍스트 생성")
-    context_parts = []
-    for doc in relevant_chunks:
-        if isinstance(doc, dict) and 'page_content' in doc:
-            # 딕셔너리 형식
-            context_parts.append(doc['page_content'])
-        elif hasattr(doc, 'page_content'):
-            # Document 객체 형식
-            context_parts.append(doc.page_content)
-        elif isinstance(doc, str):
-            # 문자열 형식
-            context_parts.append(doc)
+        if best_score is not None:
+            # 관련 있는 내용이 없으므로 LLM을 호출하지 않음
+            trace.debug("관련도가 기준보다 낮아 LLM 호출 생략", best=f"{best_score:.3f}", threshold=f"{threshold:.3f}")
         else:
-            # 기타 형식은 문자열로 변환
-            context_parts.append(str(doc))
-    
-    context = "\n\n".join(context_parts)
-    print(f"  - 컨텍스트 길이: {len(context)} 문자")
+            trace.debug("유사한 청크를 찾지 못했습니다")
+        return lang, query_embedding, None, error_msg['no_chunks'], "no_chunks"
+    if len(relevant_chunks) < len(scored_chunks):
+        trace.debug("적응형 k: 점수가 크게 낮은 청크 제외", dropped=len(scored_chunks) - len(relevant_chunks))
+
+    # 2단계: 컨텍스트 생성 (겹치는 부분 제거, 이웃 청크 합치기, 토큰 예산) → 3단계: 프롬프트 생성
+    with trace.span("context_build") as span:
+        context, context_stats = build_context(relevant_chunks, RAG_ANSWER_MODEL)
+        prompt = prompt_template.format(context=context, query=query)
+        span.tokens_in = context_stats['tokens']
+    trace.debug("컨텍스트 생성", budget=RAG_CONTEXT_MAX_TOKENS, chunks=context_stats['chunks'],
+                segments=context_stats['used_segments'], tokens=context_stats['tokens'],
+                naive_tokens=context_stats['naive_tokens'], saved_tokens=context_stats['saved_tokens'],
+                dropped_tokens=context_stats['dropped_tokens'], prompt_chars=len(prompt))
+    return lang, query_embedding, prompt, None, None
+
+def _openai_error_message(e, error_msg, trace):
+    """OpenAI 호출 오류를 사용자에게 보여 줄 메시지로 바꿉니다."""
+    if isinstance(e, openai.AuthenticationError):
+        log_event(logging.ERROR, "OpenAI 인증 오류", request=trace.id, error=e)
+        return error_msg['auth_error']
+    if isinstance(e, openai.RateLimitError):
+        log_event(logging.ERROR, "OpenAI 요청 제한 오류", request=trace.id, error=e)
+        return error_msg['rate_limit']
+    if isinstance(e, openai.APIError):
+        log_event(logging.ERROR, "OpenAI API 오류", request=trace.id, error=e)
+        return error_msg['api_error'].format(error=e)
+    log_event(logging.ERROR, "예상치 못한 오류", request=trace.id, error=e)
+    return error_msg['unknown_error'].format(error=e)
 
-    # 3단계: 프롬프트 생성
-    print(f"  - 3단계: 프롬프트 생성")
-    prompt = prompt_template.format(context=context, query=query)
-    print(f"  - 프롬프트 길이: {len(prompt)} 문자")
+def _record_usage(span, usage):
+    """OpenAI 응답의 토큰 사용량을 span에 기록합니다."""
+    if usage is not None:
+        span.tokens_in = usage.prompt_tokens or 0
+        span.tokens_out = usage.completion_tokens or 0
 
-    # 4단계: OpenAI API 호출
-    print(f"  - 4단계: OpenAI API 호출 (모델: {model})")
+def _rag_flight_key(query, vector_db):
+    """같은 RAG 요청을 합치기 위한 키 (작업, 정규화한 질문, 언어, 모델, 인덱스 버전)"""
+    return ("rag", normalize_key_text(query), detect_language(query), RAG_ANSWER_MODEL, vector_db.index_version)
+
+# 4. RAG 답변 생성 함수
+def answer_with_rag(query, vector_db, openai_api_key, model=None, answer_cache=None):
+    """RAG 답변을 생성합니다. answer_cache가 주어지면 비슷한 질문의 답변을 재사용합니다.
+
+    같은 질문이 이미 처리 중이면 새로 호출하지 않고 그 결과를 함께 받습니다.
+    """
+    return answer_with_rag_outcome(query, vector_db, openai_api_key, answer_cache=answer_cache)[0]
+
+def answer_with_rag_outcome(query, vector_db, openai_api_key, answer_cache=None):
+    """answer_with_rag와 같지만 (답변, 결과)를 반환합니다.
+
+    결과: llm, cache, faq(답변), no_chunks(관련 내용 없음), empty, error(안내 메시지)
+    """
+    key = _rag_flight_key(query, vector_db)
+    return get_singleflight("rag").do(key, _generate_rag_answer, query, vector_db, openai_api_key, answer_cache)
+
+def _generate_rag_answer(query, vector_db, openai_api_key, answer_cache):
+    """검색 → 프롬프트 → OpenAI 호출로 (답변, 결과)를 만듭니다. (오류는 안내 메시지로 반환)"""
+    model = RAG_ANSWER_MODEL
+    trace = RequestTrace("answer")
+    lang, query_embedding, prompt, early_answer, outcome = _prepare_rag_prompt(query, vector_db, answer_cache, trace)
+    if prompt is None:
+        trace.finish(outcome)
+        return early_answer, outcome
+    error_msg = ERROR_MESSAGES.get(lang, ERROR_MESSAGES['en'])
+
+    # 4단계: OpenAI API 호출 (공용 클라이언트, keep-alive 연결 재사용)
+    trace.debug("OpenAI API 호출", model=model)
     try:
-        client = openai.OpenAI(api_key=openai_api_key)
-        print(f"  - OpenAI 클라이언트 생성 완료")
+        with trace.span("llm_call") as span:
+            response = get_openai_client(openai_api_key).chat.completions.create(
+                model=model,
+                messages=[{"role": "user", "content": prompt}],
+                max_tokens=1000,
+                temperature=0.1,
+                timeout=request_timeout(CHAT_TIMEOUT)
+            )
+            _record_usage(span, getattr(response, 'usage', None))
+        pool = get_pool_stats()
+        trace.debug("OpenAI API 응답 수신", connections=pool['connections'], idle=pool['idle_connections'], pool_requests=pool['requests'])
+
+        with trace.span("postprocess"):
+            answer = (response.choices[0].message.content or "").strip()
+            if answer:
+                # 줄바꿈 후처리
+                answer = insert_linebreaks(answer, max_length=60)
+                if answer_cache is not None and query_embedding is not None:
+                    answer_cache.put(query_embedding, lang, vector_db.index_version, answer)
+    except Exception as e:
+        message = _openai_error_message(e, error_msg, trace)
+        trace.finish("error")
+        return message, "error"
+    if not answer:
+        log_event(logging.WARNING, "OpenAI 응답이 비어있습니다", request=trace.id)
+        trace.finish("empty")
+        return error_msg['empty_response'], "empty"
+    trace.finish("llm")
+    return answer, "llm"
 
-        response = client.chat.completions.create(
+def answer_with_rag_stream(query, vector_db, openai_api_key, answer_cache=None):
+    """RAG 답변을 스트리밍으로 생성합니다.
+
+    토큰이 도착할 때마다 지금까지의 답변 전체(줄바꿈 적용)를 반환하는 제너레이터입니다.
+    마지막으로 반환하는 값이 answer_with_rag와 같은 최종 답변입니다.
+    같은 질문이 이미 처리 중이면 그 요청이 끝난 뒤 최종 답변을 한 번에 반환합니다.
+    """
+    flight = get_singleflight("rag")
+    key = _rag_flight_key(query, vector_db)
+    call, is_leader = flight.join(key)
+    if not is_leader:
+        log_event(logging.DEBUG, "같은 질문을 처리 중인 요청의 답변을 기다립니다")
+        try:
+            yield call.wait()[0]
+        except FlightAbandoned:
+            # 먼저 시작한 스트림이 중간에 닫힘 → 직접 답변 생성
+            yield answer_with_rag(query, vector_db, openai_api_key, answer_cache=answer_cache)
+        except TimeoutError:
+            # 먼저 시작한 요청이 너무 오래 걸림 → 합치지 않고 직접 답변 생성
+            flight.record_timeout()
+            yield _generate_rag_answer(query, vector_db, openai_api_key, answer_cache)[0]
+        return
+    result = None
+    stream = _stream_rag_answer(query, vector_db, openai_api_key, answer_cache)
+    try:
+        for result in stream:
+            yield result[0]
+    except Exception as e:
+        flight.complete(key, call, error=e)
+        raise
+    except BaseException:
+        # 화면이 중간에 스트림을 닫음(GeneratorExit): 중간까지 받은 답변은 넘기지 않고,
+        # 기다리던 요청은 직접 다시 요청하도록 알림
+        stream.close()
+        flight.complete(key, call, error=FlightAbandoned("RAG 답변 스트림이 중간에 닫혔습니다."))
+        raise
+    flight.complete(key, call, result=result)
+
+def _stream_rag_answer(query, vector_db, openai_api_key, answer_cache):
+    """(지금까지의 답변, None)을 반환하다가 마지막에 (최종 답변, 결과)를 반환하는 제너레이터"""
+    model = RAG_ANSWER_MODEL
+    trace = RequestTrace("stream")
+    lang, query_embedding, prompt, early_answer, outcome = _prepare_rag_prompt(query, vector_db, answer_cache, trace)
+    if prompt is None:
+        trace.finish(outcome)
+        yield early_answer, outcome
+        return
+    error_msg = ERROR_MESSAGES.get(lang, ERROR_MESSAGES['en'])
+
+    trace.debug("OpenAI API 스트리밍 호출", model=model)
+    breaker = StreamingLineBreaker(max_length=60)
+    committed = ""
+    first_token = True
+    # llm_call은 요청부터 마지막 청크 수신까지, 토큰을 yield한 뒤 화면이 그리는 동안(paused)은 제외
+    span = Span("llm_call")
+    llm_start = last_chunk = time.perf_counter()
+    paused = paused_at_last_chunk = 0.0
+    try:
+        stream = get_openai_client(openai_api_key).chat.completions.create(
             model=model,
             messages=[{"role": "user", "content": prompt}],
             max_tokens=1000,
-            temperature=0.1
+            temperature=0.1,
+            stream=True,
+            stream_options={"include_usage": True},
+            timeout=request_timeout(CHAT_TIMEOUT)
         )
-        print(f"  - OpenAI API 응답 수신 완료")
-
-        answer = response.choices[0].message.content.strip()
-        print(f"  - 응답 길이: {len(answer)} 문자")
-        if not answer:
-            print(f"  - ❌ OpenAI 응답이 비어있습니다.")
-            return error_msg['empty_response']
-        # 줄바꿈 후처리
-        answer = insert_linebreaks(answer, max_length=60)
-        print(f"  - ✅ RAG 답변 생성 완료")
-        return answer
-
-    except openai.AuthenticationError as e:
-        print(f"  - ❌ OpenAI 인증 오류: {e}")
-        return error_msg['auth_error']
-    except openai.RateLimitError as e:
-        print(f"  - ❌ OpenAI 요청 제한 오류: {e}")
-        return error_msg['rate_limit']
-    except openai.APIError as e:
-        print(f"  - ❌ OpenAI API 오류: {e}")
-        return error_msg['api_error'].format(error=e)
+        for chunk in stream:
+            last_chunk, paused_at_last_chunk = time.perf_counter(), paused
+            # 토큰 사용량은 마지막 청크(choices 없음)에 옴
+            _record_usage(span, getattr(chunk, 'usage', None))
+            if not chunk.choices:
+                continue
+            delta = chunk.choices[0].delta.content
+            if not delta:
+                continue
+            if first_token:
+                # 앞쪽 공백은 답변 앞뒤 strip과 같게 버림
+                delta = delta.lstrip()
+                if not delta:
+                    continue
+                first_token = False
+                trace.debug("첫 토큰 수신", ms=f"{trace.mark('llm_first_token'):.0f}")
+            committed += breaker.feed(delta)
+            yielded = time.perf_counter()
+            yield committed + breaker.preview(), None
+            paused += time.perf_counter() - yielded
+    except GeneratorExit:
+        # 화면이 스트림을 중간에 닫음
+        span.ms, span.error = (last_chunk - llm_start - paused_at_last_chunk) * 1000, True
+        trace.add_span(span)
+        trace.finish("abandoned")
+        raise
     except Exception as e:
-        print(f"  - ❌ 예상치 못한 오류: {e}")
-        return error_msg['unknown_error'].format(error=e)
+        span.ms, span.error = (time.perf_counter() - llm_start - paused) * 1000, True
+        trace.add_span(span)
+        message = _openai_error_message(e, error_msg, trace)
+        trace.finish("error")
+        yield message, "error"
+        return
+    span.ms = (last_chunk - llm_start - paused_at_last_chunk) * 1000
+    trace.add_span(span)
+
+    with trace.span("postprocess"):
+        answer = (committed + breaker.finish()).strip()
+        if answer and answer_cache is not None and query_embedding is not None:
+            answer_cache.put(query_embedding, lang, vector_db.index_version, answer)
+    if not answer:
+        log_event(logging.WARNING, "OpenAI 응답이 비어있습니다", request=trace.id)
+        trace.finish("empty")
+        yield error_msg['empty_response'], "empty"
+        return
+    trace.finish("llm")
+    yield answer, "llm"
+
+def get_or_create_vector_db_multi(pdf_paths, openai_api_key, index_dir=VECTOR_INDEX_MULTI_DIR):
+    """여러 PDF를 하나의 벡터DB로 저장합니다.
 
-def get_or_create_vector_db_multi(pdf_paths, openai_api_key):
-    """여러 PDF를 한 번에 임베딩해서 하나의 벡터DB로 저장합니다."""
-    all_chunks = []
+    인덱스의 manifest와 비교해 추가되거나 바뀐 PDF만 청크 분할/임베딩하고,
+    그대로인 PDF는 기존 행을 복사하며, 목록에서 빠진 PDF의 행은 버립니다.
+    """
+    existing_paths = []
     for pdf_path in pdf_paths:
         if not os.path.exists(pdf_path):
             print(f"❌ PDF 파일이 존재하지 않습니다: {pdf_path}")
             continue
-        print(f"✅ PDF 파일 확인됨: {os.path.abspath(pdf_path)}")
-        chunks = chunk_pdf_to_text_chunks(pdf_path)
-        all_chunks.extend(chunks)
-        print(f"{pdf_path} → 청크 {len(chunks)}개")
-    print(f"총 청크 개수: {len(all_chunks)}")
-    if not all_chunks:
+        existing_paths.append(pdf_path)
+
+    manifest = load_manifest(index_dir) if is_vector_index(index_dir) else None
+    timings = {}
+    unchanged, changed, removed = plan_update(existing_paths, manifest, calculate_file_hash, timings)
+    print(f"PDF {len(existing_paths)}개: 그대로 {len(unchanged)}개, 추가/변경 {len(changed)}개, 삭제 {len(removed)}개 "
+          f"(확인 {sum(ms for _, ms in timings.values()):.1f}ms)")
+    for pdf_path, (method, ms) in timings.items():
+        if method == "hash":
+            print(f"  - 해시 계산: {pdf_path} ({ms:.1f}ms)")
+    for pdf_path in removed:
+        print(f"  - 삭제된 PDF의 청크를 제거합니다: {pdf_path}")
+    if manifest is not None and not changed and not removed:
+        print("바뀐 PDF가 없어 기존 벡터DB를 사용합니다.")
+        return load_vector_db(index_dir, openai_api_key)
+    if not existing_paths:
         print("❌ 임베딩할 청크가 없습니다.")
         return None
+
+    # 순환 import 방지 (ingest_pipeline이 rag_utils를 사용)
+    from ingest_pipeline import build_index, make_fingerprint, make_dedup_filter
+    dedup_filter = make_dedup_filter()
     embeddings = OpenAIEmbeddings(
         openai_api_key=openai_api_key,
-        model="text-embedding-3-small"
+        model="text-embedding-3-small",
+        document_store=get_embedding_store()
     )
-    doc_embeddings = embeddings.embed_documents([doc['page_content'] for doc in all_chunks])
-    vector_db = SimpleVectorDB(all_chunks, embeddings, doc_embeddings)
-    with open("vector_db_multi.pkl", "wb") as f:
-        pickle.dump(vector_db, f)
-    print("벡터DB 저장 완료: vector_db_multi.pkl")
-    return vector_db
+    sources = {}
 
-def merge_vector_dbs(db_paths, openai_api_key, save_path="vector_db_merged.pkl"):
-    """여러 벡터DB(pkl)를 병합하여 하나의 벡터DB로 만듭니다."""
-    all_chunks = []
-    for db_path in db_paths:
-        if not os.path.exists(db_path):
-            print(f"❌ DB 파일이 존재하지 않습니다: {db_path}")
-            continue
-        with open(db_path, "rb") as f:
-            db = pickle.load(f)
-            all_chunks.extend(db.documents)
-    print(f"총 합쳐진 청크 개수: {len(all_chunks)}")
-    if not all_chunks:
-        print("❌ 합칠 청크가 없습니다.")
+    def iter_items():
+        """PDF 순서대로 (문서, 임베딩 또는 None)을 반환하면서 PDF별 행 범위를 기록합니다."""
+        old_documents = old_matrix = None
+        if unchanged:
+            old_documents, old_matrix, _ = open_vector_index(index_dir)
+        # 추가/변경된 PDF는 여러 프로세스에서 미리 추출 (결과는 existing_paths 순서대로 나옴)
+        changed_chunks = chunk_pdfs([pdf_path for pdf_path in existing_paths if pdf_path in changed])
+        row = 0
+        for pdf_path in existing_paths:
+            entry = unchanged.get(pdf_path)
+            if entry is not None:
+                # 바뀌지 않은 PDF는 기존 인덱스의 행을 그대로 복사
+                chunk_ids = entry["chunk_ids"]
+                info = {key: entry[key] for key in ("hash", "size", "mtime_ns", "inode")}
+                for i in range(entry["row_start"], entry["row_end"]):
+                    if dedup_filter is not None:
+                        # 기존 행은 manifest의 행 범위를 지키도록 항상 남기고 비교 대상으로만 등록
+                        dedup_filter.register(old_documents[i]['page_content'])
+                    yield old_documents[i], np.array(old_matrix[i])
+            else:
+                print(f"✅ PDF 파일 처리: {os.path.abspath(pdf_path)}")
+                info = changed[pdf_path]
+                _, documents = next(changed_chunks)
+                chunk_ids = []
+                for i, doc in enumerate(documents):
+                    # 앞에서 본 청크와 거의 같으면 임베딩하지 않고 버림 (chunk_index는 원래 위치 유지)
+                    if dedup_filter is not None and dedup_filter.check(doc['page_content'], pdf_path):
+                        continue
+                    chunk_ids.append(make_chunk_id(info["hash"], i))
+                    doc['metadata'].update({'source': pdf_path, 'chunk_index': i, 'chunk_id': chunk_ids[-1]})
+                    yield doc, None
+                print(f"{pdf_path} → 청크 {len(documents)}개 (중복 제외 {len(chunk_ids)}개)")
+            sources[pdf_path] = dict(info, chunk_ids=chunk_ids, row_start=row, row_end=row + len(chunk_ids))
+            row += len(chunk_ids)
+        # 기존 인덱스 파일의 메모리 매핑을 닫은 뒤 교체 (Windows에서는 열린 파일을 지울 수 없음)
+        del old_documents, old_matrix
+
+    fingerprint = make_fingerprint([(pdf_path, (unchanged.get(pdf_path) or changed.get(pdf_path))["hash"]) for pdf_path in existing_paths],
+                                   dedup_filter and dedup_filter.threshold)
+    header = build_index(index_dir, iter_items(), embeddings, fingerprint=fingerprint,
+                         before_close=lambda writer: save_manifest(writer.build_dir, sources, EMBEDDING_MODEL),
+                         dedup=dedup_filter)
+    if header is None:
         return None
+    return load_vector_db(index_dir, openai_api_key)
+
+def merge_vector_dbs(db_paths, openai_api_key, save_path=VECTOR_INDEX_MERGED_DIR):
+    """여러 벡터DB(인덱스 디렉토리 또는 pkl)를 병합하여 하나의 벡터DB로 만듭니다.
+
+    저장된 임베딩을 배치 단위로 이어 붙이므로 OpenAI API를 호출하지 않습니다.
+    (임베딩이 없는 예전 pickle만 저장소를 거쳐 필요한 청크를 임베딩)
+    """
+    # 순환 import 방지 (ingest_pipeline이 rag_utils를 사용)
+    from ingest_pipeline import build_index_from_vector_dbs
     embeddings = OpenAIEmbeddings(
         openai_api_key=openai_api_key,
-        model="text-embedding-3-small"
+        model="text-embedding-3-small",
+        document_store=get_embedding_store()
     )
-    doc_embeddings = embeddings.embed_documents([doc['page_content'] for doc in all_chunks])
-    vector_db = SimpleVectorDB(all_chunks, embeddings, doc_embeddings)
-    with open(save_path, "wb") as f:
-        pickle.dump(vector_db, f)
-    print(f"병합 벡터DB 저장 완료: {save_path}")
-    return vector_db
+    header = build_index_from_vector_dbs(db_paths, save_path, embeddings)
+    if header is None:
+        print("❌ 합칠 청크가 없습니다.")
+        return None
+    print(f"병합 벡터DB 저장 완료: {save_path} (총 청크 개수: {header['count']})")
+    return load_vector_db(save_path, openai_api_key)
 
 if __name__ == "__main__":
     api_key = os.getenv("OPENAI_API_KEY")
@@ -653,6 +1402,7 @@ if __name__ == "__main__":
         print(f"현재 파일 해시: {cache_status['current_hash']}")
         print(f"캐시된 파일 해시: {cache_status['cached_hash']}")
         print(f"청크 수: {cache_status['chunk_count']}")
+        print(f"파일 확인: {cache_status['validation']}")
     
     print("\n=== 벡터DB 준비 ===")
     vector_db = get_or_create_vector_db(api_key)
@@ -681,8 +1431,8 @@ if __name__ == "__main__":
     # 1~64.pdf 임베딩 및 저장
     pdf_paths_64 = [f"pdf/{i}.pdf" for i in range(1, 65)]
     get_or_create_vector_db_multi(pdf_paths_64, api_key)
-    # 64개 PDF 임베딩 결과를 별도 파일로 저장
-    shutil.copy("vector_db_multi.pkl", "vector_db_64multi.pkl")
+    # 64개 PDF 임베딩 결과를 별도 인덱스로 저장
+    shutil.copytree(VECTOR_INDEX_MULTI_DIR, "vector_index_64multi", dirs_exist_ok=True)
     # 기존 단일 PDF DB와 병합
-    db_paths = ["vector_db.pkl", "vector_db_64multi.pkl"]
-    merge_vector_dbs(db_paths, api_key, save_path="vector_db_merged.pkl") 
\ No newline at end of file
+    db_paths = [VECTOR_INDEX_DIR, "vector_index_64multi"]
+    merge_vector_dbs(db_paths, api_key, save_path=VECTOR_INDEX_MERGED_DIR)
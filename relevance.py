@@ -0,0 +1,76 @@
+"""
+검색 관련도 기준 (LLM 호출 생략, 적응형 k)
+
+질문 임베딩과 청크의 코사인 유사도가 기준보다 낮으면 문서에 관련 내용이 없다고 보고
+LLM을 호출하지 않고 바로 안내 메시지(no_chunks)를 돌려줍니다.
+
+- 기준값: RAG_MIN_RELEVANCE 환경변수 > 인덱스 헤더의 보정값("relevance") > 기본값 DEFAULT_MIN_RELEVANCE
+- 보정: python benchmark_rag.py calibrate <인덱스 디렉토리> [질문 파일]
+  (관련 질문의 RELEVANCE_RECALL_TARGET 비율 이상이 통과하는 가장 높은 기준을 헤더에 저장)
+- 적응형 k: 최대 RAG_TOP_K개 중 최고 점수보다 RAG_SCORE_GAP 이상 낮은 청크는 프롬프트에 넣지 않음
+"""
+
+import os
+import time
+import numpy as np
+from vector_store import read_header, write_header
+
+DEFAULT_MIN_RELEVANCE = 0.2  # text-embedding-3-small 기준 (보정하지 않았을 때)
+RAG_MIN_RELEVANCE = os.getenv("RAG_MIN_RELEVANCE")  # 설정하면 보정값보다 우선
+RAG_TOP_K = int(os.getenv("RAG_TOP_K", "3"))
+RAG_SCORE_GAP = float(os.getenv("RAG_SCORE_GAP", "0.1"))
+RELEVANCE_RECALL_TARGET = 0.95
+CALIBRATION_MARGIN = 0.02  # 보정한 기준에서 이만큼 낮춰 여유를 둠
+
+def relevance_threshold(vector_db):
+    """벡터DB에 적용할 관련도 기준을 반환합니다."""
+    if RAG_MIN_RELEVANCE:
+        return float(RAG_MIN_RELEVANCE)
+    header = getattr(vector_db, "index_header", None) or {}
+    calibration = header.get("relevance")
+    if calibration and calibration.get("threshold") is not None:
+        return float(calibration["threshold"])
+    return DEFAULT_MIN_RELEVANCE
+
+def select_relevant(scored_docs, threshold, score_gap=RAG_SCORE_GAP):
+    """[(문서, 점수), ...]에서 프롬프트에 넣을 문서를 고릅니다.
+
+    반환값: (문서 목록, 최고 점수)
+    - 최고 점수가 threshold 미만이면 빈 목록 (LLM 호출 생략)
+    - 최고 점수보다 score_gap 넘게 낮거나 threshold 미만인 문서는 제외 (적응형 k)
+    - 점수가 모두 None(어휘 검색만으로 찾은 결과)이면 코사인 기준 대신 어휘 기준을 이미 통과한 결과이므로 사용
+      (hybrid_search가 1위 BM25 점수의 LEXICAL_MIN_RELATIVE_SCORE 비율 이상인 청크만 반환)
+    - 점수가 있는 문서와 None인 문서가 섞여 있으면 None인 문서는 기준을 확인할 수 없으므로 제외
+    """
+    scores = [score for _, score in scored_docs if score is not None]
+    if not scores:
+        return [doc for doc, _ in scored_docs], None
+    scored_docs = [(doc, score) for doc, score in scored_docs if score is not None]
+    best = max(scores)
+    if best < threshold:
+        return [], best
+    cutoff = max(threshold, best - score_gap)
+    return [doc for doc, score in scored_docs if score >= cutoff], best
+
+def choose_threshold(relevant_scores, irrelevant_scores, recall_target=RELEVANCE_RECALL_TARGET, margin=CALIBRATION_MARGIN):
+    """관련 질문/무관한 질문의 최고 점수로 기준을 정합니다.
+
+    관련 질문의 recall_target 비율 이상이 통과하는 가장 높은 기준에서 margin만큼 낮춥니다.
+    반환값: (기준, {"recall", "rejected"}) - rejected는 기준 미만이라 LLM 호출 없이 답할 무관한 질문 비율
+    """
+    relevant = np.sort(np.asarray(relevant_scores, dtype=np.float64))
+    irrelevant = np.asarray(irrelevant_scores, dtype=np.float64)
+    allowed_misses = int(len(relevant) * (1 - recall_target))
+    threshold = float(relevant[allowed_misses]) - margin
+    return threshold, {
+        "recall": float(np.mean(relevant >= threshold)),
+        "rejected": float(np.mean(irrelevant < threshold)) if len(irrelevant) else 0.0,
+    }
+
+def save_calibration(index_dir, threshold, report, model):
+    """보정한 기준을 인덱스 헤더에 기록합니다."""
+    header = read_header(index_dir)
+    header["relevance"] = dict(report, threshold=round(threshold, 4), model=model,
+                               recall_target=RELEVANCE_RECALL_TARGET, created_at=time.strftime("%Y-%m-%d %H:%M:%S"))
+    write_header(index_dir, header)
+    return header["relevance"]
@@ -0,0 +1,144 @@
+"""
+같은 요청 합치기 (single-flight)
+
+채팅방에 사람이 많거나 여러 사용자가 같은 예시 질문을 누르면 똑같은 RAG 답변/번역 요청이
+동시에 여러 번 실행됩니다. 키 (작업, 정규화한 입력, 언어, 모델)가 같은 요청이 이미 진행 중이면
+새로 호출하지 않고 먼저 시작한 요청의 결과를 기다렸다가 함께 받습니다.
+
+- 첫 요청(leader)만 실제로 실행하고, 동시에 들어온 같은 요청(follower)은 같은 결과(또는 같은 예외)를 받음
+- 결과를 저장해 두지는 않음 (끝난 요청은 바로 목록에서 빠짐, 재사용은 답변 캐시가 담당)
+- leader가 결과 없이 중단하면(FlightAbandoned, 예: 화면이 스트림을 중간에 닫음) follower는 다시 요청
+- follower는 최대 SINGLEFLIGHT_WAIT_TIMEOUT초까지만 기다리고, 넘으면 직접 실행
+- stats()로 실제 실행 수와 합쳐진 요청 수를 확인
+- SINGLEFLIGHT_ENABLED=0이면 합치지 않고 매번 실행
+"""
+
+import os
+import threading
+
+SINGLEFLIGHT_ENABLED = os.getenv("SINGLEFLIGHT_ENABLED", "1") == "1"
+SINGLEFLIGHT_WAIT_TIMEOUT = float(os.getenv("SINGLEFLIGHT_WAIT_TIMEOUT", "120"))  # 스트리밍 답변 전체를 기다릴 수 있는 시간
+
+class FlightAbandoned(Exception):
+    """leader가 결과를 만들지 않고 중단한 요청 (기다리던 요청은 직접 다시 실행)"""
+
+def normalize_key_text(text):
+    """공백 차이만 있는 입력이 같은 키가 되도록 정리합니다."""
+    return " ".join(text.split())
+
+class InFlightCall:
+    """진행 중인 요청 하나 (결과를 기다리는 follower들이 공유)"""
+    def __init__(self):
+        self._done = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+
+    def wait(self, timeout=SINGLEFLIGHT_WAIT_TIMEOUT):
+        """요청이 끝날 때까지 기다린 뒤 결과를 반환합니다. (실패했으면 같은 예외를 발생)"""
+        if not self._done.wait(timeout):
+            raise TimeoutError("같은 요청의 결과를 기다리다 시간이 초과되었습니다.")
+        if self.error is not None:
+            raise self.error
+        return self.result
+
+class SingleFlight:
+    """키가 같은 동시 요청을 한 번만 실행하는 그룹"""
+    def __init__(self, name, enabled=SINGLEFLIGHT_ENABLED):
+        self.name = name
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._calls = {}
+        self.executed = 0
+        self.coalesced = 0
+        self.failures = 0
+        self.abandoned = 0
+        self.timeouts = 0
+
+    def join(self, key):
+        """(call, leader 여부)를 반환합니다. leader는 실행 후 반드시 complete()를 호출해야 합니다."""
+        with self._lock:
+            call = self._calls.get(key) if self.enabled else None
+            if call is not None:
+                call.waiters += 1
+                self.coalesced += 1
+                return call, False
+            call = InFlightCall()
+            if self.enabled:
+                self._calls[key] = call
+            self.executed += 1
+            return call, True
+
+    def complete(self, key, call, result=None, error=None):
+        """leader의 결과를 기록하고 기다리던 follower들을 깨웁니다."""
+        with self._lock:
+            if self._calls.get(key) is call:
+                del self._calls[key]
+            if isinstance(error, FlightAbandoned):
+                self.abandoned += 1
+            elif error is not None:
+                self.failures += 1
+        call.result = result
+        call.error = error
+        call._done.set()
+
+    def do(self, key, func, *args, **kwargs):
+        """func(*args, **kwargs)를 실행하거나, 같은 키의 진행 중 요청 결과를 기다려 반환합니다."""
+        call, is_leader = self.join(key)
+        while not is_leader:
+            try:
+                return call.wait()
+            except FlightAbandoned:
+                # leader가 중단됨 → 다시 참여 (새 leader가 되거나 다른 진행 중 요청을 기다림)
+                call, is_leader = self.join(key)
+            except TimeoutError:
+                # leader가 너무 오래 걸림 → 합치지 않고 직접 실행
+                self.record_timeout()
+                return func(*args, **kwargs)
+        try:
+            result = func(*args, **kwargs)
+        except Exception as e:
+            self.complete(key, call, error=e)
+            raise
+        except BaseException:
+            # KeyboardInterrupt, SystemExit 등으로 끝나도 기다리는 요청을 깨우고 목록에서 뺌
+            self.complete(key, call, error=FlightAbandoned("같은 요청을 처리하던 작업이 중단되었습니다."))
+            raise
+        self.complete(key, call, result=result)
+        return result
+
+    def record_timeout(self):
+        """기다리다 시간이 초과된 follower 수를 셉니다."""
+        with self._lock:
+            self.timeouts += 1
+
+    def stats(self):
+        """실제 실행 수, 합쳐진 요청 수, 진행 중 요청 수를 반환합니다."""
+        with self._lock:
+            total = self.executed + self.coalesced
+            return {
+                "executed": self.executed,
+                "coalesced": self.coalesced,
+                "coalesced_ratio": self.coalesced / total if total else 0.0,
+                "failures": self.failures,
+                "abandoned": self.abandoned,
+                "timeouts": self.timeouts,
+                "in_flight": len(self._calls),
+            }
+
+_groups = {}
+_groups_lock = threading.Lock()
+
+def get_singleflight(name):
+    """이름별로 프로세스 전체에서 공유하는 SingleFlight 그룹을 반환합니다."""
+    with _groups_lock:
+        group = _groups.get(name)
+        if group is None:
+            group = _groups[name] = SingleFlight(name)
+        return group
+
+def get_singleflight_stats():
+    """모든 그룹의 통계를 {이름: stats} 형태로 반환합니다."""
+    with _groups_lock:
+        groups = list(_groups.values())
+    return {group.name: group.stats() for group in groups}
@@ -0,0 +1,55 @@
+"""
+토큰 수 계산 (tiktoken)
+
+인코딩은 모델별로 한 번만 만들어 재사용합니다.
+tiktoken 인코딩 파일을 받을 수 없는 환경(오프라인 등)에서는 UTF-8 바이트 수로 계산합니다.
+(BPE 토큰은 최소 1바이트이므로 바이트 수는 항상 토큰 수 이상인 안전한 상한입니다.)
+"""
+
+import threading
+
+DEFAULT_ENCODING = "cl100k_base"
+
+_encodings = {}
+_encodings_lock = threading.Lock()
+
+def get_encoding(model):
+    """모델의 tiktoken 인코딩을 반환합니다. (사용할 수 없으면 None)"""
+    with _encodings_lock:
+        if model in _encodings:
+            return _encodings[model]
+        try:
+            import tiktoken
+            try:
+                encoding = tiktoken.encoding_for_model(model)
+            except KeyError:
+                encoding = tiktoken.get_encoding(DEFAULT_ENCODING)
+        except Exception as e:
+            print(f"⚠️ tiktoken 인코딩을 불러올 수 없어 바이트 수로 토큰을 계산합니다: {e}")
+            encoding = None
+        _encodings[model] = encoding
+        return encoding
+
+def count_tokens(text, model):
+    """텍스트의 토큰 수를 반환합니다."""
+    encoding = get_encoding(model)
+    if encoding is None:
+        return len(text.encode('utf-8'))
+    return len(encoding.encode_ordinary(text))
+
+def count_tokens_batch(texts, model):
+    """여러 텍스트의 토큰 수 목록을 반환합니다."""
+    encoding = get_encoding(model)
+    if encoding is None:
+        return [len(text.encode('utf-8')) for text in texts]
+    return [len(tokens) for tokens in encoding.encode_ordinary_batch(list(texts))]
+
+def truncate_to_tokens(text, max_tokens, model):
+    """텍스트를 최대 max_tokens 토큰으로 자릅니다."""
+    encoding = get_encoding(model)
+    if encoding is None:
+        return text.encode('utf-8')[:max_tokens].decode('utf-8', errors='ignore')
+    tokens = encoding.encode_ordinary(text)
+    if len(tokens) <= max_tokens:
+        return text
+    return encoding.decode(tokens[:max_tokens])
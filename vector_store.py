@@ -0,0 +1,303 @@
+"""
+메모리 매핑 기반 벡터 인덱스 저장 형식
+
+vector_db.pkl 처럼 SimpleVectorDB 전체를 pickle로 저장하는 대신,
+디렉토리 하나에 다음 파일들을 나누어 저장합니다.
+
+    header.json            형식 버전, 청크 수, 차원, 모델 등 메타데이터
+    embeddings.npy         정규화된 float32 임베딩 행렬 (np.load(mmap_mode='r')로 로드)
+    texts.bin              청크 본문(UTF-8)을 이어 붙인 blob
+    text_offsets.npy       texts.bin 안에서 각 청크의 시작/끝 위치 (int64, 청크 수 + 1)
+    metadata.bin           청크 메타데이터(JSON)를 이어 붙인 blob
+    metadata_offsets.npy   metadata.bin 안에서 각 메타데이터의 위치
+
+로드는 파일을 메모리에 매핑만 하므로 거의 즉시 끝나고, 여러 워커 프로세스가
+OS 페이지 캐시를 공유합니다.
+"""
+
+import os
+import json
+import time
+import uuid
+import shutil
+import numpy as np
+from collections.abc import Sequence
+
+INDEX_FORMAT = "buchat-vector-index"
+INDEX_FORMAT_VERSION = 1
+
+HEADER_FILE = "header.json"
+EMBEDDINGS_FILE = "embeddings.npy"
+TEXTS_FILE = "texts.bin"
+TEXT_OFFSETS_FILE = "text_offsets.npy"
+METADATA_FILE = "metadata.bin"
+METADATA_OFFSETS_FILE = "metadata_offsets.npy"
+
+# 작성 중에만 쓰는 원시(raw) 파일 (모두 이어 쓰기만 하므로 중단 지점까지 잘라 이어서 작성 가능)
+_RAW_EMBEDDINGS_FILE = "embeddings.f32"
+_RAW_TEXT_OFFSETS_FILE = "text_offsets.i64"
+_RAW_METADATA_OFFSETS_FILE = "metadata_offsets.i64"
+CHECKPOINT_FILE = "checkpoint.json"
+
+COPY_BLOCK_ROWS = 4096  # raw → npy 변환 시 한 번에 복사할 행 수
+
+def is_vector_index(path):
+    """경로가 벡터 인덱스 디렉토리인지 확인합니다."""
+    return os.path.isdir(path) and os.path.exists(os.path.join(path, HEADER_FILE))
+
+def read_header(index_dir):
+    """인덱스 헤더(JSON)를 읽고 형식/버전을 검사합니다."""
+    with open(os.path.join(index_dir, HEADER_FILE), 'r', encoding='utf-8') as f:
+        header = json.load(f)
+    if header.get("format") != INDEX_FORMAT:
+        raise ValueError(f"알 수 없는 인덱스 형식입니다: {header.get('format')}")
+    if header.get("version", 0) > INDEX_FORMAT_VERSION:
+        raise ValueError(f"지원하지 않는 인덱스 버전입니다: {header.get('version')} (지원: {INDEX_FORMAT_VERSION} 이하)")
+    return header
+
+def write_header(index_dir, header):
+    """인덱스 헤더를 임시 파일에 쓴 뒤 교체합니다."""
+    path = os.path.join(index_dir, HEADER_FILE)
+    with open(path + ".tmp", 'w', encoding='utf-8') as f:
+        json.dump(header, f, ensure_ascii=False, indent=2)
+    os.replace(path + ".tmp", path)
+
+def _open_blob(path):
+    """blob 파일을 읽기 전용으로 메모리 매핑합니다. (빈 파일은 빈 배열)"""
+    if os.path.getsize(path) == 0:
+        return np.empty(0, dtype=np.uint8)
+    return np.memmap(path, dtype=np.uint8, mode='r')
+
+class ChunkStore(Sequence):
+    """texts.bin / metadata.bin 에서 청크를 필요할 때만 읽어 오는 읽기 전용 문서 목록"""
+    def __init__(self, index_dir):
+        self.index_dir = index_dir
+        self._texts = _open_blob(os.path.join(index_dir, TEXTS_FILE))
+        self._text_offsets = np.load(os.path.join(index_dir, TEXT_OFFSETS_FILE), mmap_mode='r')
+        self._metadata = _open_blob(os.path.join(index_dir, METADATA_FILE))
+        self._metadata_offsets = np.load(os.path.join(index_dir, METADATA_OFFSETS_FILE), mmap_mode='r')
+
+    def __len__(self):
+        return len(self._text_offsets) - 1
+
+    def get_text(self, i):
+        start, end = int(self._text_offsets[i]), int(self._text_offsets[i + 1])
+        return bytes(self._texts[start:end]).decode('utf-8')
+
+    def get_metadata(self, i):
+        start, end = int(self._metadata_offsets[i]), int(self._metadata_offsets[i + 1])
+        return json.loads(bytes(self._metadata[start:end]).decode('utf-8'))
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self)))]
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError(i)
+        return {'page_content': self.get_text(i), 'metadata': self.get_metadata(i)}
+
+class IndexWriter:
+    """문서와 임베딩을 배치 단위로 받아 인덱스 디렉토리에 순서대로 기록합니다.
+
+    resume=True이면 이전에 중단된 작성 디렉토리(index_dir.building)의 마지막 체크포인트부터
+    이어서 작성합니다. (fingerprint가 다르면 입력이 바뀐 것으로 보고 새로 시작)
+    """
+    def __init__(self, index_dir, model="text-embedding-3-small", resume=False, fingerprint=None):
+        self.index_dir = index_dir
+        self.model = model
+        self.fingerprint = fingerprint
+        self.build_dir = index_dir + ".building"
+        self.count = 0
+        self.dim = None
+        checkpoint = self._read_checkpoint() if resume else None
+        if checkpoint is not None and checkpoint.get("fingerprint") == fingerprint and checkpoint.get("model") == model:
+            self._reopen(checkpoint)
+            return
+        if os.path.exists(self.build_dir):
+            shutil.rmtree(self.build_dir)
+        os.makedirs(self.build_dir)
+        self._embeddings = open(os.path.join(self.build_dir, _RAW_EMBEDDINGS_FILE), 'wb')
+        self._texts = open(os.path.join(self.build_dir, TEXTS_FILE), 'wb')
+        self._metadata = open(os.path.join(self.build_dir, METADATA_FILE), 'wb')
+        self._text_offsets = open(os.path.join(self.build_dir, _RAW_TEXT_OFFSETS_FILE), 'wb')
+        self._metadata_offsets = open(os.path.join(self.build_dir, _RAW_METADATA_OFFSETS_FILE), 'wb')
+        self._text_end = 0
+        self._metadata_end = 0
+        self._text_offsets.write(np.zeros(1, dtype=np.int64).tobytes())
+        self._metadata_offsets.write(np.zeros(1, dtype=np.int64).tobytes())
+
+    def _files(self):
+        return (self._embeddings, self._texts, self._metadata, self._text_offsets, self._metadata_offsets)
+
+    def _read_checkpoint(self):
+        path = os.path.join(self.build_dir, CHECKPOINT_FILE)
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (json.JSONDecodeError, OSError):
+            return None
+
+    def _reopen(self, checkpoint):
+        """체크포인트 이후에 쓰인 부분을 잘라내고 이어 쓰기 모드로 엽니다."""
+        self.count = checkpoint["count"]
+        self.dim = checkpoint["dim"]
+        offsets_size = (self.count + 1) * 8
+        text_offsets = np.fromfile(os.path.join(self.build_dir, _RAW_TEXT_OFFSETS_FILE), dtype=np.int64, count=self.count + 1)
+        metadata_offsets = np.fromfile(os.path.join(self.build_dir, _RAW_METADATA_OFFSETS_FILE), dtype=np.int64, count=self.count + 1)
+        self._text_end = int(text_offsets[-1])
+        self._metadata_end = int(metadata_offsets[-1])
+        sizes = {
+            _RAW_EMBEDDINGS_FILE: self.count * (self.dim or 0) * 4,
+            TEXTS_FILE: self._text_end,
+            METADATA_FILE: self._metadata_end,
+            _RAW_TEXT_OFFSETS_FILE: offsets_size,
+            _RAW_METADATA_OFFSETS_FILE: offsets_size,
+        }
+        files = {}
+        for name, size in sizes.items():
+            f = open(os.path.join(self.build_dir, name), 'r+b')
+            f.truncate(size)
+            f.seek(size)
+            files[name] = f
+        self._embeddings = files[_RAW_EMBEDDINGS_FILE]
+        self._texts = files[TEXTS_FILE]
+        self._metadata = files[METADATA_FILE]
+        self._text_offsets = files[_RAW_TEXT_OFFSETS_FILE]
+        self._metadata_offsets = files[_RAW_METADATA_OFFSETS_FILE]
+
+    def checkpoint(self):
+        """지금까지 쓴 내용을 디스크로 내보내고 체크포인트를 기록합니다."""
+        for f in self._files():
+            f.flush()
+            os.fsync(f.fileno())
+        checkpoint = {"count": self.count, "dim": self.dim, "model": self.model, "fingerprint": self.fingerprint}
+        path = os.path.join(self.build_dir, CHECKPOINT_FILE)
+        with open(path + ".tmp", 'w', encoding='utf-8') as f:
+            json.dump(checkpoint, f)
+        os.replace(path + ".tmp", path)
+
+    def add(self, documents, vectors):
+        """정규화된 임베딩 행렬과 같은 순서의 문서 목록을 추가합니다."""
+        vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+        if len(documents) != len(vectors):
+            raise ValueError(f"문서 수({len(documents)})와 임베딩 수({len(vectors)})가 다릅니다.")
+        if len(documents) == 0:
+            return
+        if self.dim is None:
+            self.dim = vectors.shape[1]
+        elif vectors.shape[1] != self.dim:
+            raise ValueError(f"임베딩 차원이 다릅니다: {vectors.shape[1]} (기존: {self.dim})")
+
+        self._embeddings.write(vectors.tobytes())
+        text_offsets = np.empty(len(documents), dtype=np.int64)
+        metadata_offsets = np.empty(len(documents), dtype=np.int64)
+        for i, doc in enumerate(documents):
+            if isinstance(doc, dict):
+                text, metadata = doc.get('page_content', ''), doc.get('metadata', {})
+            else:
+                text, metadata = getattr(doc, 'page_content', str(doc)), getattr(doc, 'metadata', {})
+            text_bytes = text.encode('utf-8')
+            metadata_bytes = json.dumps(metadata, ensure_ascii=False).encode('utf-8')
+            self._texts.write(text_bytes)
+            self._metadata.write(metadata_bytes)
+            self._text_end += len(text_bytes)
+            self._metadata_end += len(metadata_bytes)
+            text_offsets[i] = self._text_end
+            metadata_offsets[i] = self._metadata_end
+        self._text_offsets.write(text_offsets.tobytes())
+        self._metadata_offsets.write(metadata_offsets.tobytes())
+        self.count += len(documents)
+
+    def suspend(self):
+        """파일만 닫고 작성 디렉토리와 체크포인트는 남겨 둡니다. (resume=True로 다시 열어 이어서 작성)"""
+        for f in self._files():
+            f.close()
+
+    def abort(self):
+        """작성 중인 파일을 버립니다. (기존 인덱스는 그대로 둠)"""
+        for f in self._files():
+            f.close()
+        shutil.rmtree(self.build_dir, ignore_errors=True)
+
+    def close(self, extra_header=None):
+        """임베딩을 .npy로 변환하고 헤더를 쓴 뒤 인덱스 디렉토리를 교체합니다."""
+        for f in self._files():
+            f.close()
+        dim = self.dim or 0
+
+        # raw float32 파일을 블록 단위로 .npy에 복사 (전체를 메모리에 올리지 않음)
+        raw_path = os.path.join(self.build_dir, _RAW_EMBEDDINGS_FILE)
+        matrix = np.lib.format.open_memmap(
+            os.path.join(self.build_dir, EMBEDDINGS_FILE), mode='w+', dtype=np.float32, shape=(self.count, dim)
+        )
+        if self.count:
+            raw = np.memmap(raw_path, dtype=np.float32, mode='r', shape=(self.count, dim))
+            for start in range(0, self.count, COPY_BLOCK_ROWS):
+                matrix[start:start + COPY_BLOCK_ROWS] = raw[start:start + COPY_BLOCK_ROWS]
+            del raw
+        matrix.flush()
+        del matrix
+        os.remove(raw_path)
+
+        for raw_name, name in ((_RAW_TEXT_OFFSETS_FILE, TEXT_OFFSETS_FILE), (_RAW_METADATA_OFFSETS_FILE, METADATA_OFFSETS_FILE)):
+            raw_path = os.path.join(self.build_dir, raw_name)
+            np.save(os.path.join(self.build_dir, name), np.fromfile(raw_path, dtype=np.int64))
+            os.remove(raw_path)
+        checkpoint_path = os.path.join(self.build_dir, CHECKPOINT_FILE)
+        if os.path.exists(checkpoint_path):
+            os.remove(checkpoint_path)
+
+        header = {
+            "format": INDEX_FORMAT,
+            "version": INDEX_FORMAT_VERSION,
+            "count": self.count,
+            "dim": dim,
+            "dtype": "float32",
+            "normalized": True,
+            "model": self.model,
+            "index_version": uuid.uuid4().hex[:12],
+            "created_at": time.time(),
+        }
+        if extra_header:
+            header.update(extra_header)
+        write_header(self.build_dir, header)
+
+        # 기존 인덱스를 새 인덱스로 교체
+        # 기존 디렉토리는 먼저 index_dir.old로 옮겨 두고, 새 인덱스가 자리를 잡은 뒤에 삭제
+        # (교체 도중 중단되어도 기존 인덱스가 index_dir.old에 남아 있음)
+        # (이미 매핑된 기존 파일은 삭제되어도 열려 있는 프로세스에서 계속 읽을 수 있음)
+        old_dir = self.index_dir + ".old"
+        if os.path.exists(self.index_dir):
+            if os.path.exists(old_dir):
+                shutil.rmtree(old_dir)
+            os.replace(self.index_dir, old_dir)
+        os.replace(self.build_dir, self.index_dir)
+        if os.path.exists(old_dir):
+            shutil.rmtree(old_dir, ignore_errors=True)
+        return header
+
+def write_vector_index(index_dir, documents, doc_embeddings, model="text-embedding-3-small", batch_size=COPY_BLOCK_ROWS):
+    """문서 목록과 정규화된 임베딩 행렬을 인덱스 디렉토리로 저장합니다."""
+    writer = IndexWriter(index_dir, model=model)
+    for start in range(0, len(documents), batch_size):
+        writer.add(documents[start:start + batch_size], doc_embeddings[start:start + batch_size])
+    return writer.close()
+
+def open_vector_index(index_dir):
+    """인덱스 디렉토리를 메모리 매핑으로 엽니다. (복사 없음)
+
+    반환값: (ChunkStore, 임베딩 행렬(np.memmap), 헤더 dict)
+    """
+    header = read_header(index_dir)
+    documents = ChunkStore(index_dir)
+    matrix = np.load(os.path.join(index_dir, EMBEDDINGS_FILE), mmap_mode='r')
+    if len(documents) != header["count"] or matrix.shape[0] != header["count"]:
+        raise ValueError(f"인덱스 파일이 손상되었습니다: {index_dir} (헤더 청크 수: {header['count']})")
+    return documents, matrix, header
+
+def index_size_bytes(index_dir):
+    """인덱스 디렉토리의 전체 파일 크기를 반환합니다."""
+    return sum(entry.stat().st_size for entry in os.scandir(index_dir) if entry.is_file())